@@ -1007,8 +1007,7 @@ export class BrowserStorageDrive implements Contents.IDrive {
     options?: Contents.IFetchOptions,
   ): Promise<IModel | null> {
     const name = PathExt.basename(path);
-    const parentContents = await this._getServerDirectory(URLExt.join(path, '..'));
-    let model = parentContents.get(name);
+    let model = await this._getServerChild(URLExt.join(path, '..'), name);
     if (!model) {
       return null;
     }
@@ -1097,38 +1096,168 @@ export class BrowserStorageDrive implements Contents.IDrive {
     const content = this._serverContents.get(path) || new Map();
 
     if (!this._serverContents.has(path)) {
-      // Check if contents are indexed by looking for the filename in PageConfig
-      const contentsAllJsonFile = PageConfig.getOption('contentsAllJsonFile');
-      if (!contentsAllJsonFile) {
-        this._serverContents.set(path, content);
-        return content;
+      const listing = await this._getServerListing(path);
+      // only the first page of a large folder is waited for, the others are added later
+      const [firstPage, ...otherPages] = listing?.pages ?? [];
+      const files = firstPage
+        ? await this._getServerPage(path, firstPage)
+        : (listing?.content ?? []);
+
+      // another listing of the folder may have finished first
+      if (this._serverContents.has(path)) {
+        return this._serverContents.get(path) as Map<string, IModel>;
       }
 
-      const apiURL = URLExt.join(
-        PageConfig.getBaseUrl(),
-        'api/contents',
-        path,
-        contentsAllJsonFile,
-      );
-
-      try {
-        const response = await fetch(apiURL);
-        const json = JSON.parse(await response.text());
-        for (const file of json['content'] as IModel[]) {
-          content.set(file.name, file);
-        }
-      } catch (err) {
-        console.warn(
-          `don't worry, about ${err}... nothing's broken. If there had been a
-          file at ${apiURL}, you might see some more files.`,
-        );
+      for (const file of files) {
+        content.set(file.name, file);
       }
       this._serverContents.set(path, content);
+
+      if (otherPages.length) {
+        void this._addServerPages(path, otherPages, content);
+      }
+    }
+
+    return content;
+  }
+
+  /**
+   * add the other pages of a large folder to its contents, one page at a time, after
+   * its first page was listed.
+   *
+   * @param path - The path of the folder
+   * @param pages - The pages not yet added
+   * @param content - The contents of the folder, keyed by local file name
+   */
+  private async _addServerPages(
+    path: string,
+    pages: Private.IServerPage[],
+    content: Map<string, IModel>,
+  ): Promise<void> {
+    for (const page of pages) {
+      if (this.isDisposed) {
+        return;
+      }
+
+      const files = await this._getServerPage(path, page);
+      for (const file of files) {
+        content.set(file.name, file);
+      }
+
+      if (files.length) {
+        // let any open views of the folder list it again
+        this._fileChanged.emit({
+          type: 'new',
+          oldValue: null,
+          newValue: files[0],
+        });
+      }
+    }
+  }
+
+  /**
+   * retrieve the model of one child of a folder from the contents index file, fetching
+   * at most one page of a large folder.
+   *
+   * @param path - The path of the folder
+   * @param name - The name of the child
+   *
+   * @returns A promise which resolves with the model, if found
+   */
+  private async _getServerChild(
+    path: string,
+    name: string,
+  ): Promise<IModel | undefined> {
+    // the contents of a large folder may not have all of its pages yet
+    const model = this._serverContents.get(path)?.get(name);
+    if (model) {
+      return model;
+    }
+
+    const listing = await this._getServerListing(path);
+    if (!listing?.pages) {
+      return (await this._getServerDirectory(path)).get(name);
+    }
+
+    const page = listing.pages.find(
+      (candidate) =>
+        Private.compareNames(candidate.first, name) <= 0 &&
+        Private.compareNames(name, candidate.last) <= 0,
+    );
+    if (!page) {
+      return undefined;
+    }
+
+    return (await this._getServerPage(path, page)).find((file) => file.name === name);
+  }
+
+  /**
+   * retrieve the contents index file of a folder, once.
+   *
+   * @param path - The path of the folder
+   *
+   * @returns A promise which resolves with the index, or `null` if not indexed
+   */
+  private _getServerListing(path: string): Promise<Private.IServerListing | null> {
+    let listing = this._serverListings.get(path);
+
+    if (!listing) {
+      // Check if contents are indexed by looking for the filename in PageConfig
+      const contentsAllJsonFile = PageConfig.getOption('contentsAllJsonFile');
+      listing = contentsAllJsonFile
+        ? this._fetchServerJSON<Private.IServerListing>(path, contentsAllJsonFile)
+        : Promise.resolve(null);
+      this._serverListings.set(path, listing);
+    }
+
+    return listing;
+  }
+
+  /**
+   * retrieve one page of the contents index of a large folder, once.
+   *
+   * @param path - The path of the folder
+   * @param page - The page, as described in the contents index file
+   *
+   * @returns A promise which resolves with the models in the page
+   */
+  private _getServerPage(path: string, page: Private.IServerPage): Promise<IModel[]> {
+    const key = URLExt.join(path, page.url);
+    let content = this._serverPages.get(key);
+
+    if (!content) {
+      content = this._fetchServerJSON<Private.IServerListing>(path, page.url).then(
+        (json) => json?.content ?? [],
+      );
+      this._serverPages.set(key, content);
     }
 
     return content;
   }
 
+  /**
+   * fetch a JSON file of the contents index of a folder.
+   *
+   * @param path - The path of the folder
+   * @param fileName - The name of the file, next to the folder's contents index file
+   *
+   * @returns A promise which resolves with the parsed JSON, or `null` if it can't be
+   */
+  private async _fetchServerJSON<T>(path: string, fileName: string): Promise<T | null> {
+    const apiURL = URLExt.join(PageConfig.getBaseUrl(), 'api/contents', path, fileName);
+
+    try {
+      const response = await fetch(apiURL);
+      return JSON.parse(await response.text()) as T;
+    } catch (err) {
+      console.warn(
+        `don't worry, about ${err}... nothing's broken. If there had been a
+          file at ${apiURL}, you might see some more files.`,
+      );
+      return null;
+    }
+  }
+
   /**
    * Ensure that a directory path exists before creating children in it.
    */
@@ -1165,6 +1294,8 @@ export class BrowserStorageDrive implements Contents.IDrive {
   }
 
   private _serverContents = new Map<string, Map<string, IModel>>();
+  private _serverListings = new Map<string, Promise<Private.IServerListing | null>>();
+  private _serverPages = new Map<string, Promise<IModel[]>>();
   private _isDisposed = false;
   private _fileChanged = new Signal<Contents.IDrive, Contents.IChangedArgs>(this);
   private _storageName: string = DEFAULT_STORAGE_NAME;
@@ -1217,4 +1348,67 @@ namespace Private {
     nbformat: 4,
     cells: [],
   };
+
+  /**
+   * A page of the contents index of a large folder.
+   */
+  export interface IServerPage {
+    /**
+     * The URL of the page, relative to the folder's contents index file.
+     */
+    url: string;
+
+    /**
+     * The number of models in the page.
+     */
+    count: number;
+
+    /**
+     * The name of the first model in the page.
+     */
+    first: string;
+
+    /**
+     * The name of the last model in the page.
+     */
+    last: string;
+  }
+
+  /**
+   * The contents index file of a folder: its model, with the models of its children as
+   * `content`, or, for a large folder, in `pages`.
+   */
+  export interface IServerListing extends Omit<IModel, 'content'> {
+    /**
+     * The models of the children, unless in `pages`.
+     */
+    content: IModel[] | null;
+
+    /**
+     * The number of children in all of the `pages`.
+     */
+    count?: number;
+
+    /**
+     * The pages of the models of the children, sorted by name.
+     */
+    pages?: IServerPage[];
+  }
+
+  /**
+   * Compare two names by code point, as the pages of a contents index are sorted.
+   */
+  export function compareNames(a: string, b: string): number {
+    const left = Array.from(a);
+    const right = Array.from(b);
+
+    for (let i = 0; i < Math.min(left.length, right.length); i++) {
+      const diff = (left[i].codePointAt(0) ?? 0) - (right[i].codePointAt(0) ?? 0);
+      if (diff !== 0) {
+        return diff;
+      }
+    }
+
+    return left.length - right.length;
+  }
 }
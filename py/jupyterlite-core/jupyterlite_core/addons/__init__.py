@@ -1,25 +1,32 @@
 """Handle efficient discovery of entry points."""
 
+import hashlib
+import os
+import sys
 import warnings
 from copy import deepcopy
 from functools import lru_cache
 from importlib.metadata import entry_points
+from pathlib import Path
 
-from ..constants import ADDON_ENTRYPOINT
+from .. import codec
+from ..constants import ADDON_ENTRYPOINT, ADDON_MANIFEST_VERSION
+
+#: an environment variable which, if set, skips the cached addon manifest
+ENV_NO_ADDON_MANIFEST = "JUPYTERLITE_NO_ADDON_MANIFEST"
 
 
 def merge_addon_aliases(base_aliases, force=None):
     """Update CLI aliases from addons."""
     new_aliases = deepcopy(base_aliases)
 
-    for name, impl in get_addon_implementations(force).items():
-        addon_aliases = getattr(impl, "aliases", {})
-
-        for alias, trait_name in addon_aliases.items():
+    for name, addon in get_addon_manifest(force)["addons"].items():
+        for alias, trait_name in addon["aliases"].items():
             if alias in new_aliases:
                 warnings.warn(f"[lite] [{name}] alias --{alias} cannot be redefined", stacklevel=2)
                 continue
-            new_aliases[alias] = trait_name
+            # JSON has no tuples
+            new_aliases[alias] = tuple(trait_name) if isinstance(trait_name, list) else trait_name
 
     return new_aliases
 
@@ -28,15 +35,12 @@ def merge_addon_flags(base_flags, force=None):
     """Update CLI flags from addons."""
     new_flags = deepcopy(base_flags)
 
-    for name, impl in get_addon_implementations(force).items():
-        addon_flags = getattr(impl, "flags", {})
-
-        for flag, config_help in addon_flags.items():
+    for name, addon in get_addon_manifest(force)["addons"].items():
+        for flag, (config, help_str) in addon["flags"].items():
             if flag not in new_flags:
-                new_flags[flag] = config_help
+                new_flags[flag] = (deepcopy(config), help_str)
             else:
                 flag_config, flag_help = new_flags[flag]
-                config, help_str = config_help
                 for cls_name, traits in config.items():
                     if cls_name in flag_config:
                         warnings.warn(
@@ -79,3 +83,100 @@ def get_addon_entry_points(force=None):
             continue
         all_entry_points[name] = entry_point
     return dict(sorted(all_entry_points.items()))
+
+
+@lru_cache(1)
+def get_addon_manifest(force=None):
+    """Load (and cache) the CLI metadata of all addons, without importing them.
+
+    The manifest is stored in the user's cache directory, and is rebuilt whenever
+    any folder on ``sys.path`` changes, e.g. when a distribution is installed,
+    upgraded or removed. Set ``JUPYTERLITE_NO_ADDON_MANIFEST=1`` to always rebuild it,
+    e.g. while developing an addon in an editable install.
+
+    Pass some noise (like `date.date`) to the ``force`` argument to reload.
+    """
+    manifest_path = None
+    key = get_addon_manifest_key()
+
+    if not (force or os.environ.get(ENV_NO_ADDON_MANIFEST)):
+        manifest_path = get_addon_manifest_path()
+        try:
+            manifest = codec.read_json(manifest_path)
+            if manifest["key"] == key:
+                return manifest
+        except (OSError, ValueError, KeyError):
+            pass
+
+    manifest = build_addon_manifest(get_addon_implementations(force), key)
+
+    if manifest_path:
+        try:
+            manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = manifest_path.with_suffix(f".{os.getpid()}.tmp")
+            codec.write_json(tmp_path, manifest, compact=True)
+            tmp_path.replace(manifest_path)
+        except (TypeError, ValueError):  # pragma: no cover
+            # some flag or alias is not JSON-compatible, so it can't be cached
+            pass
+        except OSError as err:  # pragma: no cover
+            warnings.warn(f"[lite] failed to cache the addon manifest: {err}", stacklevel=2)
+
+    return manifest
+
+
+def build_addon_manifest(implementations, key):
+    """Describe the hooks, CLI aliases, flags and help of addon implementations."""
+    addons = {}
+
+    for name, impl in implementations.items():
+        aliases = getattr(impl, "aliases", {})
+        addons[name] = dict(
+            hooks=sorted(getattr(impl, "__all__", [])),
+            aliases=aliases,
+            flags=getattr(impl, "flags", {}),
+            alias_help=get_alias_help(impl, aliases),
+        )
+
+    return dict(key=key, addons=addons)
+
+
+def get_alias_help(impl, aliases):
+    """Render the help of the traits of one addon class (or its parents)."""
+    classdict = {c.__name__: c for c in impl.mro()[:-3]}
+    alias_help = {}
+
+    for alias, longname in aliases.items():
+        name, fhelp = longname if isinstance(longname, tuple) else (longname, None)
+        classname, traitname = name.split(".")[-2:]
+        cls = classdict.get(classname)
+        if cls is None or traitname not in cls.class_traits(config=True):
+            continue
+        trait = cls.class_traits(config=True)[traitname]
+        alias_help[alias] = cls.class_get_trait_help(trait, helptext=fhelp).splitlines()
+
+    return alias_help
+
+
+def get_addon_manifest_key():
+    """Fingerprint the installed distributions, without reading their metadata."""
+    stamps = [ADDON_MANIFEST_VERSION, sys.version]
+    cwd = os.getcwd()
+
+    for path in sys.path:
+        # the working directory, e.g. with ``python -m``, changes with every build
+        if path in ("", cwd):
+            continue
+        try:
+            stamps += [[path, os.stat(path).st_mtime_ns]]
+        except OSError:
+            continue
+
+    return hashlib.sha256(codec.dumps(stamps, compact=True).encode("utf-8")).hexdigest()
+
+
+def get_addon_manifest_path():
+    """Get the path to the cached addon manifest of this environment."""
+    cache_home = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    prefix_hash = hashlib.sha256(sys.prefix.encode("utf-8")).hexdigest()[:16]
+    return cache_home / "jupyterlite" / f"addon-manifest-{prefix_hash}.json"
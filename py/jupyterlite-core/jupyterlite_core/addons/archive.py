@@ -6,7 +6,6 @@ import locale
 import os
 import tarfile
 import tempfile
-from hashlib import sha256
 from pathlib import Path
 
 from ..constants import C_LOCALE, MOD_FILE, NPM_SOURCE_DATE_EPOCH
@@ -37,7 +36,7 @@ class ArchiveAddon(BaseAddon):
 
         tarball = self.manager.output_archive
 
-        file_dep = [p for p in output_dir.rglob("*") if not p.is_dir() and p not in [tarball]]
+        file_dep = [p for p in manager.snapshot.files(output_dir) if p != tarball]
 
         yield self.task(
             name=f"archive:{tarball.name}",
@@ -88,9 +87,13 @@ class ArchiveAddon(BaseAddon):
         if tarball.exists():
             tarball.unlink()
 
+        # other tasks of this phase may have changed files
+        snapshot = self.manager.snapshot
+        snapshot.update(root)
+
         # best-effort stable sorting
         with self.setlocale(C_LOCALE):
-            members = sorted(root.rglob("*"), key=lambda p: locale.strxfrm(str(p)))
+            members = sorted(snapshot.files(root), key=lambda p: locale.strxfrm(str(p)))
 
         len_members = str(len(members))
         rjust = len(len_members)
@@ -100,11 +103,10 @@ class ArchiveAddon(BaseAddon):
             with (
                 os.fdopen(os.open(temp_ball, os.O_WRONLY | os.O_CREAT, MOD_FILE), "wb") as tar_gz,
                 gzip.GzipFile(fileobj=tar_gz, mode="wb", mtime=0) as gz,
-                tarfile.open(fileobj=gz, mode="w:") as tar,
+                # store the content of linked files, e.g. with ``--copy-mode symlink``
+                tarfile.open(fileobj=gz, mode="w:", dereference=True) as tar,
             ):
                 for i, path in enumerate(members):
-                    if path.is_dir():
-                        continue
                     if i == 0:
                         self.log.info(f"""[lite] [archive] files: {len_members}""")
                     if not (i % 100):
@@ -120,7 +122,8 @@ class ArchiveAddon(BaseAddon):
                         recursive=False,
                     )
 
-            self.copy_one(temp_ball, tarball)
+            # a link would outlive the temporary folder
+            self.copy_one(temp_ball, tarball, copy_mode="copy")
 
     def log_archive(self, tarball, prefix=""):
         """print some information about an archive"""
@@ -133,7 +136,7 @@ class ArchiveAddon(BaseAddon):
             stat = tarball.stat()
             size = stat.st_size / (1024 * 1024)
             self.log.info(f"{prefix}filename:   {tarball.name}")
-            shasum = sha256(tarball.read_bytes()).hexdigest()
+            shasum = self.manager.hasher.sha256(tarball)
             self.log.info(f"{prefix}size:       {size} Mb")
             # extra details, for the curious
             self.log.debug(f"{prefix}created:  {int(stat.st_mtime)}")
@@ -1,24 +1,23 @@
-import email.utils
-import json
+import filecmp
+import functools
 import os
 import shutil
 import tarfile
-import tempfile
-import time
 import zipfile
 from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 
 from traitlets import Bool, Instance
 from traitlets.config import LoggingConfigurable
 
+from .. import codec
 from ..constants import (
     DISABLED_EXTENSIONS,
     EXTENSION_TAR,
     EXTENSION_ZIP,
     FEDERATED_EXTENSIONS,
-    JSON_FMT,
     JUPYTER_CONFIG_DATA,
     JUPYTERLITE_IPYNB,
     JUPYTERLITE_JSON,
@@ -31,8 +30,13 @@ from ..constants import (
     SOURCEMAPS,
     UTF8,
 )
+from ..links import copy_file
 from ..manager import LiteManager
 from ..optional import has_optional_dependency
+from ..shards import is_in_shard
+from ..store import temp_path_for
+from ..timestamps import clamp_path, unlink_one
+from ..validation import get_validator
 
 
 class BaseAddon(LoggingConfigurable):
@@ -63,23 +67,38 @@ class BaseAddon(LoggingConfigurable):
         task["name"] = task["name"].replace("=", "--")
         return task
 
-    def copy_one(self, src, dest):
-        """copy one Path (a file or folder)"""
+    def copy_one(self, src, dest, copy_mode=None):
+        """copy one Path (a file or folder), maybe as links, with ``copy_mode``
+
+        A ``copy_mode`` other than the manager's may be given, e.g. ``copy`` for a
+        temporary source, which a link would outlive.
+        """
         if self.manager.no_sourcemaps and self.is_ignored_sourcemap(src.name):
             return
 
-        if dest.is_dir():
-            shutil.rmtree(dest)
-        elif dest.exists():
+        if self.manager.sync_mode != "replace" and src.is_dir() and dest.is_dir():
+            self.sync_one(src, dest, copy_mode)
+        else:
+            self.replace_one(src, dest, copy_mode)
+
+        self.manager.snapshot.update(dest)
+        self.maybe_timestamp(dest)
+        # only the parent itself changed, not the rest of its contents
+        self.maybe_timestamp(dest.parent, recursive=False)
+
+    def replace_one(self, src, dest, copy_mode=None):
+        """remove one Path (a file or folder), and copy it again"""
+        if dest.is_symlink() or dest.is_file():
             dest.unlink()
+        elif dest.is_dir():
+            shutil.rmtree(dest)
 
         if not dest.parent.exists():
             self.log.debug(f"creating folder {dest.parent}")
-            dest.parent.mkdir(parents=True)
-
-        self.maybe_timestamp(dest.parent)
+            dest.parent.mkdir(parents=True, exist_ok=True)
 
-        copytree_kwargs = {}
+        copy_function = functools.partial(copy_file, mode=copy_mode or self.manager.copy_mode)
+        copytree_kwargs = dict(copy_function=copy_function)
 
         if self.manager.no_sourcemaps:
             copytree_kwargs["ignore"] = SOURCEMAP_IGNORE_PATTERNS
@@ -87,61 +106,118 @@ class BaseAddon(LoggingConfigurable):
         if src.is_dir():
             shutil.copytree(src, dest, **copytree_kwargs)
         else:
-            shutil.copy2(src, dest)
+            copy_function(src, dest)
 
-        self.maybe_timestamp(dest)
+    def sync_one(self, src, dest, copy_mode=None):
+        """update one folder to match another, only copying new or changed files
+
+        Unchanged files are kept, with their times, so tasks which depend on them stay
+        up-to-date, and files no longer in ``src`` are removed.
+        """
+        copy_function = functools.partial(copy_file, mode=copy_mode or self.manager.copy_mode)
+        ignore = SOURCEMAP_IGNORE_PATTERNS if self.manager.no_sourcemaps else None
+        copied = 0
+
+        for src_root, dirs, files in os.walk(src, followlinks=True):
+            dest_root = dest / Path(src_root).relative_to(src)
+            ignored = ignore(src_root, [*dirs, *files]) if ignore else set()
+            dirs[:] = [d for d in dirs if d not in ignored]
+            kept = [f for f in files if f not in ignored]
+
+            if dest_root.is_symlink() or dest_root.is_file():
+                dest_root.unlink()
+            dest_root.mkdir(parents=True, exist_ok=True)
+
+            with os.scandir(dest_root) as entries:
+                for entry in entries:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if entry.name in (dirs if is_dir else kept):
+                        continue
+                    self.log.debug(f"[lite] [sync] removing {entry.path}")
+                    if is_dir:
+                        shutil.rmtree(entry.path)
+                    else:
+                        os.unlink(entry.path)
+
+            for name in kept:
+                src_file, dest_file = Path(src_root, name), dest_root / name
+                if self.is_synced(src_file, dest_file):
+                    continue
+                if dest_file.exists() or dest_file.is_symlink():
+                    dest_file.unlink()
+                copy_function(src_file, dest_file)
+                copied += 1
+
+        self.log.debug(f"[lite] [sync] copied {copied} changed files to {dest}")
+
+    def is_synced(self, src, dest):
+        """whether a copied file is (probably) the same as its source, with ``sync_mode``"""
+        try:
+            src_stat, dest_stat = src.stat(), dest.stat()
+        except FileNotFoundError:
+            return False
+
+        if src_stat.st_size != dest_stat.st_size:
+            return False
+
+        sde = self.manager.source_date_epoch
+
+        if sde is not None and src_stat.st_mtime_ns > sde * 1_000_000_000:
+            # the copy was clamped to the source date epoch, so its time can't tell
+            return filecmp.cmp(src, dest, shallow=False)
+
+        if dest_stat.st_mtime_ns == src_stat.st_mtime_ns:
+            return True
+
+        return self.manager.sync_mode == "hash" and filecmp.cmp(src, dest, shallow=False)
 
     def fetch_one(self, url, dest):
-        """fetch one file
+        """fetch one file, with the manager's ``downloader``
 
-        TODO: enable other backends, auth, etc.
+        A URL may end with a ``#sha256=<hex digest>`` fragment, which is verified.
         """
-        import urllib.request
+        self.manager.downloader.fetch(url, dest)
+        self.manager.snapshot.update(dest)
 
-        if dest.exists():
-            self.log.info(f"[lite][fetch] already downloaded {dest.name}, skipping...")
-            return
+    def fetch_all(self, urls_dests):
+        """fetch many ``(url, dest)`` pairs concurrently, with the manager's ``downloader``"""
+        urls_dests = [*urls_dests]
+        self.manager.downloader.fetch_all(urls_dests)
+        self.manager.snapshot.update(*[dest for _, dest in urls_dests])
 
-        if not dest.parent.exists():
-            dest.parent.mkdir(parents=True)
-
-        with tempfile.TemporaryDirectory() as td:
-            tdp = Path(td)
-            # set a custom User-Agent to avoid 403 errors with ReadTheDocs
-            req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})  # noqa: S310
-            with urllib.request.urlopen(req) as response:  # noqa: S310
-                tmp_dest = tdp / dest.name
-                with tmp_dest.open("wb") as fd:
-                    shutil.copyfileobj(response, fd)
-                last_modified = response.headers.get("Last-Modified")
-                if last_modified:
-                    epoch_time = time.mktime(email.utils.parsedate(last_modified))
-                    os.utime(tmp_dest, (epoch_time, epoch_time))
-            shutil.copy2(tmp_dest, dest)
-
-    def maybe_timestamp(self, path):
-        if not path.exists() or self.manager.source_date_epoch is None:
-            return
+    def maybe_timestamp(self, path, recursive=True):
+        """clamp the time of a path (and everything in it) at the end of the hook phase
 
-        if path.is_dir():
-            for p in path.rglob("*"):
-                self.timestamp_one(p)
+        All of the paths touched by the tasks of a phase are clamped in one pass, by
+        the manager's ``timestamp`` task, see ``LiteTimestamps``.
+        """
+        if self.manager.source_date_epoch is None:
+            return
 
-        self.timestamp_one(path)
+        self.manager.timestamps.touch(path, recursive=recursive)
 
-    def timestamp_one(self, path):
-        """adjust the timestamp to be --source-date-epoch for files newer than then
+    def timestamp_one(self, path, path_stat=None):
+        """immediately adjust the timestamp to be --source-date-epoch for files newer than then
 
         see https://reproducible-builds.org/specs/source-date-epoch
         """
-        stat = path.stat()
-        sde = self.manager.source_date_epoch
-        if stat.st_mtime > sde:
+        if clamp_path(path, self.manager.source_date_epoch, path_stat):
             cls = self.__class__.__name__
+            sde = self.manager.source_date_epoch
             self.log.debug(f"[lite][base] <{cls}> set time to source_date_epoch {sde} on {path}")
-            os.utime(path, (sde, sde))
-            return
-        return
+
+    def unlink_one(self, path):
+        """replace a (hard or symbolic) link with a copy of its content"""
+        unlink_one(path)
+
+    def write_one(self, path, text):
+        """replace one text file, which may be linked from the ``object_store``"""
+        tmp_path = temp_path_for(path)
+        tmp_path.write_text(text, **UTF8)
+        tmp_path.replace(path)
+        self.manager.snapshot.update(path)
+        # renaming the temporary file changes the time of its folder, too
+        self.maybe_timestamp(path.parent, recursive=False)
 
     def delete_one(self, *src):
         """delete... somethings"""
@@ -151,8 +227,10 @@ class BaseAddon(LoggingConfigurable):
             elif src_dir.exists():
                 src_dir.unlink()
 
+        self.manager.snapshot.update(*src)
+
     def validate_one_json_file(self, validator, path=None, data=None, selector=None):
-        loaded = json.loads(path.read_text(**UTF8)) if path else data
+        loaded = codec.read_json(path) if path else data
 
         if selector:
             for sel in selector:
@@ -172,22 +250,37 @@ class BaseAddon(LoggingConfigurable):
         validator.validate(selected)
 
     def get_validator(self, schema_path, klass=None):
-        if klass is None:
-            if not has_optional_dependency(
-                "jsonschema", "only checking JSON well-formedness: {error}"
-            ):
-                return None
-            from jsonschema import Draft7Validator
+        """get a validator for a schema file, shared by all addons while it is unchanged"""
+        return get_validator(schema_path, klass)
 
-            klass = Draft7Validator
+    def validate_all_json(self, items):
+        """validate many ``(validator, path, data, selector)`` in a pool of threads
 
-        schema = json.loads(schema_path.read_text(**UTF8))
-        return klass(schema, format_checker=klass.FORMAT_CHECKER)
+        Every item is validated, and all of the errors logged, before the first is raised.
+        """
+        items = [*items]
+        errors = []
+
+        with ThreadPoolExecutor(max(1, min(len(items), os.cpu_count() or 1))) as pool:
+            futures = [pool.submit(self.validate_one_json_file, *item) for item in items]
+
+        for item, future in zip(items, futures, strict=True):
+            error = future.exception()
+            if error is not None:
+                self.log.error(f"[lite] [validate] {item[1] or item[2]}: {error}")
+                errors += [error]
 
-    def merge_one_jupyterlite(self, out_path, in_paths):  # noqa: C901, PLR0912
+        if errors:
+            raise errors[0]
+
+    def merge_one_jupyterlite(self, out_path, in_paths):
         """write the ``out_path`` with the merge content of ``in_paths``, where
         all are valid ``jupyter-lite.*`` files.
         """
+        with self.manager.config_lock:
+            self._merge_one_jupyterlite(out_path, in_paths)
+
+    def _merge_one_jupyterlite(self, out_path, in_paths):  # noqa: C901, PLR0912
         self.log.debug(f"[lite][config][merge] {out_path}")
         config = None
 
@@ -195,7 +288,7 @@ class BaseAddon(LoggingConfigurable):
             self.log.debug(f"[lite][config][merge] . {in_path}")
             in_config = None
             try:
-                in_config = json.loads(in_path.read_text(**UTF8))
+                in_config = codec.read_json(in_path)
                 if out_path.name == JUPYTERLITE_IPYNB:
                     in_config = in_config["metadata"].get(JUPYTERLITE_METADATA)
             except:  # noqa: E722, S110
@@ -228,13 +321,13 @@ class BaseAddon(LoggingConfigurable):
                         doc_path = in_path
                         break
 
-            doc = json.loads(doc_path.read_text(**UTF8))
+            doc = codec.read_json(doc_path)
 
             doc["metadata"][JUPYTERLITE_METADATA] = config
 
-            out_path.write_text(json.dumps(doc, **JSON_FMT), **UTF8)
+            self.write_one(out_path, codec.dumps(doc))
         else:
-            out_path.write_text(json.dumps(config, **JSON_FMT), **UTF8)
+            self.write_one(out_path, codec.dumps(config))
 
         print("MERGED", out_path, "from", in_paths)
 
@@ -288,6 +381,10 @@ class BaseAddon(LoggingConfigurable):
     def is_sys_prefix_ignored(self):
         return self.ignore_sys_prefix
 
+    def is_in_shard(self, key):
+        """whether a file or extension should be built by this shard, with --shard-count"""
+        return is_in_shard(key, self.manager.shard_index, self.manager.shard_count)
+
     @property
     def should_use_libarchive_c(self):
         """should libarchive-c be used (if available)?"""
@@ -299,6 +396,13 @@ class BaseAddon(LoggingConfigurable):
             "install libarchive-c for better performance when working with archives: {error}",
         )
 
+    def unpack_one(self, archive: Path, dest: Path):
+        """extract the contents of an archive to a path, via the ``object_store``."""
+        store = self.manager.object_store
+        digest = self.manager.hasher.sha256(archive)
+        store.materialize_tree(store.unpack(archive, self.extract_one, digest), dest)
+        self.manager.snapshot.update(dest)
+
     def extract_one(self, archive: Path, dest: Path):
         """extract the contents of an archive to a path."""
         if dest.exists():
@@ -344,12 +448,9 @@ class BaseAddon(LoggingConfigurable):
         tar.extractall(path, members, numeric_owner=numeric_owner)  # noqa: S202
 
     def hash_all(self, hashfile: Path, root: Path, paths: list[Path]):
-        from hashlib import sha256
-
-        lines = [
-            "  ".join([sha256(p.read_bytes()).hexdigest(), p.relative_to(root).as_posix()])
-            for p in sorted(paths)
-        ]
+        """write a ``sha256sum``-compatible file, with the manager's ``hasher``"""
+        digests = self.manager.hasher.sha256_all(sorted(paths))
+        lines = [f"{digest}  {p.relative_to(root).as_posix()}" for p, digest in digests.items()]
         hashfile.write_text("\n".join(lines))
 
     def get_lite_config_paths(self) -> Generator[Path, None, None]:
@@ -380,7 +481,7 @@ class BaseAddon(LoggingConfigurable):
         if not config_path.exists():
             return {}
 
-        config = json.loads(config_path.read_text(**UTF8))
+        config = codec.read_json(config_path)
 
         # if a notebook, look in the top-level metadata (which must exist)
         if config_path.name == JUPYTERLITE_IPYNB:
@@ -392,14 +493,15 @@ class BaseAddon(LoggingConfigurable):
         self, config_path: Path, plugin_id: str, settings: dict[str, Any]
     ) -> None:
         """Overwrite the plugin settings for a single plugin in a config path."""
-        whole_file = config = json.loads(config_path.read_text(**UTF8))
-        if config_path.name == JUPYTERLITE_IPYNB:
-            config = whole_file["metadata"][JUPYTERLITE_METADATA]
+        with self.manager.config_lock:
+            whole_file = config = codec.read_json(config_path)
+            if config_path.name == JUPYTERLITE_IPYNB:
+                config = whole_file["metadata"][JUPYTERLITE_METADATA]
 
-        config.setdefault(JUPYTER_CONFIG_DATA, {}).setdefault(LITE_PLUGIN_SETTINGS, {}).update(
-            {plugin_id: settings}
-        )
+            config.setdefault(JUPYTER_CONFIG_DATA, {}).setdefault(LITE_PLUGIN_SETTINGS, {}).update(
+                {plugin_id: settings}
+            )
 
-        config_path.write_text(json.dumps(whole_file, **JSON_FMT), **UTF8)
+            self.write_one(config_path, codec.dumps(whole_file))
         self.log.debug("%s wrote settings in %s: %s", plugin_id, config_path, settings)
         self.maybe_timestamp(config_path)
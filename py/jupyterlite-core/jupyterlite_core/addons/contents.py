@@ -1,21 +1,20 @@
 """a JupyterLite addon for Jupyter Server-compatible contents"""
 
-import datetime
-import json
+import functools
 import pprint
-import re
-from pathlib import Path
+import stat
+
+import doit
+from traitlets import Instance, default
 
 from ..constants import (
     ALL_JSON,
     API_CONTENTS,
     CONTENTS_ALL_JSON_FILE,
-    JSON_FMT,
     JUPYTER_CONFIG_DATA,
     JUPYTERLITE_JSON,
-    UTF8,
 )
-from ..optional import has_optional_dependency
+from ..indexer import LiteContentsIndexer
 from .base import BaseAddon
 
 
@@ -24,28 +23,34 @@ class ContentsAddon(BaseAddon):
 
     __all__ = ["build", "post_build", "check", "status"]
 
+    indexer = Instance(LiteContentsIndexer, help="writes the Contents API responses")
+
+    @default("indexer")
+    def _default_indexer(self):
+        return LiteContentsIndexer(parent=self)
+
     def status(self, manager):
         """yield some status information about the state of contents"""
+        files = manager.contents_scanner.files()
         yield self.task(
             name="contents",
             actions=[
                 lambda: self.log.debug(
                     "[lite] [contents] All Contents %s",
-                    pprint.pformat([str(p[0]) for p in self.file_src_dest]),
+                    pprint.pformat([str(src) for src, rel in files]),
                 ),
-                lambda: print(f"""    contents: {len(list(self.file_src_dest))} files"""),
+                lambda: print(f"""    contents: {len(files)} files"""),
             ],
         )
 
     def build(self, manager):
         """perform the main user build of pre-populating ``/files/``"""
-        contents = sorted(self.file_src_dest)
         output_files_dir = self.output_files_dir
-        all_dest_files = []
 
-        for src_file, dest_file in contents:
-            all_dest_files += [dest_file]
-            rel = dest_file.relative_to(output_files_dir)
+        for src_file, rel in self.manager.contents_scanner.files():
+            if not self.is_in_shard(rel):
+                continue
+            dest_file = output_files_dir / rel
             yield self.task(
                 name=f"copy:{rel}",
                 doc=f"copy {src_file} to {rel}",
@@ -56,52 +61,71 @@ class ContentsAddon(BaseAddon):
                 ],
             )
 
-        if manager.source_date_epoch is not None:
-            yield self.task(
-                name="timestamp",
-                file_dep=all_dest_files,
-                actions=[
-                    (self.maybe_timestamp, [self.output_files_dir]),
-                ],
-            )
-
     def post_build(self, manager):
         """create a Contents API index for each subdirectory in ``/files/``"""
         if not self.output_files_dir.exists():
             return
 
-        output_file_dirs = [d for d in self.output_files_dir.rglob("*") if d.is_dir()] + [
-            self.output_files_dir
-        ]
+        snapshot = manager.snapshot
+        indexer = self.indexer
         root_all_json = self.api_dir / ALL_JSON
+        sde = manager.source_date_epoch
+        # folders which are hidden, or in a hidden folder, fail the task of their parent
+        unindexed = set()
+
+        for output_file_dir in [self.output_files_dir, *snapshot.folders(self.output_files_dir)]:
+            folder_stat = snapshot.stat(output_file_dir)
+            if output_file_dir != self.output_files_dir and (
+                output_file_dir.parent in unindexed
+                or indexer.is_hidden(output_file_dir, folder_stat)
+            ):
+                unindexed.add(output_file_dir)
+                continue
 
-        for output_file_dir in output_file_dirs:
             stem = output_file_dir.relative_to(self.output_files_dir)
             api_path = self.api_dir / stem / ALL_JSON
+            # a listing only changes with the folder, or the things directly in it
+            children = snapshot.children(output_file_dir)
+            digest = indexer.digest(folder_stat, children, sde)
+            # ... but ``watch`` only finds the tasks of changed files by their ``file_dep``
+            file_dep = [
+                output_file_dir / name
+                for name, child_stat in sorted(children.items())
+                if not stat.S_ISDIR(child_stat.st_mode)
+            ]
+            # the digest can't see sources which are not copied yet, but the planner can
+            meta = dict(listing=output_file_dir)
+            # without a SOURCE_DATE_EPOCH, listings include the (unpredictable) file times
+            if sde is not None:
+                meta.update(
+                    build_cache=dict(
+                        key=dict(source_date_epoch=sde, listing=digest),
+                        # a large listing may also be written as pages
+                        outputs=functools.partial(indexer.outputs, api_path),
+                    )
+                )
 
             yield self.task(
                 name=f"contents:{stem}",
                 doc=f"create a Jupyter Contents API response for {stem}",
-                actions=[
-                    (self.one_contents_path, [output_file_dir, api_path]),
-                    (self.maybe_timestamp, [api_path]),
-                ],
-                file_dep=[p for p in output_file_dir.rglob("*") if not p.is_dir()],
+                actions=[(self.one_contents_path, [output_file_dir, api_path])],
+                file_dep=file_dep,
                 targets=[api_path],
+                uptodate=[doit.tools.config_changed(digest)],
+                meta=meta,
             )
 
         # Update jupyter-lite.json with the contents all.json filename
-        jupyterlite_json = self.manager.output_dir / JUPYTERLITE_JSON
-        yield self.task(
-            name="patch:contentsAllJsonFile",
-            doc="update jupyter-lite.json with contentsAllJsonFile",
-            file_dep=[root_all_json, jupyterlite_json],
-            actions=[(self.patch_contents_config, [jupyterlite_json])],
+        manager.patch_config(
+            manager.output_dir / JUPYTERLITE_JSON,
+            "contents:contentsAllJsonFile",
+            self.patch_contents_config,
+            file_dep=[root_all_json],
         )
 
     def check(self, manager):
         """verify that all Contents API is valid (sorta)"""
-        for all_json in self.api_dir.rglob(ALL_JSON):
+        for all_json in manager.snapshot.files(self.api_dir, ALL_JSON):
             stem = all_json.relative_to(self.api_dir)
             yield self.task(
                 name=f"validate:{stem}",
@@ -122,171 +146,48 @@ class ContentsAddon(BaseAddon):
     def file_src_dest(self):
         """the pairs of contents that will be copied
 
-        these are processed in `reverse` order, such that only the last path
-        wins
+        where a path is found in more than one of the ``contents``, only the last wins
         """
-        yielded_dests = []
-        for mgr_file in reversed(self.manager.contents):
-            path = Path(mgr_file)
-            for from_path in self.maybe_add_one_path(path):
-                stem = from_path.relative_to(path) if path.is_dir() else path.name
-                to_path = self.output_files_dir / stem
-                resolved = str(to_path.resolve())
-                if resolved in yielded_dests:  # pragma: no cover
-                    self.log.debug("Already populated %s", resolved)
-                    continue
-                yielded_dests += [resolved]
-                yield from_path, to_path
-
-    def maybe_add_one_path(self, path, root=None):
-        """add a file or folder's contents (if not ignored)"""
-
-        if root is not None:
-            rel_posix_path = f"/{path.relative_to(root).as_posix()}"
-
-            for ignore in [
-                *self.manager.ignore_contents,
-                *self.manager.extra_ignore_contents,
-            ]:
-                if re.findall(ignore, rel_posix_path):
-                    return
-
-        if path.is_dir():
-            for child in path.glob("*"):
-                yield from self.maybe_add_one_path(child, root or path)
-        else:
-            yield path.resolve()
+        output_files_dir = self.output_files_dir
+        return [(src, output_files_dir / rel) for src, rel in self.manager.contents_scanner.files()]
 
     def one_contents_path(self, output_file_dir, api_path):
-        """A lazy reuse of a ``jupyter_server`` Contents API generator
-
-        .. todo::
-
-            Ideally we'd have a fallback, schema-verified generator, which we could
-            later port to e.g. JS
-        """
-        has_jupyter_server = has_optional_dependency(
-            "jupyter_server",
-            "[lite] [contents] install `jupyter_server` to index contents: {error}",
+        """write the Contents API response of one folder in ``/files/``"""
+        rel = output_file_dir.relative_to(self.output_files_dir).as_posix()
+        rel = "" if rel == "." else rel
+        _subfolders, hidden = self.indexer.write_listing(
+            output_file_dir, rel, api_path, self.manager.source_date_epoch
         )
-        if self.manager.contents and not has_jupyter_server:
-            raise RuntimeError(
-                """jupyter-server is not installed. You cannot add custom content to jupyterlite.
-                Please install jupyter-server and try again.
-                """
-            )
-        elif not has_jupyter_server:
-            return
-
-        if not self.output_files_dir.exists():
-            return
-
-        self.maybe_timestamp(self.output_files_dir)
-
-        from jupyter_server.services.contents.filemanager import FileContentsManager
-
-        fm = FileContentsManager(root_dir=str(self.output_files_dir), parent=self)
-
-        listing_path = str(output_file_dir.relative_to(self.output_files_dir))
-        # normalize the root folder to avoid adding a `./` prefix to the
-        # path field in the generated listing
-        if listing_path == ".":
-            listing_path = ""
-
-        try:
-            listing = fm.get(listing_path)
-        except Exception as error:
-            print(
-                f"""Couldn't fetch {listing_path} as Jupyter contents.  {error}
-                If this folder, or one of its parents, starts with a `.`, you can
-                enable indexing hidden files with a `jupyter_lite_config.json` such as:
-
-                    "ContentsManager": {{
-                        "allow_hidden": true
-                    }}
-
-                Alternately, to skip it:
+        self.maybe_timestamp(api_path.parent, recursive=False)
+        for path in self.indexer.outputs(api_path):
+            self.maybe_timestamp(path)
+        return self.report_hidden(hidden)
+
+    def report_hidden(self, hidden):
+        """explain how to index (or skip) any hidden folders, failing the task"""
+        if not hidden:
+            return None
 
-                    "LiteBuildConfig": {{
-                        "extra_ignore_contents": [
-                            "/\\.<the offendings path name>"
-                        ]
-                    }}
-                """
-            )
-            return False
+        print(
+            f"""Couldn't index {", ".join(hidden)} as Jupyter contents.
+            If these folders, or one of their parents, start with a `.`, you can
+            enable indexing hidden files with a `jupyter_lite_config.json` such as:
 
-        if self.manager.source_date_epoch is not None:
-            listing = self.patch_listing_timestamps(listing)
+                "ContentsManager": {{
+                    "allow_hidden": true
+                }}
 
-        api_path.parent.mkdir(parents=True, exist_ok=True)
+            Alternately, to skip them:
 
-        api_path.write_text(
-            json.dumps(listing, **JSON_FMT, cls=DateTimeEncoder),
-            **UTF8,
+                "LiteBuildConfig": {{
+                    "extra_ignore_contents": [
+                        "/\\.<the offendings path name>"
+                    ]
+                }}
+            """
         )
+        return False
 
-        self.maybe_timestamp(api_path.parent)
-
-    def patch_contents_config(self, jupyterlite_json):
+    def patch_contents_config(self, config):
         """Update jupyter-lite.json with the contents all.json filename."""
-        try:
-            config = json.loads(jupyterlite_json.read_text(**UTF8))
-        except (FileNotFoundError, json.JSONDecodeError):
-            config = {JUPYTER_CONFIG_DATA: {}}
-
-        if JUPYTER_CONFIG_DATA not in config:
-            config[JUPYTER_CONFIG_DATA] = {}
-
-        # Set the filename for contents all.json
-        config[JUPYTER_CONFIG_DATA][CONTENTS_ALL_JSON_FILE] = ALL_JSON
-
-        jupyterlite_json.write_text(json.dumps(config, **JSON_FMT), **UTF8)
-        self.maybe_timestamp(jupyterlite_json)
-        self.log.debug(
-            f"[lite] [contents] Updated {jupyterlite_json} with {CONTENTS_ALL_JSON_FILE}"
-        )
-
-    def patch_listing_timestamps(self, listing, sde=None):
-        """clamp a contents listing's times to ``SOURCE_DATE_EPOCH``
-
-        .. todo::
-
-            pre-validated this structure with the ``jupyter_server`` API spec
-        """
-        sde = datetime.datetime.fromtimestamp(
-            self.manager.source_date_epoch, tz=datetime.timezone.utc
-        )
-
-        if isinstance(listing, dict):
-            for field in ["created", "last_modified"]:
-                if field not in listing:  # pragma: no cover
-                    continue
-                value = listing[field]
-                if isoformat(value) > isoformat(sde):
-                    self.log.info(f"""[lite][contents][patch] {field} on {listing["name"]}""")
-                    listing[field] = sde
-            if listing["type"] == "directory":
-                for child in listing.get("content") or []:
-                    self.patch_listing_timestamps(child, sde)
-
-        else:  # pragma: no cover
-            self.log.error(f"[lite][contents] Don't know how to patch {listing}")
-            return None
-
-        return listing
-
-
-class DateTimeEncoder(json.JSONEncoder):
-    """A custom date-aware JSON encoder"""
-
-    def default(self, o):
-        if isinstance(o, datetime.datetime):
-            return isoformat(o)
-
-        return json.JSONEncoder.default(self, o)
-
-
-def isoformat(dt):
-    """a small helper to user ``Z`` for UTC ISO strings"""
-    return dt.isoformat().replace("+00:00", "Z")
+        config.setdefault(JUPYTER_CONFIG_DATA, {})[CONTENTS_ALL_JSON_FILE] = ALL_JSON
@@ -1,25 +1,30 @@
 """a JupyterLite addon for supporting federated_extensions"""
 
-import json
 import re
+import shutil
 import sys
+import tarfile
 import urllib.parse
+import zipfile
 from pathlib import Path
 
 from traitlets import List, Unicode
 
+from .. import codec
 from ..constants import (
     ALL_FEDERATED_JSON,
     FEDERATED_EXTENSIONS,
-    JSON_FMT,
     JUPYTER_CONFIG_DATA,
     JUPYTERLITE_JSON,
     LAB_EXTENSIONS,
+    MOD_FILE,
     PACKAGE_JSON,
     SHA256SUMS,
     SHARE_LABEXTENSIONS,
     UTF8,
 )
+from ..download import split_sha256
+from ..optional import has_optional_dependency
 from .base import BaseAddon
 
 
@@ -42,13 +47,13 @@ class FederatedExtensionAddon(BaseAddon):
                 *root.glob(f"*/{PACKAGE_JSON}"),
                 *root.glob(f"@*/*/{PACKAGE_JSON}"),
             ]
-            if self.is_prebuilt(json.loads(p.read_text(**UTF8)))
+            if self.is_prebuilt(codec.read_json(p))
         ]
 
     @property
     def ext_cache(self):
         """where extensions will go in the cache"""
-        return self.manager.cache_dir / "federated_extensions"
+        return self.manager.shard_cache_dir / "federated_extensions"
 
     @property
     def archive_cache(self):
@@ -61,9 +66,19 @@ class FederatedExtensionAddon(BaseAddon):
         return self.manager.output_dir / LAB_EXTENSIONS
 
     def post_init(self, manager):
-        """handle downloading of federated extensions"""
+        """handle downloading of federated extensions, concurrently"""
+        urls_dests = []
+
         for path_or_url in manager.federated_extensions:
-            yield from self.resolve_one_extension(path_or_url, init=True)
+            urls_dests += self.resolve_one_extension(path_or_url, init=True)
+
+        if urls_dests:
+            yield self.task(
+                name="fetch",
+                doc=f"fetch {len(urls_dests)} remote federated extensions",
+                actions=[(self.fetch_all, [urls_dests])],
+                targets=[dest for _, dest in urls_dests],
+            )
 
     def pre_build(self, manager):
         """yield a doit task to copy each federated extension into the output_dir"""
@@ -92,7 +107,11 @@ class FederatedExtensionAddon(BaseAddon):
     def copy_one_extension(self, pkg_json):
         """yield a task to copy one unpacked on-disk extension from anywhere into the output dir"""
         pkg_path = pkg_json.parent
-        stem = json.loads(pkg_json.read_text(**UTF8))["name"]
+        stem = codec.read_json(pkg_json)["name"]
+
+        if not self.is_in_shard(stem):
+            return
+
         dest = self.output_extensions / stem
         file_dep = [
             p for p in pkg_path.rglob("*") if not (p.is_dir() or self.is_ignored_sourcemap(p.name))
@@ -108,18 +127,18 @@ class FederatedExtensionAddon(BaseAddon):
 
     def resolve_one_extension(self, path_or_url, init):
         """yield tasks try to resolve one URL or local folder/archive
-        as a (set of) federated_extension(s)"""
+        as a (set of) federated_extension(s)
+
+        While initializing, yield the ``(url, dest)`` of a URL which should be fetched.
+        """
         if re.findall(r"^https?://", path_or_url):
             url = urllib.parse.urlparse(path_or_url)
             name = url.path.split("/")[-1]
             dest = self.ext_cache / name
             if init:
-                if not dest.exists():
-                    yield self.task(
-                        name=f"fetch:{name}",
-                        actions=[(self.fetch_one, [path_or_url, dest])],
-                        targets=[dest],
-                    )
+                downloader = self.manager.downloader
+                if not dest.exists() or downloader.revalidate or split_sha256(path_or_url)[1]:
+                    yield path_or_url, dest
                 return
             # if not initializing, assume path is now local
             path_or_url = dest.resolve()
@@ -162,7 +181,7 @@ class FederatedExtensionAddon(BaseAddon):
             name=f"extract:{archive.name}",
             actions=[
                 (self.delete_one, [hashfile]),
-                (self.extract_one, [archive, unarchived]),
+                (self.unpack_one, [archive, unarchived]),
                 lambda: self.hash_all(
                     hashfile,
                     unarchived,
@@ -170,6 +189,8 @@ class FederatedExtensionAddon(BaseAddon):
                 ),
             ],
             file_dep=[archive],
+            targets=[hashfile],
+            meta=dict(build_cache=dict(outputs=[hashfile, unarchived])),
         )
 
         yield dict(
@@ -187,9 +208,9 @@ class FederatedExtensionAddon(BaseAddon):
 
     def copy_one_federated_extension(self, pkg_json):
         """actually copy one labextension from an extracted archive"""
-        pkg_data = json.loads(pkg_json.read_text(**UTF8))
+        pkg_data = codec.read_json(pkg_json)
 
-        if self.is_prebuilt(pkg_data):
+        if self.is_prebuilt(pkg_data) and self.is_in_shard(pkg_data["name"]):
             pkg_name = pkg_data["name"]
             output_pkg = self.output_extensions / pkg_name
             self.copy_one(pkg_json.parent, output_pkg)
@@ -200,12 +221,18 @@ class FederatedExtensionAddon(BaseAddon):
 
     def copy_conda2_extensions(self, conda_pkg):
         """copy the labextensions from a local, nested ``.conda`` package"""
-        if self.manager.no_libarchive:
+        if self.zstd_reader is not None:
+            yield from self.stream_conda2_extensions(conda_pkg)
+            return
+
+        if not self.should_use_libarchive_c:
             raise RuntimeError(
                 "`.conda` packages are not supported by python's stdlib. Please:\n\n"
                 "\tconda install python-libarchive-c\n\nor:\n\n"
-                "\tpip install libarchive-c"
+                "\tpip install libarchive-c\n\nor:\n\n"
+                "\tpip install zstandard"
             )
+
         unarchived = self.archive_cache / conda_pkg.name
         inner_archive = unarchived / f"pkg-{conda_pkg.stem}.tar.zst"
         inner_unarchived = self.archive_cache / inner_archive.name
@@ -214,17 +241,18 @@ class FederatedExtensionAddon(BaseAddon):
         yield dict(
             name=f"extract:{conda_pkg.name}",
             actions=[
-                (self.extract_one, [conda_pkg, unarchived]),
+                (self.unpack_one, [conda_pkg, unarchived]),
             ],
             file_dep=[conda_pkg],
             targets=[inner_archive],
+            meta=dict(build_cache=dict(outputs=[unarchived])),
         )
 
         yield dict(
             name=f"extract:{inner_archive.name}",
             actions=[
                 (self.delete_one, [hashfile]),
-                (self.extract_one, [inner_archive, inner_unarchived]),
+                (self.unpack_one, [inner_archive, inner_unarchived]),
                 lambda: self.hash_all(
                     hashfile,
                     inner_unarchived,
@@ -232,6 +260,8 @@ class FederatedExtensionAddon(BaseAddon):
                 ),
             ],
             file_dep=[inner_archive],
+            targets=[hashfile],
+            meta=dict(build_cache=dict(outputs=[hashfile, inner_unarchived])),
         )
 
         yield dict(
@@ -240,6 +270,85 @@ class FederatedExtensionAddon(BaseAddon):
             actions=[(self.copy_all_federated_extensions, [inner_unarchived])],
         )
 
+    def stream_conda2_extensions(self, conda_pkg):
+        """yield tasks to stream only the labextensions out of a local ``.conda`` package
+
+        The files are kept in the ``object_store``, keyed by the SHA-256 of the package,
+        as published by its channel.
+        """
+        unarchived = self.archive_cache / conda_pkg.name
+        hashfile = self.archive_cache / f"{conda_pkg.name}.{SHA256SUMS}"
+
+        yield dict(
+            name=f"extract:{conda_pkg.name}",
+            actions=[
+                (self.delete_one, [hashfile]),
+                (self.unpack_conda2_extensions, [conda_pkg, unarchived, hashfile]),
+            ],
+            file_dep=[conda_pkg],
+            targets=[hashfile],
+            meta=dict(build_cache=dict(outputs=[hashfile, unarchived])),
+        )
+
+        yield dict(
+            name=f"copy:{conda_pkg.name}",
+            file_dep=[hashfile],
+            actions=[(self.copy_all_federated_extensions, [unarchived])],
+        )
+
+    def unpack_conda2_extensions(self, conda_pkg, unarchived, hashfile):
+        """materialize the labextensions of a ``.conda``, and record its SHA-256"""
+        store = self.manager.object_store
+        digest = self.manager.hasher.sha256(conda_pkg)
+        tree = store.unpack(conda_pkg, self.extract_conda2_extensions, archive_digest=digest)
+        store.materialize_tree(tree, unarchived)
+        self.manager.snapshot.update(unarchived)
+        hashfile.write_text(f"{digest}  {conda_pkg.name}", **UTF8)
+
+    def extract_conda2_extensions(self, conda_pkg, dest):
+        """stream the inner ``pkg-*.tar.zst`` of a ``.conda``, writing only labextensions"""
+        prefix = f"{SHARE_LABEXTENSIONS}/"
+        dest.mkdir(parents=True)
+
+        with zipfile.ZipFile(conda_pkg) as zf:
+            inner = [n for n in zf.namelist() if n.startswith("pkg-") and n.endswith(".tar.zst")]
+            if not inner:
+                raise ValueError(f"[lite][federated_extensions] no pkg-*.tar.zst in {conda_pkg}")
+
+            with (
+                zf.open(inner[0]) as raw,
+                self.zstd_reader(raw) as stream,
+                tarfile.open(fileobj=stream, mode="r|") as tf,
+            ):
+                for member in tf:
+                    if not (member.isfile() and member.name.startswith(prefix)):
+                        continue
+
+                    member_dest = dest / member.name
+                    if not self.is_within_directory(dest, member_dest):
+                        raise ValueError(f"Attempted Path Traversal in {conda_pkg}")
+
+                    member_dest.parent.mkdir(parents=True, exist_ok=True)
+                    with tf.extractfile(member) as src, member_dest.open("wb") as fd:
+                        shutil.copyfileobj(src, fd)
+                    member_dest.chmod(MOD_FILE)
+
+    @property
+    def zstd_reader(self):
+        """a function to open a decompressing stream of a ``.tar.zst``, if available"""
+        if has_optional_dependency("compression.zstd"):
+            from compression import zstd
+
+            return zstd.open
+
+        # only suggested when ``libarchive`` is not available, either
+        if has_optional_dependency("zstandard"):
+            import zstandard
+
+            return zstandard.ZstdDecompressor().stream_reader
+
+        return None
+
     def post_build(self, manager):
         """update the root jupyter-lite.json, and copy each output theme to each app
 
@@ -253,11 +362,11 @@ class FederatedExtensionAddon(BaseAddon):
         lab_extensions_root = manager.output_dir / LAB_EXTENSIONS
         lab_extensions = self.env_extensions(lab_extensions_root)
 
-        yield self.task(
-            name="patch",
-            doc=f"ensure {JUPYTERLITE_JSON} includes the federated_extensions",
-            file_dep=[*lab_extensions, jupyterlite_json],
-            actions=[(self.patch_jupyterlite_json, [jupyterlite_json])],
+        manager.patch_config(
+            jupyterlite_json,
+            "federated_extensions:federated_extensions",
+            self.patch_jupyterlite_json,
+            file_dep=lab_extensions,
         )
 
         stems = [p.parent.relative_to(lab_extensions_root) for p in lab_extensions]
@@ -306,12 +415,12 @@ class FederatedExtensionAddon(BaseAddon):
         all_federated_settings = [
             setting for p in lab_extensions for setting in self.get_federated_settings(p.parent)
         ]
-        all_federated_json.write_text(json.dumps(all_federated_settings), **UTF8)
+        codec.write_json(all_federated_json, all_federated_settings, compact=True)
 
     def get_federated_settings(self, extension):
         """get the settings for a federated extension"""
         pkg_json = extension / PACKAGE_JSON
-        pkg_data = json.loads(pkg_json.read_text(**UTF8))
+        pkg_data = codec.read_json(pkg_json)
         settings_dir = extension / "schemas"
         if not settings_dir.is_dir():
             # bail if there is no settings for that extension
@@ -323,7 +432,7 @@ class FederatedExtensionAddon(BaseAddon):
         all_settings = []
         for setting_file in setting_files:
             plugin_id = f"{pkg_name}:{setting_file.stem}"
-            schema = json.loads(setting_file.read_text(**UTF8))
+            schema = codec.read_json(setting_file)
             setting = {
                 "id": plugin_id,
                 "raw": "{}",
@@ -335,7 +444,7 @@ class FederatedExtensionAddon(BaseAddon):
 
         return all_settings
 
-    def patch_jupyterlite_json(self, jupyterlite_json):
+    def patch_jupyterlite_json(self, config):
         """add the federated_extensions to jupyter-lite.json
 
         .. todo::
@@ -343,20 +452,15 @@ class FederatedExtensionAddon(BaseAddon):
             it _really_ doesn't like duplicate ids, probably need to catch it
             earlier... not possible with "pure" schema (but perhaps SHACL?)
         """
-        config = json.loads(jupyterlite_json.read_text(**UTF8))
-
-        extensions = config[JUPYTER_CONFIG_DATA].get(FEDERATED_EXTENSIONS, [])
+        config_data = config.setdefault(JUPYTER_CONFIG_DATA, {})
+        extensions = config_data.setdefault(FEDERATED_EXTENSIONS, [])
         lab_extensions_root = self.manager.output_dir / LAB_EXTENSIONS
 
         for pkg_json in self.env_extensions(lab_extensions_root):
-            pkg_data = json.loads(pkg_json.read_text(**UTF8))
+            pkg_data = codec.read_json(pkg_json)
             extension_data = {
                 **pkg_data["jupyterlab"]["_build"],
             }
             extensions += [dict(name=pkg_data["name"], **extension_data)]
 
-        self.dedupe_federated_extensions(config[JUPYTER_CONFIG_DATA])
-
-        jupyterlite_json.write_text(json.dumps(config, **JSON_FMT), **UTF8)
-
-        self.maybe_timestamp(jupyterlite_json)
+        self.dedupe_federated_extensions(config_data)
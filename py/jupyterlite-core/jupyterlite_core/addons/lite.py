@@ -2,12 +2,17 @@
 
 import re
 
+import doit
+
+from .. import codec
 from ..constants import (
     JUPYTERLITE_IPYNB,
     JUPYTERLITE_JSON,
     JUPYTERLITE_METADATA,
     JUPYTERLITE_SCHEMA,
+    SHARD_MANIFEST,
 )
+from ..shards import shard_manifest
 from .base import BaseAddon
 
 
@@ -55,6 +60,25 @@ class LiteAddon(BaseAddon):
                 ],
             )
 
+        if manager.shard_count > 1:
+            yield from self.shard_manifest(manager)
+
+    def shard_manifest(self, manager):
+        """describe this shard of a build, for `jupyter lite merge`"""
+        manifest = manager.output_dir / SHARD_MANIFEST
+        data = shard_manifest(manager.shard_index, manager.shard_count, manager.source_date_epoch)
+
+        yield self.task(
+            name=SHARD_MANIFEST,
+            doc=f"describe shard {manager.shard_index} of {manager.shard_count}",
+            uptodate=[doit.tools.config_changed(data)],
+            targets=[manifest],
+            actions=[
+                (self.write_one, [manifest, codec.dumps(data)]),
+                (self.maybe_timestamp, [manifest]),
+            ],
+        )
+
     def check(self, manager):
         """apply schema validation to all `jupyter-lite.json` in the `output_dir`"""
         schema = manager.output_dir / JUPYTERLITE_SCHEMA
@@ -66,8 +90,8 @@ class LiteAddon(BaseAddon):
         file_dep += [schema]
 
         for lite_file in [
-            *manager.output_dir.rglob(JUPYTERLITE_JSON),
-            *manager.output_dir.rglob(JUPYTERLITE_IPYNB),
+            *manager.snapshot.files(manager.output_dir, JUPYTERLITE_JSON),
+            *manager.snapshot.files(manager.output_dir, JUPYTERLITE_IPYNB),
         ]:
             stem = lite_file.relative_to(manager.output_dir)
             selector = (
@@ -89,8 +113,8 @@ class LiteAddon(BaseAddon):
         """all the source `jupyter-lite.*` files, excluding ignored directories"""
         lite_dir = self.manager.lite_dir
         all_lite_files = [
-            *lite_dir.rglob(JUPYTERLITE_JSON),
-            *lite_dir.rglob(JUPYTERLITE_IPYNB),
+            *self.manager.snapshot.files(lite_dir, JUPYTERLITE_JSON),
+            *self.manager.snapshot.files(lite_dir, JUPYTERLITE_IPYNB),
         ]
         return [p for p in all_lite_files if not self._is_ignored_lite_config(p)]
 
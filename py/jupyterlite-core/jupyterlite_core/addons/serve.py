@@ -1,12 +1,12 @@
 """a JupyterLite addon for serving"""
 
-import json
 import os
 
 import doit
 from traitlets import Bool, default
 
-from ..constants import JUPYTER_CONFIG_DATA, JUPYTERLITE_JSON, SETTINGS_FILE_TYPES, UTF8
+from .. import codec
+from ..constants import JUPYTER_CONFIG_DATA, JUPYTERLITE_JSON, SETTINGS_FILE_TYPES
 from ..optional import has_optional_dependency
 from .base import BaseAddon
 
@@ -62,7 +62,7 @@ class ServeAddon(BaseAddon):
         import mimetypes
 
         jupyterlite_json = self.manager.output_dir / JUPYTERLITE_JSON
-        config = json.loads(jupyterlite_json.read_text(**UTF8))
+        config = codec.read_json(jupyterlite_json)
         file_types = config[JUPYTER_CONFIG_DATA].get(SETTINGS_FILE_TYPES)
 
         if file_types:
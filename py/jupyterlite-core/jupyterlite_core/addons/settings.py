@@ -1,9 +1,9 @@
 """a JupyterLite addon for supporting extension settings"""
 
-import json
+from functools import partial
 
+from .. import codec
 from ..constants import (
-    JSON_FMT,
     JUPYTER_CONFIG_DATA,
     JUPYTERLITE_IPYNB,
     JUPYTERLITE_JSON,
@@ -11,7 +11,6 @@ from ..constants import (
     LAB_EXTENSIONS,
     OVERRIDES_JSON,
     SETTINGS_OVERRIDES,
-    UTF8,
 )
 from .base import BaseAddon
 
@@ -59,26 +58,30 @@ class SettingsAddon(BaseAddon):
             if not overrides_json.exists():
                 continue
 
-            yield self.task(
-                name=f"patch:overrides:{app}",
-                file_dep=[overrides_json, jupyterlite_json],
-                actions=[(self.patch_one_overrides, [jupyterlite_json, overrides_json])],
+            manager.patch_config(
+                jupyterlite_json,
+                f"settings:overrides:{app}",
+                partial(self.patch_one_overrides, overrides_json=overrides_json),
+                file_dep=[overrides_json],
             )
 
     def check(self, manager):
         for lite_file in [
-            *manager.output_dir.rglob(JUPYTERLITE_JSON),
-            *manager.output_dir.rglob(JUPYTERLITE_IPYNB),
+            *manager.snapshot.files(manager.output_dir, JUPYTERLITE_JSON),
+            *manager.snapshot.files(manager.output_dir, JUPYTERLITE_IPYNB),
         ]:
             yield from self.check_one_lite_file(lite_file)
 
     def check_one_lite_file(self, lite_file):
-        config = json.loads(lite_file.read_text(**UTF8))
+        """yield a task to validate all of the settings overrides of one config file"""
+        config = codec.read_json(lite_file)
 
         if lite_file.name == JUPYTERLITE_IPYNB:
             config = config["metadata"][JUPYTERLITE_METADATA]
 
         overrides = config.get(JUPYTER_CONFIG_DATA, {}).get(SETTINGS_OVERRIDES, {})
+        items = []
+        schemas = set()
 
         for plugin_id, defaults in overrides.items():
             ext, plugin = plugin_id.split(":")
@@ -92,37 +95,34 @@ class SettingsAddon(BaseAddon):
                     self.log.debug(f"[lite] [settings] Missing {plugin} (probably harmless)")
                     continue
 
-            validator = self.get_validator(schema)
+            schemas.add(schema)
+            items += [(schema, None, defaults)]
 
-            yield self.task(
-                name=f"overrides:{plugin_id}",
-                file_dep=[lite_file, schema],
-                actions=[(self.validate_one_json_file, [validator, None, defaults])],
-            )
+        if not items:
+            return
 
-    def patch_one_overrides(self, jupyterlite_json, overrides_json):
-        """update and normalize settingsOverrides"""
-        try:
-            config = json.loads(jupyterlite_json.read_text(**UTF8))
-        except (FileNotFoundError, json.JSONDecodeError):
-            self.log.debug(f"[lite] [settings] Initializing {jupyterlite_json}")
-            config = {JUPYTER_CONFIG_DATA: {}}
+        stem = lite_file.relative_to(self.manager.output_dir).as_posix()
 
-        overrides = config[JUPYTER_CONFIG_DATA].get(SETTINGS_OVERRIDES, {})
+        yield self.task(
+            name=f"overrides:{stem}",
+            doc=f"validate {len(items)} settings overrides in {stem}",
+            file_dep=[lite_file, *sorted(schemas)],
+            actions=[(self.validate_all_json, [items])],
+        )
+
+    def patch_one_overrides(self, config, overrides_json):
+        """update and normalize settingsOverrides"""
+        config_data = config.setdefault(JUPYTER_CONFIG_DATA, {})
+        overrides = config_data.get(SETTINGS_OVERRIDES, {})
 
-        from_json = json.loads(overrides_json.read_text(**UTF8))
+        from_json = codec.read_json(overrides_json)
         for k, v in from_json.items():
             if k in overrides:
                 overrides[k].update(v)
             else:
                 overrides[k] = v
 
-        config[JUPYTER_CONFIG_DATA][SETTINGS_OVERRIDES] = overrides
-
-        jupyterlite_json.write_text(json.dumps(config, **JSON_FMT), **UTF8)
-
-        self.maybe_timestamp(jupyterlite_json)
-        self.log.debug(f"[lite] [settings] Updated {jupyterlite_json}")
+        config_data[SETTINGS_OVERRIDES] = overrides
 
     @property
     def output_extensions(self):
@@ -2,15 +2,15 @@
 
 import json
 import re
-import shutil
 import tarfile
-import tempfile
 from pathlib import Path
 
 import doit
 from traitlets import Instance, default
 
+from .. import codec
 from ..constants import JUPYTERLITE_JSON, UTF8
+from ..store import temp_path_for
 from .base import BaseAddon
 
 
@@ -49,38 +49,36 @@ class StaticAddon(BaseAddon):
         )
 
     def pre_init(self, manager):
-        """well before anything else, we need to ensure that the output_dir exists
-        and is empty (if the baseline tarball has changed)
-        """
+        """well before anything else, we need to ensure that the output_dir exists"""
         output_dir = manager.output_dir
 
         yield self.task(
             name="output_dir",
-            doc="clean out the lite directory",
-            file_dep=[self.app_archive],
-            uptodate=[
-                doit.tools.config_changed(
-                    dict(
-                        apps=self.manager.apps,
-                        no_sourcemaps=self.manager.no_sourcemaps,
-                        no_unused_shared_packages=self.manager.no_unused_shared_packages,
-                    )
-                )
-            ],
-            actions=[
-                lambda: [output_dir.exists() and shutil.rmtree(output_dir), None][-1],
-                (doit.tools.create_folder, [output_dir]),
-            ],
+            doc="ensure the lite directory exists",
+            uptodate=[output_dir.exists],
+            actions=[(doit.tools.create_folder, [output_dir])],
         )
 
     def init(self, manager):
-        """unpack and copy the tarball files into the output_dir"""
+        """unpack and copy the changed tarball files into the output_dir"""
+        config = dict(
+            apps=self.manager.apps,
+            no_sourcemaps=self.manager.no_sourcemaps,
+            no_unused_shared_packages=self.manager.no_unused_shared_packages,
+        )
+
         yield self.task(
             name="unpack",
             doc=f"unpack a 'gold master' JupyterLite from {self.app_archive.name}",
             actions=[(self._unpack_stdlib, [])],
             file_dep=[self.app_archive],
             targets=[manager.output_dir / JUPYTERLITE_JSON],
+            uptodate=[doit.tools.config_changed(config)],
+            meta=dict(
+                build_cache=dict(
+                    key=config, outputs=self.unpacked_outputs, pulled=self.pulled_outputs
+                )
+            ),
         )
 
     def post_init(self, manager):
@@ -88,7 +86,7 @@ class StaticAddon(BaseAddon):
         output_dir = manager.output_dir
 
         with tarfile.open(str(self.app_archive), "r:gz") as tar:
-            pkg_data = json.loads(tar.extractfile(tar.getmember("package/package.json")).read())
+            pkg_data = codec.loads(tar.extractfile(tar.getmember("package/package.json")).read())
 
         all_apps = set(pkg_data["jupyterlite"]["apps"])
         mgr_apps = set(manager.apps if manager.apps else all_apps)
@@ -120,16 +118,120 @@ class StaticAddon(BaseAddon):
     def _default_app_archive(self):
         return self.manager.app_archive
 
+    @property
+    def static_manifest(self):
+        """the sizes and hashes of the files last unpacked from the app archive"""
+        return self.manager.shard_cache_dir / "static" / "manifest.json"
+
+    def unpacked_outputs(self):
+        """the files written by ``_unpack_stdlib``, for the build cache
+
+        The manifest is not cached, as it describes this ``output_dir``.
+        """
+        output_dir = self.manager.output_dir
+        return [output_dir / p for p in self.load_static_manifest()]
+
+    def pulled_outputs(self, paths):
+        """delete the files of the last unpack which were not pulled, and remember the rest"""
+        output_dir = self.manager.output_dir
+        old_files = self.load_static_manifest() or {}
+        # the size and digest of a pulled file are unknown, so the next unpack replaces it
+        new_files = {
+            path.relative_to(output_dir).as_posix(): None
+            for path in paths
+            if output_dir in path.parents
+        }
+        removed = sorted(set(old_files) - set(new_files))
+        self.delete_one(*[output_dir / rel_path for rel_path in removed])
+        self.save_static_manifest(new_files)
+        self.maybe_timestamp_folders(output_dir, removed)
+
     def _unpack_stdlib(self):
-        """extract the original static assets into the output dir"""
+        """add, replace, or delete the original static assets which changed since
+        the last unpack, keeping all other files in the output dir
+        """
         output_dir = self.manager.output_dir
+        old_files = self.load_static_manifest()
+
+        if old_files is None:
+            # unknown provenance: start over
+            self.delete_one(output_dir)
+            old_files = {}
+
+        store = self.manager.object_store
+        digest = self.manager.hasher.sha256(self.app_archive)
+        new_files = self.get_static_files(store.unpack(self.app_archive, self.extract_one, digest))
+
+        changed = [
+            rel_path
+            for rel_path, state in new_files.items()
+            if old_files.get(rel_path) != state or not (output_dir / rel_path).exists()
+        ]
+        removed = sorted(set(old_files) - set(new_files))
+
+        self.log.debug(
+            f"[static] {len(changed)} changed, {len(removed)} removed, "
+            f"{len(new_files) - len(changed)} unchanged files"
+        )
+
+        for rel_path in changed:
+            dest = output_dir / rel_path
+            store.materialize(new_files[rel_path][1], dest)
+            self.maybe_timestamp(dest)
+
+        self.delete_one(*[output_dir / rel_path for rel_path in removed])
+        self.save_static_manifest(new_files)
+        self.maybe_timestamp_folders(output_dir, [*changed, *removed])
+
+    def get_static_files(self, tree):
+        """get the ``[size, digest]`` of all the files to unpack, by relative path"""
+        prefix = "package/"
+        return {
+            rel_path[len(prefix) :]: state
+            for rel_path, state in tree.items()
+            if rel_path.startswith(prefix) and not self.is_ignored_sourcemap(rel_path)
+        }
+
+    def load_static_manifest(self):
+        """get the files last unpacked into the output dir, or ``None`` if unknown"""
+        manifest_path = self.static_manifest
+        output_dir = self.manager.output_dir
+
+        if not (manifest_path.exists() and output_dir.exists()):
+            return None
+
+        try:
+            manifest = codec.read_json(manifest_path)
+        except json.JSONDecodeError:  # pragma: no cover
+            return None
+
+        if manifest.get("output_dir") != str(output_dir.resolve()):
+            return None
+
+        return manifest.get("files")
+
+    def save_static_manifest(self, static_files):
+        """record the files unpacked into the output dir"""
+        manifest_path = self.static_manifest
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        manifest = dict(output_dir=str(self.manager.output_dir.resolve()), files=static_files)
+        tmp_path = temp_path_for(manifest_path)
+        codec.write_json(tmp_path, manifest, compact=True)
+        tmp_path.replace(manifest_path)
+
+    def maybe_timestamp_folders(self, root, rel_paths):
+        """timestamp the folders which contain (or contained) some files"""
+        if self.manager.source_date_epoch is None:
+            return
+
+        folders = {root}
 
-        with tempfile.TemporaryDirectory() as td:
-            tdp = Path(td)
-            self.extract_one(self.app_archive, tdp)
-            self.copy_one(tdp / "package", output_dir)
+        for rel_path in rel_paths:
+            folders.update((root / rel_path).parents)
 
-        self.maybe_timestamp(output_dir)
+        for folder in sorted(folders):
+            if folder == root or root in folder.parents:
+                self.maybe_timestamp(folder, recursive=False)
 
     def prune_unused_shared_packages(self, all_apps, apps_to_remove):
         """manually remove unused webpack chunks from shared packages"""
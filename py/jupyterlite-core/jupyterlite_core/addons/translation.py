@@ -1,12 +1,12 @@
 """a JupyterLite addon to expose translation data"""
 
-import json
 import pprint
 from typing import TYPE_CHECKING
 
 import doit.tools
 
-from ..constants import ALL_JSON, API_TRANSLATIONS, JSON_FMT, UTF8
+from .. import codec
+from ..constants import ALL_JSON, API_TRANSLATIONS
 from ..optional import has_optional_dependency
 from .base import BaseAddon
 
@@ -55,7 +55,7 @@ class TranslationAddon(BaseAddon):
 
     def check(self, manager: "LiteManager"):
         """Check if the translation data is valid"""
-        for all_json in self.api_dir.rglob(ALL_JSON):
+        for all_json in manager.snapshot.files(self.api_dir, ALL_JSON):
             stem = all_json.relative_to(self.api_dir)
             yield self.task(
                 name=f"validate:translation:{stem}",
@@ -69,11 +69,11 @@ class TranslationAddon(BaseAddon):
 
         # save the metadata about available packs
         api_path.parent.mkdir(parents=True, exist_ok=True)
-        api_path.write_text(json.dumps(metadata, **JSON_FMT), **UTF8)
+        codec.write_json(api_path, metadata)
 
         for locale, data in packs.items():
             language_pack_file = self.get_language_pack_file(locale)
-            language_pack_file.write_text(json.dumps(data, **JSON_FMT), **UTF8)
+            codec.write_json(language_pack_file, data)
             self.maybe_timestamp(language_pack_file)
 
     @property
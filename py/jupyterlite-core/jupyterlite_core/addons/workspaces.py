@@ -1,18 +1,16 @@
 """a JupyterLite addon for supporting workspaces"""
 
-import json
 import pprint
 from collections import defaultdict
 
 import doit.tools
 
+from .. import codec
 from ..constants import (
     ALL_JSON,
     API_WORKSPACES,
-    JSON_FMT,
     JUPYTER_CONFIG_DATA,
     JUPYTERLITE_JSON,
-    UTF8,
     WORKSPACE_FILE,
     WORKSPACES,
     WORKSPACES_ALL_JSON_FILE,
@@ -48,12 +46,11 @@ class WorkspacesAddon(BaseAddon):
         )
 
         # Update jupyter-lite.json with the workspaces all.json filename
-        jupyterlite_json = self.manager.output_dir / JUPYTERLITE_JSON
-        yield self.task(
-            name="patch:workspacesAllJsonFile",
-            doc="update jupyter-lite.json with workspacesAllJsonFile",
-            file_dep=[self.output_workspaces_json, jupyterlite_json],
-            actions=[(self.patch_workspaces_config, [jupyterlite_json])],
+        manager.patch_config(
+            manager.output_dir / JUPYTERLITE_JSON,
+            "workspaces:workspacesAllJsonFile",
+            self.patch_workspaces_config,
+            file_dep=[self.output_workspaces_json],
         )
 
     def check(self, manager):
@@ -74,38 +71,20 @@ class WorkspacesAddon(BaseAddon):
         workspaces = {}
 
         for workspace_path in self.workspaces:
-            workspace = json.loads(workspace_path.read_text(**UTF8))
+            workspace = codec.read_json(workspace_path)
             stem = workspace_path.stem
             workspace_id = workspace.get("metadata", {}).get("id", stem)
             workspaces[workspace_id] = workspace
 
-        self.output_workspaces_json.write_text(
-            json.dumps(workspaces, **JSON_FMT),
-            **UTF8,
-        )
+        codec.write_json(self.output_workspaces_json, workspaces)
 
-    def patch_workspaces_config(self, jupyterlite_json):
+    def patch_workspaces_config(self, config):
         """Update jupyter-lite.json with the workspaces all.json filename."""
-        try:
-            config = json.loads(jupyterlite_json.read_text(**UTF8))
-        except (FileNotFoundError, json.JSONDecodeError):
-            config = {JUPYTER_CONFIG_DATA: {}}
-
-        if JUPYTER_CONFIG_DATA not in config:
-            config[JUPYTER_CONFIG_DATA] = {}
-
-        # Set the filename for workspaces all.json
-        config[JUPYTER_CONFIG_DATA][WORKSPACES_ALL_JSON_FILE] = ALL_JSON
-
-        jupyterlite_json.write_text(json.dumps(config, **JSON_FMT), **UTF8)
-        self.maybe_timestamp(jupyterlite_json)
-        self.log.debug(
-            f"[lite] [workspaces] Updated {jupyterlite_json} with {WORKSPACES_ALL_JSON_FILE}"
-        )
+        config.setdefault(JUPYTER_CONFIG_DATA, {})[WORKSPACES_ALL_JSON_FILE] = ALL_JSON
 
     def validate_workspaces_json(self):
         """Ensure /api/workspaces/all.json is well-formatted"""
-        workspaces = json.loads(self.output_workspaces_json.read_text(**UTF8))
+        workspaces = codec.read_json(self.output_workspaces_json)
 
         errors = defaultdict(list)
 
@@ -8,10 +8,9 @@ from traitlets import Bool, Instance, List, Unicode, default
 from traitlets.utils.text import indent
 
 from . import __version__
-from .addons import get_addon_implementations, merge_addon_aliases, merge_addon_flags
+from .addons import get_addon_manifest, merge_addon_aliases, merge_addon_flags
 from .config import LiteBuildConfig
 from .constants import PHASES
-from .manager import LiteManager
 
 #: the total set of flags from discovered addons
 lite_flags = {
@@ -36,6 +35,10 @@ lite_flags = {
         {"LiteBuildConfig": {"no_libarchive": True}},
         "Do not try to use libarchive-c for archive operations",
     ),
+    "profile": (
+        {"LiteBuildConfig": {"profile": True}},
+        "Write a Chrome trace and summary of the time and I/O of each task",
+    ),
 }
 
 lite_aliases = dict(
@@ -58,6 +61,14 @@ lite_aliases = dict(
         "output-dir": "LiteBuildConfig.output_dir",
         "output-archive": "LiteBuildConfig.output_archive",
         "source-date-epoch": "LiteBuildConfig.source_date_epoch",
+        # performance options
+        "jobs": "LiteBuildConfig.jobs",
+        "profile-dir": "LiteBuildConfig.profile_dir",
+        "build-cache": "LiteBuildConfig.build_cache",
+        "copy-mode": "LiteBuildConfig.copy_mode",
+        "sync-mode": "LiteBuildConfig.sync_mode",
+        "shard-count": "LiteBuildConfig.shard_count",
+        "shard-index": "LiteBuildConfig.shard_index",
         # server-specific things
         "port": "LiteBuildConfig.port",
         "base-url": "LiteBuildConfig.base_url",
@@ -114,18 +125,22 @@ class BaseLiteApp(JupyterApp, LiteBuildConfig, DescribedMixin):
         https://github.com/ipython/traitlets/blob/v5.8.0/traitlets/config/application.py#L517
 
         Unlike the upstream, this also takes Addon classes (and their parents)
-        into consideration.
+        into consideration, using the help pre-rendered in the addon manifest.
         """
         if not self.aliases:
             return
 
         classdict = {}
         # discover more classes
-        for cls in [*self.classes, *get_addon_implementations().values()]:
+        for cls in self.classes:
             # include all parents (up to, but excluding Configurable) in available names
             for c in cls.mro()[:-3]:
                 classdict[c.__name__] = c
 
+        addon_alias_help = {}
+        for addon in get_addon_manifest()["addons"].values():
+            addon_alias_help.update(addon["alias_help"])
+
         fhelp: str | None
         for alias, longname in self.aliases.items():
             try:
@@ -136,10 +151,12 @@ class BaseLiteApp(JupyterApp, LiteBuildConfig, DescribedMixin):
                 classname, traitname = name.split(".")[-2:]
                 name = classname + "." + traitname
 
-                cls = classdict[classname]
-
-                trait = cls.class_traits(config=True)[traitname]
-                fhelp = cls.class_get_trait_help(trait, helptext=fhelp).splitlines()
+                if classname not in classdict and alias in addon_alias_help:
+                    fhelp = [*addon_alias_help[alias]]
+                else:
+                    cls = classdict[classname]
+                    trait = cls.class_traits(config=True)[traitname]
+                    fhelp = cls.class_get_trait_help(trait, helptext=fhelp).splitlines()
 
                 aliases = (alias,) if not isinstance(alias, tuple) else alias
                 aliases = sorted(aliases, key=len)  # type:ignore[assignment]
@@ -158,10 +175,13 @@ class BaseLiteApp(JupyterApp, LiteBuildConfig, DescribedMixin):
 class ManagedApp(BaseLiteApp):
     """An app with a LiteManager that can do some config fixing"""
 
-    lite_manager = Instance(LiteManager)
+    # the manager (and ``doit``) is only imported when needed, e.g. not for ``--help``
+    lite_manager = Instance("jupyterlite_core.manager.LiteManager")
 
     @default("lite_manager")
-    def _default_manager(self):  # noqa: C901, PLR0912
+    def _default_manager(self):  # noqa: C901, PLR0912, PLR0915
+        from .manager import LiteManager
+
         kwargs = dict(
             parent=self,
         )
@@ -202,6 +222,23 @@ class ManagedApp(BaseLiteApp):
             kwargs["disable_addons"] = self.disable_addons
         if self.source_date_epoch is not None:
             kwargs["source_date_epoch"] = self.source_date_epoch
+        # never ``None``: the manager has the same default, from ``JUPYTERLITE_JOBS``
+        if self.jobs != self.trait_defaults("jobs"):
+            kwargs["jobs"] = self.jobs
+        if self.profile:
+            kwargs["profile"] = self.profile
+        if self.profile_dir:
+            kwargs["profile_dir"] = self.profile_dir
+        if self.build_cache:
+            kwargs["build_cache"] = self.build_cache
+        if self.copy_mode:
+            kwargs["copy_mode"] = self.copy_mode
+        if self.sync_mode:
+            kwargs["sync_mode"] = self.sync_mode
+        if self.shard_count is not None:
+            kwargs["shard_count"] = self.shard_count
+        if self.shard_index is not None:
+            kwargs["shard_index"] = self.shard_index
         if self.port is not None:
             kwargs["port"] = self.port
         if self.base_url is not None:
@@ -252,6 +289,71 @@ class LiteListApp(LiteDoitApp):
     _doit_cmd = ["list", "--all", "--status"]
 
 
+class LitePlanApp(ManagedApp):
+    """estimate which tasks a build would run, and why, without running them"""
+
+    @property
+    def aliases(self):
+        return {
+            **super().aliases,
+            "hook": "LitePlanner.hook",
+            "plan-output": "LitePlanner.output",
+        }
+
+    @property
+    def flags(self):
+        return {
+            **super().flags,
+            "json": ({"LitePlanner": {"json": True}}, "Print the plan as JSON"),
+        }
+
+    @default("classes")
+    def _default_classes(self):
+        from .plan import LitePlanner
+
+        return [LitePlanner]
+
+    def start(self):
+        from .plan import LitePlanner
+
+        super().start()
+        self.exit(LitePlanner(parent=self, manager=self.lite_manager).run())
+
+
+class LiteMergeApp(ManagedApp):
+    """merge the output folders of a build with --shard-count into one site
+
+    e.g.
+
+        jupyter lite merge shard-0 shard-1 --output-dir _output
+    """
+
+    @property
+    def flags(self):
+        return {
+            **super().flags,
+            "force": (
+                {"LiteShardMerger": {"force": True}},
+                "Replace an output folder which is not empty",
+            ),
+        }
+
+    @default("classes")
+    def _default_classes(self):
+        from .indexer import LiteContentsIndexer
+        from .shards import LiteShardMerger
+
+        return [LiteShardMerger, LiteContentsIndexer]
+
+    def start(self):
+        from .shards import LiteShardMerger
+
+        merger = LiteShardMerger(
+            parent=self, manager=self.lite_manager, shards=[*(self.extra_args or [])]
+        )
+        self.exit(merger.merge())
+
+
 # task app base class
 class LiteTaskApp(LiteDoitApp):
     """run a doit task, optionally with --force"""
@@ -301,6 +403,29 @@ class LiteBuildApp(LiteTaskApp):
 
     _doit_task = "build"
 
+    watch = Bool(False, help="keep running, and rebuild when sources change").tag(config=True)
+
+    @property
+    def flags(self):
+        """CLI flags, including some custom ones."""
+        return {
+            **super().flags,
+            "watch": ({"LiteBuildApp": {"watch": True}}, LiteBuildApp.watch.help),
+        }
+
+    def start(self):
+        if not self.watch:
+            return super().start()
+
+        from .watch import LiteWatcher
+
+        ManagedApp.start(self)
+        if self.force:
+            for phase in PHASES:
+                self.lite_manager.doit_run("forget", f"{phase}{self._doit_task}")
+        watcher = LiteWatcher(parent=self, manager=self.lite_manager, doit_cmd=self._doit_cmd)
+        self.exit(watcher.watch())
+
 
 class LiteCheckApp(LiteTaskApp):
     """verify a JupyterLite site, using available schema and rules"""
@@ -320,6 +445,54 @@ class LiteArchiveApp(LiteTaskApp):
     _doit_task = "archive"
 
 
+class LiteBenchApp(BaseLiteApp):
+    """measure build performance against a synthetic site"""
+
+    @property
+    def aliases(self):
+        return {
+            **base_aliases,
+            **{
+                alias.replace("_", "-"): f"LiteBench.{alias}"
+                for alias in [
+                    "files",
+                    "depth",
+                    "min_size",
+                    "max_size",
+                    "extensions",
+                    "workspaces",
+                    "seed",
+                    "commands",
+                    "scenarios",
+                    "repeat",
+                    "bench_dir",
+                    "output",
+                ]
+            },
+        }
+
+    @property
+    def flags(self):
+        return {
+            **lite_flags,
+            "with-source-date-epoch": (
+                {"LiteBench": {"source_date_epoch": True}},
+                "Build with a SOURCE_DATE_EPOCH",
+            ),
+        }
+
+    @default("classes")
+    def _default_classes(self):
+        from .bench import LiteBench
+
+        return [LiteBench]
+
+    def start(self):
+        from .bench import LiteBench
+
+        self.exit(LiteBench(parent=self).run())
+
+
 class LiteApp(BaseLiteApp):
     """build ready-to-serve (or -publish) JupyterLite sites"""
 
@@ -328,6 +501,8 @@ class LiteApp(BaseLiteApp):
         for k, v in dict(
             # special apps
             list=LiteListApp,
+            plan=LitePlanApp,
+            merge=LiteMergeApp,
             # task apps
             status=LiteStatusApp,
             init=LiteInitApp,
@@ -337,6 +512,7 @@ class LiteApp(BaseLiteApp):
             archive=LiteArchiveApp,
             # more special apps
             doit=LiteRawDoitApp,
+            bench=LiteBenchApp,
         ).items()
     }
 
@@ -0,0 +1,265 @@
+"""measure the performance of building synthetic JupyterLite sites"""
+
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from traitlets import Bool, CInt, Enum, Int, List, Unicode, default
+from traitlets.config import LoggingConfigurable
+
+from . import __version__, codec
+from .constants import (
+    PACKAGE_JSON,
+    PHASES,
+    UTF8,
+    WORKSPACE_FILE,
+    WORKSPACES,
+)
+from .trait_types import CPath
+
+#: the commands which can be measured
+BENCH_COMMANDS = ["build", "check", "archive"]
+
+#: what is kept between runs: nothing, the cache (but not the output), or everything
+BENCH_SCENARIOS = ["cold", "warm", "noop"]
+
+#: the chance of a content file starting a new folder
+NEW_FOLDER_CHANCE = 0.1
+
+#: words for synthetic file names
+WORDS = ["alpha", "beta", "gamma", "delta", "data", "notes", "model", "plot", "index"]
+
+
+class LiteBench(LoggingConfigurable):
+    """generate a synthetic site, and time ``jupyter lite`` commands against it"""
+
+    files: int = CInt(1000, help="the number of content files to generate").tag(config=True)
+
+    depth: int = CInt(3, help="the maximum depth of content folders").tag(config=True)
+
+    min_size: int = CInt(100, help="the smallest content file, in bytes").tag(config=True)
+
+    max_size: int = CInt(
+        100_000, help="the largest content file, in bytes (sizes are log-uniform)"
+    ).tag(config=True)
+
+    extensions: int = CInt(5, help="the number of fake prebuilt labextensions").tag(config=True)
+
+    workspaces: int = CInt(2, help="the number of workspaces").tag(config=True)
+
+    source_date_epoch: bool = Bool(False, help="whether to build with a SOURCE_DATE_EPOCH").tag(
+        config=True
+    )
+
+    seed: int = Int(42, help="the seed for generating a site").tag(config=True)
+
+    commands: list[str] = List(
+        Enum(BENCH_COMMANDS), default_value=BENCH_COMMANDS, help="the commands to measure"
+    ).tag(config=True)
+
+    scenarios: list[str] = List(
+        Enum(BENCH_SCENARIOS), default_value=BENCH_SCENARIOS, help="the scenarios to measure"
+    ).tag(config=True)
+
+    repeat: int = CInt(1, help="how many times to measure each command and scenario").tag(
+        config=True
+    )
+
+    bench_dir: Path = CPath(
+        help="where to generate sites (default: a temporary folder, removed after)"
+    ).tag(config=True)
+
+    output: str = Unicode("", help="a file to write JSON results to (default: stdout)").tag(
+        config=True
+    )
+
+    _temp_dir: Path | None = None
+
+    @default("bench_dir")
+    def _default_bench_dir(self):
+        self._temp_dir = Path(tempfile.mkdtemp(prefix="jupyterlite-bench-"))
+        return self._temp_dir
+
+    def run(self):
+        """generate and measure a site, removing it after if in a temporary folder"""
+        try:
+            return self.run_all(self.bench_dir / "site")
+        finally:
+            if self._temp_dir is not None:
+                shutil.rmtree(self._temp_dir, ignore_errors=True)
+
+    def run_all(self, lite_dir):
+        """generate a site, measure all of the commands, and report the results"""
+        shape = self.generate_site(lite_dir)
+        runs = []
+
+        for command in self.commands:
+            for scenario in self.scenarios:
+                for repeat in range(self.repeat):
+                    self.log.info(f"[lite] [bench] {command} {scenario} {repeat + 1}")
+                    runs += [self.run_one(lite_dir, command, scenario, shape)]
+
+        results = dict(
+            version=__version__,
+            python=sys.version,
+            platform=platform.platform(),
+            site=shape,
+            runs=runs,
+        )
+        text = codec.dumps(results)
+
+        if self.output:
+            Path(self.output).write_text(text, **UTF8)
+        else:
+            print(text)
+
+        return max(run["rc"] for run in runs) if runs else 0
+
+    def generate_site(self, lite_dir):
+        """write a deterministic site of the configured shape"""
+        if lite_dir.exists():
+            shutil.rmtree(lite_dir)
+
+        # only for reproducible, synthetic data
+        rand = random.Random(self.seed)  # noqa: S311
+        files_dir = lite_dir / "files"
+        folders = [files_dir]
+        total_bytes = 0
+
+        for i in range(self.files):
+            parent = rand.choice(folders)
+            if (
+                len(parent.relative_to(files_dir).parts) < self.depth
+                and rand.random() < NEW_FOLDER_CHANCE
+            ):
+                parent = parent / f"{rand.choice(WORDS)}-{i}"
+                folders += [parent]
+            parent.mkdir(parents=True, exist_ok=True)
+            size = int(self.min_size * (self.max_size / self.min_size) ** rand.random())
+            path = parent / f"{rand.choice(WORDS)}-{i}.txt"
+            path.write_bytes(rand.randbytes(size // 2).hex()[:size].encode("ascii"))
+            total_bytes += size
+
+        extensions_dir = lite_dir / "bench-extensions"
+        for i in range(self.extensions):
+            self.generate_extension(extensions_dir / f"bench-extension-{i}", i)
+
+        config = dict(FederatedExtensionAddon=dict(extra_labextensions_path=[str(extensions_dir)]))
+        (lite_dir / "jupyter_lite_config.json").write_text(json.dumps(config), **UTF8)
+
+        for i in range(self.workspaces):
+            workspace = lite_dir / WORKSPACES / f"bench-{i}{WORKSPACE_FILE}"
+            workspace.parent.mkdir(parents=True, exist_ok=True)
+            data = dict(data={}, metadata=dict(id=f"bench-{i}"))
+            workspace.write_text(json.dumps(data), **UTF8)
+
+        return dict(
+            files=self.files,
+            folders=len(folders),
+            bytes=total_bytes,
+            depth=self.depth,
+            extensions=self.extensions,
+            workspaces=self.workspaces,
+            source_date_epoch=self.source_date_epoch,
+            seed=self.seed,
+        )
+
+    def generate_extension(self, ext_dir, i):
+        """write a fake, prebuilt labextension"""
+        remote_entry = f"static/remoteEntry.{i:08x}.js"
+        pkg = dict(
+            name=ext_dir.name,
+            version="0.0.0",
+            jupyterlab=dict(_build=dict(load=remote_entry, extension="./extension")),
+        )
+        (ext_dir / "static").mkdir(parents=True, exist_ok=True)
+        (ext_dir / PACKAGE_JSON).write_text(json.dumps(pkg), **UTF8)
+        (ext_dir / remote_entry).write_text(f"/* {ext_dir.name} */\n" * 100, **UTF8)
+
+    def reset(self, lite_dir, scenario):
+        """remove outputs (and maybe caches) before a run"""
+        if scenario == "noop":
+            return
+
+        to_remove = [lite_dir / "_output", lite_dir / ".jupyterlite.doit.db"]
+        if scenario == "cold":
+            to_remove += [lite_dir / ".cache"]
+
+        for path in to_remove:
+            if path.is_dir():
+                shutil.rmtree(path)
+            elif path.exists():
+                path.unlink()
+
+    def run_one(self, lite_dir, command, scenario, shape):
+        """time one command, with a profile of its hooks"""
+        self.reset(lite_dir, scenario)
+
+        if scenario == "noop":
+            # make sure there is something to not do
+            self.run_command(lite_dir, command, lite_dir / ".cache/bench/warmup")
+
+        profile_dir = lite_dir / ".cache" / "bench" / f"{command}-{scenario}"
+        wall, max_rss, rc = self.run_command(lite_dir, command, profile_dir)
+
+        if rc:
+            self.log.warning(f"[lite] [bench] {command} {scenario} failed with {rc}")
+
+        return dict(
+            command=command,
+            scenario=scenario,
+            rc=rc,
+            wall=round(wall, 6),
+            max_rss=max_rss,
+            hooks=self.hook_timings(profile_dir / f"{command}.trace.json"),
+            files_per_second=round(shape["files"] / wall, 3),
+            mb_per_second=round(shape["bytes"] / 1e6 / wall, 3),
+        )
+
+    def run_command(self, lite_dir, command, profile_dir):
+        """run a command, returning its wall time, peak RSS (in bytes, if known), and rc"""
+        args = [sys.executable, "-m", "jupyterlite_core", command]
+        args += ["--profile", "--profile-dir", str(profile_dir)]
+        if self.source_date_epoch:
+            args += ["--source-date-epoch", "1700000000"]
+
+        start = time.perf_counter()
+        proc = subprocess.Popen(  # noqa: S603
+            args, cwd=str(lite_dir), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+
+        if hasattr(os, "wait4"):
+            _pid, status, rusage = os.wait4(proc.pid, 0)
+            wall = time.perf_counter() - start
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            # kilobytes on linux, bytes on macOS
+            max_rss = rusage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+        else:  # pragma: no cover
+            proc.wait()
+            wall = time.perf_counter() - start
+            max_rss = None
+
+        return wall, max_rss, proc.returncode
+
+    def hook_timings(self, trace_json):
+        """sum the durations of the events in a profile, in seconds, by hook"""
+        hooks = {}
+
+        if not trace_json.exists():
+            return hooks
+
+        for event in codec.read_json(trace_json)["traceEvents"]:
+            hook = event["name"].split(":")[0]
+            for phase in PHASES:
+                if phase and hook.startswith(phase):
+                    hook = hook[len(phase) :]
+            hooks[hook] = round(hooks.get(hook, 0) + event["dur"] / 1e6, 6)
+
+        return dict(sorted(hooks.items()))
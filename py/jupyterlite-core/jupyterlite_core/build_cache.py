@@ -0,0 +1,278 @@
+"""pull and push the outputs of expensive tasks, keyed by a digest of their inputs"""
+
+import abc
+import functools
+import hashlib
+import io
+import os
+import tarfile
+import urllib.error
+import urllib.parse
+import urllib.request
+from http import HTTPStatus
+from importlib.metadata import entry_points
+from pathlib import Path
+
+from traitlets import Bool, Dict, Float, MetaHasTraits, Unicode
+from traitlets.config import LoggingConfigurable
+from traitlets.utils.importstring import import_item
+
+from . import __version__, codec
+from .constants import BUILD_CACHE_BACKENDS, BUILD_CACHE_ENTRYPOINT
+from .store import sha256_file, temp_path_for
+
+#: the ``meta`` key of a task which may be cached
+META_BUILD_CACHE = "build_cache"
+
+#: bump to invalidate all previously-pushed outputs
+BUILD_CACHE_VERSION = 2
+
+
+def get_build_cache(url, **kwargs):
+    """get a build cache backend for a URL, by its scheme"""
+    scheme = urllib.parse.urlparse(url).scheme
+
+    if os.name == "nt" and len(scheme) == 1:  # pragma: no cover
+        # a drive letter
+        scheme = ""
+
+    for entry_point in entry_points(group=BUILD_CACHE_ENTRYPOINT):
+        if entry_point.name == scheme:
+            return entry_point.load()(url=url, **kwargs)
+
+    if scheme not in BUILD_CACHE_BACKENDS:
+        raise ValueError(f"[lite] [build-cache] unknown build cache scheme {scheme}: {url}")
+
+    return import_item(BUILD_CACHE_BACKENDS[scheme].replace(":", "."))(url=url, **kwargs)
+
+
+class _MetaBuildCache(abc.ABCMeta, MetaHasTraits):
+    """a metaclass for configurables with abstract methods"""
+
+
+class LiteBuildCache(LoggingConfigurable, metaclass=_MetaBuildCache):
+    """a store of task outputs, keyed by a digest of the task's inputs
+
+    A task opts in with ``meta={"build_cache": {...}}``, which may contain:
+
+    - ``key``: any JSON-compatible data, e.g. configuration, which changes the outputs
+    - ``outputs``: the files or folders it writes (default: its ``targets``), or a
+      callable which returns them after the task's actions have run
+    - ``pulled``: a callable, given the paths of the outputs after they are pulled, e.g.
+      to remove the outputs of a previous run which are no longer written
+
+    Before a task's actions run, its outputs are pulled by a key made from its name,
+    the paths and SHA-256 of its ``file_dep``, and its ``key``: if found, the actions
+    are skipped. Otherwise, after the actions, its outputs are pushed.
+
+    Backends must implement ``get`` and ``put``. Errors are logged, and never stop a build.
+    """
+
+    url: str = Unicode(help="where outputs are stored").tag(config=True)
+
+    read_only: bool = Bool(False, help="only pull outputs, never push them").tag(config=True)
+
+    roots: dict = Dict(help="the folders outputs may be in, by a portable name")
+
+    @abc.abstractmethod
+    def get(self, key):
+        """get the packed outputs for a key, or ``None``"""
+
+    @abc.abstractmethod
+    def put(self, key, data):
+        """store the packed outputs for a key"""
+
+    def wrap_task(self, task):
+        """guard the actions of a task with a pull, and follow them with a push"""
+        if not all(isinstance(action, tuple) or callable(action) for action in task["actions"]):
+            # a shell command can't be skipped
+            return task
+
+        state = dict(pulled=False)
+
+        def _guard(action):
+            @functools.wraps(action)
+            def _guarded(*args, **kwargs):
+                if not state["pulled"]:
+                    return action(*args, **kwargs)
+
+            return _guarded
+
+        actions = [
+            (_guard(action[0]), *action[1:]) if isinstance(action, tuple) else _guard(action)
+            for action in task["actions"]
+        ]
+
+        return {
+            **task,
+            "actions": [
+                (self.pull_task, [task, state]),
+                *actions,
+                (self.push_task, [task, state]),
+            ],
+        }
+
+    def pull_task(self, task, state):
+        """try to replace the outputs of a task from the cache"""
+        spec = task["meta"][META_BUILD_CACHE]
+        state.update(key=self.task_key(task, spec.get("key")), pulled=False)
+
+        try:
+            data = self.get(state["key"])
+            pulled = None if data is None else self.unpack(data)
+            if pulled is not None and spec.get("pulled"):
+                spec["pulled"](pulled)
+            state["pulled"] = pulled is not None
+        except Exception as err:
+            self.log.warning(f"[lite] [build-cache] failed to pull {task['name']}: {err}")
+
+        if state["pulled"]:
+            self.log.info(f"[lite] [build-cache] pulled {task['name']}")
+
+    def push_task(self, task, state):
+        """try to store the outputs of a task in the cache, if not pulled"""
+        if state["pulled"] or self.read_only:
+            return
+
+        spec = task["meta"][META_BUILD_CACHE]
+        outputs = spec.get("outputs", task.get("targets") or [])
+
+        try:
+            self.put(state["key"], self.pack(outputs() if callable(outputs) else outputs))
+        except Exception as err:
+            self.log.warning(f"[lite] [build-cache] failed to push {task['name']}: {err}")
+
+    def task_key(self, task, extra):
+        """make a key from a task's name, ``file_dep`` and extra key data"""
+        file_dep = sorted(
+            [self.portable_path(Path(dep)) or Path(dep).name, sha256_file(dep)]
+            for dep in task.get("file_dep", [])
+        )
+        key_data = dict(
+            version=[BUILD_CACHE_VERSION, __version__],
+            name=task["name"],
+            file_dep=file_dep,
+            key=extra,
+        )
+        return hashlib.sha256(codec.dumps(key_data).encode("utf-8")).hexdigest()
+
+    def portable_path(self, path):
+        """get a path relative to the deepest matching root, or ``None``"""
+        path = Path(path).resolve()
+        best = None
+
+        for name, root_path in self.roots.items():
+            root = Path(root_path).resolve()
+            is_in = path == root or root in path.parents
+            if is_in and (best is None or len(root.parts) > len(best[1].parts)):
+                best = name, root
+
+        if best is None:
+            return None
+
+        return "/".join([best[0], *path.relative_to(best[1]).parts])
+
+    def pack(self, outputs):
+        """pack some files and folders as a ``.tar.gz``"""
+        files = []
+
+        for output in map(Path, outputs):
+            files += (
+                sorted(p for p in output.rglob("*") if p.is_file()) if output.is_dir() else [output]
+            )
+
+        buffer = io.BytesIO()
+
+        with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+            for path in files:
+                arcname = self.portable_path(path)
+                if arcname is None:
+                    raise ValueError(f"{path} is not in any of {sorted(self.roots)}")
+                tar.add(path, arcname=arcname, recursive=False)
+
+        return buffer.getvalue()
+
+    def unpack(self, data):
+        """replace files from a ``.tar.gz``, returning their paths, or ``None`` if unexpected"""
+        with tarfile.open(fileobj=io.BytesIO(data), mode="r:gz") as tar:
+            members = tar.getmembers()
+            dests = []
+
+            for member in members:
+                root_name, _, rel_path = member.name.partition("/")
+                dest = Path(self.roots.get(root_name, "")) / rel_path
+                if (
+                    not member.isfile()
+                    or root_name not in self.roots
+                    or ".." in Path(rel_path).parts
+                    or Path(rel_path).is_absolute()
+                ):
+                    self.log.warning(f"[lite] [build-cache] unexpected output {member.name}")
+                    return None
+                dests += [dest]
+
+            for member, dest in zip(members, dests, strict=True):
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                # replace, rather than modify, as the file may be linked from the object store
+                tmp_dest = temp_path_for(dest)
+                tmp_dest.write_bytes(tar.extractfile(member).read())
+                os.utime(tmp_dest, (member.mtime, member.mtime))
+                tmp_dest.replace(dest)
+
+        return dests
+
+
+class DirectoryBuildCache(LiteBuildCache):
+    """a build cache in a (maybe shared, or CI-cached) folder"""
+
+    @property
+    def root(self):
+        parsed = urllib.parse.urlparse(self.url)
+        if parsed.scheme == "file":
+            return Path(urllib.request.url2pathname(parsed.path))
+        return Path(self.url)
+
+    def path(self, key):
+        return self.root / key[:2] / f"{key}.tar.gz"
+
+    def get(self, key):
+        path = self.path(key)
+        return path.read_bytes() if path.exists() else None
+
+    def put(self, key, data):
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = temp_path_for(path)
+        tmp_path.write_bytes(data)
+        tmp_path.replace(path)
+
+
+class HTTPBuildCache(LiteBuildCache):
+    """a build cache on an HTTP server, which supports ``GET`` and ``PUT``"""
+
+    headers: dict = Dict(help="extra HTTP headers, e.g. for authorization").tag(config=True)
+
+    timeout: float = Float(30, help="seconds to wait for the server").tag(config=True)
+
+    def key_url(self, key):
+        return f"""{self.url.rstrip("/")}/{key}.tar.gz"""
+
+    def get(self, key):
+        req = urllib.request.Request(self.key_url(key), headers=self.headers)  # noqa: S310
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:  # noqa: S310
+                return response.read()
+        except urllib.error.HTTPError as err:
+            if err.code == HTTPStatus.NOT_FOUND:
+                return None
+            raise
+
+    def put(self, key, data):
+        req = urllib.request.Request(  # noqa: S310
+            self.key_url(key),
+            data=data,
+            method="PUT",
+            headers={**self.headers, "Content-Type": "application/gzip"},
+        )
+        with urllib.request.urlopen(req, timeout=self.timeout):  # noqa: S310
+            pass
@@ -0,0 +1,140 @@
+"""a fast JSON codec, which uses ``orjson`` or ``msgspec`` if installed
+
+The output of ``dumps`` is the same, byte for byte, as ``json.dumps`` with ``JSON_FMT``
+(or, when ``compact``, with the most compact separators, and without escaping non-ASCII
+characters), whichever backend is used. Where a fast backend can't give the same result,
+e.g. for very large integers, or floats written with an exponent, or smaller than ``1e-4``,
+the standard library is used instead. Only ``NaN`` and ``Infinity``, which are not valid
+JSON, are written as ``null`` by ``orjson``.
+
+Each backend may be disabled with an environment variable, e.g.
+``JUPYTERLITE_NO_ORJSON=1``.
+"""
+
+import json
+import re
+from functools import lru_cache
+
+from .constants import JSON_FMT, UTF8
+from .optional import has_optional_dependency
+
+#: arguments for compact, machine-only JSON
+JSON_COMPACT = dict(sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+#: a table to replace every digit with ``0``, which is much faster to search than a regex
+_DIGITS = bytes.maketrans(b"123456789", b"0" * 9)
+
+#: integers which may not fit in 64 bits, and which ``orjson`` would read as floats
+_BIG_INT = b"0" * 20
+
+#: floats written with an exponent by either backend, e.g. ``1e+16`` or ``1e-07`` by
+#: ``json``, or without one by ``orjson`` below ``1e-4``, e.g. ``0.00001`` for ``1e-05``
+_EXPONENTS = [b"0e0", b"0e-", b"0.0000"]
+
+#: characters escaped by ``json`` with ``ensure_ascii``, which ``orjson`` writes as UTF-8
+_NON_ASCII = re.compile(r"[^\x00-\x7e]")
+
+#: the first character which ``json`` escapes as a UTF-16 surrogate pair
+_SURROGATE_PAIR_MIN = 0x10000
+
+
+@lru_cache(1)
+def get_backend():
+    """get the name of the fastest available JSON backend"""
+    for backend in ["orjson", "msgspec"]:
+        if has_optional_dependency(backend):
+            return backend
+    return "json"
+
+
+def loads(data, backend=None):
+    """read JSON from ``str`` or ``bytes``"""
+    backend = backend or get_backend()
+    raw = data.encode("utf-8") if isinstance(data, str) else data
+
+    if backend != "json" and _BIG_INT not in raw.translate(_DIGITS):
+        try:
+            return _fast_loads(backend, raw)
+        except ValueError:
+            # ``json`` also reads ``NaN``, or gives the usual error
+            pass
+
+    return json.loads(data)
+
+
+def dumps(obj, compact=False, default=None, backend=None):
+    """write normalized (or ``compact``) JSON as a ``str``
+
+    ``default`` is called with each object which can't otherwise be serialized, such as
+    a ``datetime``, as for ``json.dumps``.
+    """
+    backend = backend or get_backend()
+
+    text = _orjson_dumps(obj, compact, default) if backend == "orjson" else None
+
+    if text is not None:
+        return text
+
+    return json.dumps(obj, default=default, **(JSON_COMPACT if compact else JSON_FMT))
+
+
+def read_json(path, backend=None):
+    """read a JSON file"""
+    return loads(path.read_bytes(), backend=backend)
+
+
+def write_json(path, obj, compact=False, default=None, backend=None):
+    """write a JSON file"""
+    path.write_text(dumps(obj, compact=compact, default=default, backend=backend), **UTF8)
+
+
+def _fast_loads(backend, raw):
+    if backend == "orjson":
+        import orjson
+
+        return orjson.loads(raw)
+
+    import msgspec
+
+    try:
+        return msgspec.json.decode(raw)
+    except msgspec.DecodeError as err:
+        raise ValueError(str(err)) from err
+
+
+def _orjson_dumps(obj, compact, default):
+    """get the same JSON as ``json.dumps``, or ``None`` if ``orjson`` can't"""
+    import orjson
+
+    option = orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    option |= orjson.OPT_PASSTHROUGH_DATACLASS
+
+    if not compact:
+        option |= orjson.OPT_INDENT_2
+
+    try:
+        raw = orjson.dumps(obj, default=default, option=option)
+    except TypeError:
+        # e.g. non-``str`` keys, or lone surrogates: let ``json`` handle (or raise)
+        return None
+
+    digits = raw.translate(_DIGITS)
+
+    if any(exponent in digits for exponent in _EXPONENTS):
+        return None
+
+    text = raw.decode("utf-8")
+
+    if not compact and (not text.isascii() or "\x7f" in text):
+        text = _NON_ASCII.sub(_escape_one, text)
+
+    return text
+
+
+def _escape_one(match):
+    """escape a character as ``json`` does, with a surrogate pair if needed"""
+    code = ord(match.group())
+    if code < _SURROGATE_PAIR_MIN:
+        return f"\\u{code:04x}"
+    code -= _SURROGATE_PAIR_MIN
+    return f"\\u{0xD800 | (code >> 10):04x}\\u{0xDC00 | (code & 0x3FF):04x}"
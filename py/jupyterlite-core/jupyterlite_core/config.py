@@ -9,7 +9,7 @@
 import os
 from pathlib import Path
 
-from traitlets import Bool, CInt, Dict, Tuple, Unicode, Union, default
+from traitlets import Bool, CInt, Dict, Enum, Tuple, Unicode, Union, default
 from traitlets.config import LoggingConfigurable
 
 from . import constants as C  # noqa: N812
@@ -91,6 +91,66 @@ class LiteBuildConfig(LoggingConfigurable):
         False, help="Remove any shared packages not used by --apps"
     ).tag(config=True)
 
+    jobs: int = CInt(
+        help=(
+            "the number of independent tasks to run concurrently, in threads. "
+            "Use 0 for one per CPU. env: JUPYTERLITE_JOBS"
+        ),
+        min=0,
+    ).tag(config=True)
+
+    profile: bool = Bool(
+        False,
+        help=(
+            "record the time and I/O of each task, writing a Chrome trace and a "
+            "summary to profile_dir"
+        ),
+    ).tag(config=True)
+
+    profile_dir: Path = CPath(
+        help="where to write profiles, with --profile. env: JUPYTERLITE_PROFILE_DIR"
+    ).tag(config=True)
+
+    build_cache: str = Unicode(
+        None,
+        allow_none=True,
+        help=(
+            "a folder or URL to pull the outputs of expensive tasks from, and push them to. "
+            "env: JUPYTERLITE_BUILD_CACHE"
+        ),
+    ).tag(config=True)
+
+    copy_mode: str = Enum(
+        C.COPY_MODES,
+        help=(
+            "how to copy files into the output folder: `hardlink`, `reflink` (copy-on-write) "
+            "and `symlink` fall back to `copy` where the filesystem does not support them, "
+            "while `auto` tries `reflink`, then `hardlink`. env: JUPYTERLITE_COPY_MODE"
+        ),
+    ).tag(config=True)
+
+    sync_mode: str = Enum(
+        C.SYNC_MODES,
+        help=(
+            "how to update a folder which was already copied: `replace` copies it all again, "
+            "`mtime` only copies files with a different size or modification time, and "
+            "`hash` also keeps files with the same content. env: JUPYTERLITE_SYNC_MODE"
+        ),
+    ).tag(config=True)
+
+    shard_count: int = CInt(
+        help=(
+            "split contents and federated extensions between this many builds, which "
+            "can be combined with `jupyter lite merge`. env: JUPYTERLITE_SHARD_COUNT"
+        ),
+        min=1,
+    ).tag(config=True)
+
+    shard_index: int = CInt(
+        help="which of the shard_count builds this is, from 0. env: JUPYTERLITE_SHARD_INDEX",
+        min=0,
+    ).tag(config=True)
+
     # serving
     port: int = CInt(
         help=("[serve] the port to (insecurely) expose on http://127.0.0.1. env: JUPYTERLITE_PORT")
@@ -172,6 +232,14 @@ class LiteBuildConfig(LoggingConfigurable):
     def _default_cache_dir(self):
         return Path(os.environ.get("JUPYTERLITE_CACHE_DIR") or self.lite_dir / ".cache")
 
+    @default("profile_dir")
+    def _default_profile_dir(self):
+        return Path(os.environ.get("JUPYTERLITE_PROFILE_DIR") or self.cache_dir / "profile")
+
+    @default("build_cache")
+    def _default_build_cache(self):
+        return os.environ.get("JUPYTERLITE_BUILD_CACHE") or None
+
     @default("lite_dir")
     def _default_lite_dir(self):
         return Path(os.environ.get("JUPYTERLITE_DIR", Path.cwd()))
@@ -279,6 +347,26 @@ class LiteBuildConfig(LoggingConfigurable):
         sde = int(os.environ[C.SOURCE_DATE_EPOCH])
         return sde
 
+    @default("jobs")
+    def _default_jobs(self):
+        return int(os.environ.get("JUPYTERLITE_JOBS", "1"))
+
+    @default("copy_mode")
+    def _default_copy_mode(self):
+        return os.environ.get("JUPYTERLITE_COPY_MODE", "copy")
+
+    @default("sync_mode")
+    def _default_sync_mode(self):
+        return os.environ.get("JUPYTERLITE_SYNC_MODE", "mtime")
+
+    @default("shard_count")
+    def _default_shard_count(self):
+        return int(os.environ.get("JUPYTERLITE_SHARD_COUNT", "1"))
+
+    @default("shard_index")
+    def _default_shard_index(self):
+        return int(os.environ.get("JUPYTERLITE_SHARD_INDEX", "0"))
+
     @default("port")
     def _default_port(self):
         return int(os.environ.get("JUPYTERLITE_PORT", "8000"))
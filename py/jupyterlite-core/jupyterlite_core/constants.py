@@ -27,6 +27,23 @@ ALL_APP_ARCHIVES = sorted(ROOT.glob("jupyterlite-*.tgz"))
 #: the extension point for addons, including core
 ADDON_ENTRYPOINT = "jupyterlite.addon.v0"
 
+#: the format of the cached CLI metadata of addons
+ADDON_MANIFEST_VERSION = 1
+
+#: extra ``doit`` dependency backends, as ``module:Class``
+DOIT_BACKENDS = {"lite": "jupyterlite_core.dependency:LiteDependencyStore"}
+
+#: the entry point group for more build cache backends, by URL scheme
+BUILD_CACHE_ENTRYPOINT = "jupyterlite.build_cache.v0"
+
+#: the build cache backends, by URL scheme
+BUILD_CACHE_BACKENDS = {
+    "": "jupyterlite_core.build_cache:DirectoryBuildCache",
+    "file": "jupyterlite_core.build_cache:DirectoryBuildCache",
+    "http": "jupyterlite_core.build_cache:HTTPBuildCache",
+    "https": "jupyterlite_core.build_cache:HTTPBuildCache",
+}
+
 ### other parties' well-known paths
 #: a predictably-serveable HTML file
 INDEX_HTML = "index.html"
@@ -47,6 +64,15 @@ REQUIREMENTS_TXT = "requirements.txt"
 #: output equivalent to `sha256sum *` for providing a local bill-of-data
 SHA256SUMS = "SHA256SUMS"
 
+#: how ``BaseAddon.copy_one`` may copy files into the output folder
+COPY_MODES = ["copy", "hardlink", "reflink", "symlink", "auto"]
+
+#: how ``BaseAddon.copy_one`` decides which files of an existing folder to copy again
+SYNC_MODES = ["replace", "mtime", "hash"]
+
+#: the description of one shard of a build, in its output folder
+SHARD_MANIFEST = "jupyterlite-shard.json"
+
 #: a script DOM ID on most jupyter pages
 JUPYTER_CONFIG_DATA = "jupyter-config-data"
 
@@ -91,6 +117,9 @@ DEFAULT_OUTPUT_DIR = "_output"
 ALL_JSON = "all.json"
 ALL_FEDERATED_JSON = "all_federated.json"
 
+#: the pages of a large folder listing, next to its ``all.json``
+ALL_JSON_PAGE = "all.{}.json"
+
 #: the workspace file extension
 WORKSPACE_FILE = ".jupyterlab-workspace"
 
@@ -0,0 +1,157 @@
+"""``doit`` dependency checking and storage, tuned for sites with many files"""
+
+import hashlib
+import marshal
+import os
+from pathlib import Path
+
+from doit.dependency import FileChangedChecker
+
+from .optional import has_optional_dependency
+
+#: the size of chunks to read when hashing files
+HASH_CHUNK_SIZE = 1024 * 1024
+
+#: the first bytes of a ``LiteDependencyStore`` file
+STORE_MAGIC = b"JUPYTERLITE-DOIT-1\n"
+
+
+def get_file_hasher():
+    """get the fastest available hash, and a name to tell its digests apart"""
+    if has_optional_dependency("xxhash"):
+        import xxhash
+
+        return "xxh3", xxhash.xxh3_128
+
+    return "blake2b", lambda: hashlib.blake2b(digest_size=16)
+
+
+def hash_file(path):
+    """get a prefixed, fast, non-cryptographic digest of a file's content"""
+    name, hasher = get_file_hasher()
+    file_hash = hasher()
+
+    with open(path, "rb") as fd:
+        while True:
+            chunk = fd.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            file_hash.update(chunk)
+
+    return f"{name}:{file_hash.hexdigest()}"
+
+
+class LiteFileChecker(FileChangedChecker):
+    """trust an unchanged ``(size, mtime_ns, inode)``, otherwise compare a fast hash
+
+    Unlike the default ``MD5Checker``, the fast path uses integer nanoseconds (which
+    don't suffer from float rounding), and the inode, which catches files that were
+    replaced by a copy with the same size and timestamp.
+    """
+
+    def check_modified(self, file_path, file_stat, state):
+        size, mtime_ns, inode, digest = state
+
+        if (file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino) == (size, mtime_ns, inode):
+            return False
+
+        if file_stat.st_size != size:
+            return True
+
+        return digest != hash_file(file_path)
+
+    def get_state(self, dep, current_state):
+        stat = os.stat(dep)
+        stamp = [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+        if current_state and list(current_state[:3]) == stamp:
+            return None
+
+        return [*stamp, hash_file(dep)]
+
+
+class LiteDependencyStore:
+    """a ``doit`` backend, keeping all task state in memory, in one ``marshal`` file
+
+    The whole file is read once, and written once (and only if changed) when
+    ``doit`` is done, avoiding the per-task queries and JSON encoding of the
+    ``sqlite3`` backend. A file from another backend, such as the ``sqlite3`` file
+    of a previous version, is replaced, and all tasks will run once.
+
+    With ``read_only``, e.g. for ``jupyter lite plan``, the file is never written.
+    """
+
+    desc = "all state in memory, stored in one marshal file"
+
+    def __init__(self, name, codec, *, module_name=None, read_only=False):
+        self.name = name
+        self.codec = codec
+        self.read_only = read_only
+        self._dirty = False
+        self._db = self._load()
+
+        if not (read_only or Path(name).exists()):
+            # like ``sqlite3``, create the file up-front, even for read-only commands
+            self._dirty = True
+            self.dump()
+
+    def _load(self):
+        """read the file, if it exists and was written by this backend"""
+        try:
+            with open(self.name, "rb") as fd:
+                data = fd.read()
+        except FileNotFoundError:
+            return {}
+
+        if data.startswith(STORE_MAGIC):
+            try:
+                # only ever written by ``dump``, below
+                return marshal.loads(data[len(STORE_MAGIC) :])  # noqa: S302
+            except (EOFError, ValueError, TypeError):
+                pass
+
+        # e.g. from the ``sqlite3`` backend, or corrupted: start over
+        self._dirty = True
+        return {}
+
+    def dump(self):
+        """atomically write the file, if anything changed"""
+        if self.read_only or not self._dirty:
+            return
+
+        try:
+            data = marshal.dumps(self._db)
+        except ValueError:
+            # some task ``values`` are not plain data, but must be JSON-compatible
+            data = marshal.dumps(self.codec.decode(self.codec.encode(self._db)))
+
+        tmp_path = Path(f"{self.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(STORE_MAGIC + data)
+        tmp_path.replace(self.name)
+        self._dirty = False
+
+    def set(self, task_id, dependency, value):
+        """store a value for a task"""
+        task_data = self._db.setdefault(task_id, {})
+        if task_data.get(dependency) != value:
+            task_data[dependency] = value
+            self._dirty = True
+
+    def get(self, task_id, dependency):
+        """get a stored value for a task, or ``None``"""
+        task_data = self._db.get(task_id)
+        return None if task_data is None else task_data.get(dependency)
+
+    def in_(self, task_id):
+        """whether a task has any stored values"""
+        return task_id in self._db
+
+    def remove(self, task_id):
+        """forget a task"""
+        if self._db.pop(task_id, None) is not None:
+            self._dirty = True
+
+    def remove_all(self):
+        """forget all tasks"""
+        self._db = {}
+        self._dirty = True
@@ -0,0 +1,354 @@
+"""concurrent, resumable, verified downloads of remote files"""
+
+import base64
+import email.utils
+import hashlib
+import http.client
+import json
+import os
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from pathlib import Path
+
+from traitlets import Any, Bool, Dict, Float, Int, default
+from traitlets.config import LoggingConfigurable
+
+from . import codec
+from .store import HASH_CHUNK_SIZE, sha256_file
+
+#: the suffix of a partially-downloaded file
+PART_SUFFIX = ".part"
+
+#: the suffix of the ``ETag``, ``Last-Modified`` and digest of a downloaded file
+META_SUFFIX = ".download.json"
+
+#: the responses which point to another URL
+REDIRECTS = {
+    HTTPStatus.MOVED_PERMANENTLY,
+    HTTPStatus.FOUND,
+    HTTPStatus.SEE_OTHER,
+    HTTPStatus.TEMPORARY_REDIRECT,
+    HTTPStatus.PERMANENT_REDIRECT,
+}
+
+
+def split_sha256(url):
+    """split a ``#sha256=<hex digest>`` fragment (if any) from a URL"""
+    base, _, fragment = url.partition("#")
+    for param in fragment.split("&"):
+        name, _, value = param.partition("=")
+        if name == "sha256" and value:
+            return base, value.lower()
+    return base, None
+
+
+class LiteDownloader(LoggingConfigurable):
+    """download files over HTTP(S), with a bounded pool of reused connections
+
+    - each thread keeps one open connection per host, reused for later requests, and
+      closed when the threads of ``fetch_all`` are done
+    - a proxy from the environment, e.g. ``https_proxy``, with any credentials, is sent
+      the whole URL of a plain ``http`` request, or tunnels to the host of an ``https`` one
+    - an interrupted download is kept as a ``.part`` file, and resumed with a
+      ``Range`` request, if the remote file has not changed since
+    - a pinned ``#sha256=<hex digest>`` URL fragment is verified while streaming
+    - with ``revalidate``, an existing download is only fetched again if the server
+      reports a new ``ETag`` or ``Last-Modified``
+    """
+
+    max_workers: int = Int(4, help="the most files to download at the same time").tag(config=True)
+
+    revalidate: bool = Bool(
+        False,
+        help=(
+            "whether to ask the server if an already-downloaded file (without a pinned "
+            "``#sha256=``) has changed, with ``If-None-Match`` and ``If-Modified-Since``"
+        ),
+    ).tag(config=True)
+
+    timeout: float = Float(60, help="seconds to wait for a server").tag(config=True)
+
+    max_redirects: int = Int(10, help="the most redirects to follow for one URL").tag(config=True)
+
+    headers: dict = Dict(help="extra HTTP headers, e.g. for authorization").tag(config=True)
+
+    _conns = Dict(help="the open connections of each thread, by scheme and host")
+    _semaphore = Any(help="bounds the concurrent downloads of all threads")
+
+    @default("headers")
+    def _default_headers(self):
+        # a custom User-Agent avoids 403 errors with ReadTheDocs
+        return {"User-Agent": "Mozilla/5.0"}
+
+    @default("_semaphore")
+    def _default_semaphore(self):
+        return threading.BoundedSemaphore(max(1, self.max_workers))
+
+    def fetch_all(self, urls_dests):
+        """download many ``(url, dest)`` pairs in a pool of threads"""
+        urls_dests = [*urls_dests]
+        threads = set()
+
+        def _fetch_in_pool(url, dest):
+            threads.add(threading.get_ident())
+            return self.fetch(url, dest)
+
+        try:
+            with ThreadPoolExecutor(max(1, min(self.max_workers, len(urls_dests) or 1))) as pool:
+                futures = [pool.submit(_fetch_in_pool, url, dest) for url, dest in urls_dests]
+        finally:
+            # the threads are done, but would leave their connections open
+            for thread in threads:
+                self.close(thread=thread)
+
+        for future in futures:
+            future.result()
+
+    def fetch(self, url, dest):
+        """download one file, returning whether ``dest`` was changed"""
+        dest = Path(dest)
+        url, expected = split_sha256(url)
+        meta = self.load_meta(dest)
+
+        if dest.exists() and self.is_fresh(dest, meta, expected):
+            self.log.info(f"[lite][fetch] already downloaded {dest.name}, skipping...")
+            return False
+
+        with self._semaphore:
+            try:
+                return self._fetch(url, dest, expected, meta)
+            except Exception:
+                # a connection may be left in the middle of a response
+                self.close()
+                raise
+
+    def is_fresh(self, dest, meta, expected):
+        """whether an existing download can be used without asking the server"""
+        if expected is None:
+            return not self.revalidate
+
+        if meta.get("sha256") != expected:
+            meta["sha256"] = sha256_file(dest)
+            if meta["sha256"] != expected:
+                return False
+            self.save_meta(dest, meta)
+
+        return True
+
+    def _fetch(self, url, dest, expected, meta):
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        part = dest.parent / f"{dest.name}{PART_SUFFIX}"
+        response, offset = self._open(url, dest, part, expected, meta)
+
+        if response.status == HTTPStatus.NOT_MODIFIED:
+            response.read()
+            self.log.info(f"[lite][fetch] {dest.name} is not modified, skipping...")
+            return False
+
+        if offset:
+            self.log.info(f"[lite][fetch] resuming {dest.name} from {offset} bytes")
+        elif response.status != HTTPStatus.OK:
+            response.read()
+            raise urllib.error.HTTPError(
+                url, response.status, response.reason, response.headers, None
+            )
+
+        remote = dict(
+            etag=response.getheader("ETag"),
+            last_modified=response.getheader("Last-Modified"),
+        )
+        self.save_meta(dest, {**meta, "partial": remote})
+        digest = self._write_part(part, response, offset)
+
+        if expected is not None and digest != expected:
+            part.unlink()
+            self.save_meta(dest, {})
+            raise ValueError(
+                f"[lite][fetch] {url} has sha256 {digest}, but {expected} was expected"
+            )
+
+        part.replace(dest)
+
+        if remote["last_modified"]:
+            parsed = email.utils.parsedate_to_datetime(remote["last_modified"])
+            os.utime(dest, (parsed.timestamp(), parsed.timestamp()))
+
+        self.save_meta(dest, dict(url=url, sha256=digest, **remote))
+        self.log.info(f"[lite][fetch] downloaded {dest.name}")
+        return True
+
+    def _open(self, url, dest, part, expected, meta):
+        """request a URL, if changed, resuming from the ``.part`` if possible
+
+        Returns the response, and the offset in the ``.part`` it continues from.
+        """
+        headers = {}
+
+        if dest.exists() and expected is None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        partial = meta.get("partial") or {}
+        validator = partial.get("etag") or partial.get("last_modified")
+        offset = part.stat().st_size if part.exists() and validator else 0
+
+        if offset:
+            headers.update({"Range": f"bytes={offset}-", "If-Range": validator})
+
+        response = self.request(url, headers)
+
+        if offset and not is_range_from(response, offset):
+            # e.g. the file changed, or the ``.part`` was already complete: start over
+            response.read()
+            headers = {k: v for k, v in headers.items() if k not in ["Range", "If-Range"]}
+            offset = 0
+            response = self.request(url, headers)
+
+        return response, offset
+
+    def _write_part(self, part, response, offset):
+        """write a response to the ``.part``, after ``offset``, returning the whole SHA-256"""
+        file_hash = hashlib.sha256()
+
+        if offset:
+            with part.open("rb") as fd:
+                for chunk in iter(lambda: fd.read(HASH_CHUNK_SIZE), b""):
+                    file_hash.update(chunk)
+
+        with part.open("ab" if offset else "wb") as fd:
+            for chunk in iter(lambda: response.read(HASH_CHUNK_SIZE), b""):
+                file_hash.update(chunk)
+                fd.write(chunk)
+
+        return file_hash.hexdigest()
+
+    def request(self, url, headers):
+        """``GET`` a URL, following redirects, on a reused connection
+
+        The configured ``headers``, e.g. ``Authorization``, are only sent to the scheme
+        and host of the first URL, except for the ``User-Agent``.
+        """
+        origin = urllib.parse.urlsplit(url)[:2]
+        anywhere = {k: v for k, v in self.headers.items() if k.lower() == "user-agent"}
+
+        for _ in range(self.max_redirects + 1):
+            parsed = urllib.parse.urlsplit(url)
+            configured = self.headers if parsed[:2] == origin else anywhere
+            all_headers = {**configured, **headers}
+
+            try:
+                response = self._request(parsed, all_headers)
+            except (http.client.HTTPException, ConnectionError):
+                # the server may have closed an idle, reused connection
+                self.close(parsed)
+                response = self._request(parsed, all_headers)
+
+            if response.status not in REDIRECTS:
+                return response
+
+            response.read()
+            url = urllib.parse.urljoin(url, response.getheader("Location"))
+            self.log.debug(f"[lite][fetch] redirected to {url}")
+
+        raise urllib.error.URLError(f"too many redirects for {url}")
+
+    def _request(self, parsed, headers):
+        conn, proxy_headers = self.connection(parsed)
+        target = urllib.parse.urlunsplit(("", "", parsed.path or "/", parsed.query, ""))
+
+        if proxy_headers is not None:
+            # a plain ``http`` proxy is asked for the whole URL
+            target = urllib.parse.urlunsplit((parsed.scheme, parsed.netloc, target, "", ""))
+
+        conn.request("GET", target, headers={**(proxy_headers or {}), **headers})
+        return conn.getresponse()
+
+    def connection(self, parsed):
+        """get this thread's connection to the host of a URL, maybe through a proxy
+
+        Also returns the headers for a plain ``http`` proxy, or ``None`` if not proxied.
+        """
+        conns = self._conns.setdefault(threading.get_ident(), {})
+        key = (parsed.scheme, parsed.netloc)
+
+        if key not in conns:
+            klass = {"http": http.client.HTTPConnection, "https": http.client.HTTPSConnection}
+            if parsed.scheme not in klass:
+                raise urllib.error.URLError(f"unsupported scheme {parsed.scheme}")
+
+            connect = klass[parsed.scheme]
+            proxy = urllib.request.getproxies().get(parsed.scheme)
+            proxy_headers = None
+
+            if proxy and not urllib.request.proxy_bypass(parsed.hostname):
+                proxy_url = urllib.parse.urlsplit(proxy)
+                auth = proxy_auth_headers(proxy_url)
+                if parsed.scheme == "https":
+                    conn = connect(proxy_url.hostname, proxy_url.port, timeout=self.timeout)
+                    conn.set_tunnel(parsed.hostname, parsed.port, headers=auth)
+                else:
+                    # many proxies refuse to tunnel to port 80
+                    conn = http.client.HTTPConnection(
+                        proxy_url.hostname, proxy_url.port, timeout=self.timeout
+                    )
+                    proxy_headers = auth
+            else:
+                conn = connect(parsed.hostname, parsed.port, timeout=self.timeout)
+
+            conns[key] = conn, proxy_headers
+
+        return conns[key]
+
+    def close(self, parsed=None, thread=None):
+        """close a thread's (by default, this thread's) connection to one host, or all"""
+        thread = threading.get_ident() if thread is None else thread
+        conns = self._conns.get(thread, {})
+        keys = [*conns] if parsed is None else [(parsed.scheme, parsed.netloc)]
+
+        for key in keys:
+            conn, _proxy_headers = conns.pop(key, (None, None))
+            if conn is not None:
+                conn.close()
+
+        if not conns:
+            self._conns.pop(thread, None)
+
+    def load_meta(self, dest):
+        """read what is known about a previous download"""
+        meta_path = dest.parent / f"{dest.name}{META_SUFFIX}"
+        try:
+            return codec.read_json(meta_path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save_meta(self, dest, meta):
+        """record what is known about a download"""
+        meta_path = dest.parent / f"{dest.name}{META_SUFFIX}"
+        codec.write_json(meta_path, meta, compact=True)
+
+
+def proxy_auth_headers(proxy_url):
+    """the ``Proxy-Authorization`` for the credentials (if any) of a proxy URL"""
+    if proxy_url.username is None:
+        return {}
+
+    credentials = ":".join(
+        urllib.parse.unquote(part or "") for part in [proxy_url.username, proxy_url.password]
+    )
+    token = base64.b64encode(credentials.encode("utf-8")).decode("ascii")
+    return {"Proxy-Authorization": f"Basic {token}"}
+
+
+def is_range_from(response, offset):
+    """whether a partial response starts where a partial download left off"""
+    if response.status != HTTPStatus.PARTIAL_CONTENT:
+        return False
+    content_range = response.getheader("Content-Range") or ""
+    unit, _, spec = content_range.partition(" ")
+    return unit == "bytes" and spec.split("-")[0] == str(offset)
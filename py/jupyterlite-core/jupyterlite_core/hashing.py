@@ -0,0 +1,127 @@
+"""memoized, concurrent SHA-256 hashing of files"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from traitlets import Any, Dict, Int, default
+from traitlets.config import LoggingConfigurable
+
+from . import codec
+from .constants import UTF8
+from .store import sha256_file
+from .trait_types import CPath
+
+#: bump to forget all previously-memoized digests
+HASH_CACHE_VERSION = 1
+
+
+def file_stamp(path_stat):
+    """the parts of a ``stat`` which change when a file's content may have changed
+
+    The ``ctime`` can't be set by other tools, so catches a file which was replaced, with
+    the same size and (clamped) ``mtime``, that happens to get a reused inode.
+    """
+    return [
+        path_stat.st_size,
+        path_stat.st_mtime_ns,
+        path_stat.st_ino,
+        path_stat.st_ctime_ns,
+    ]
+
+
+class LiteHasher(LoggingConfigurable):
+    """the SHA-256 of files, read in chunks, in a pool of threads, and remembered
+
+    A digest is kept, in memory and in ``cache_path``, with the ``size``, ``mtime``,
+    ``inode`` and ``ctime`` of the file it was computed from, and reused until any
+    of them change. ``hashlib`` releases the GIL while hashing large chunks, so
+    threads hash many files at the same time.
+    """
+
+    cache_path: Path = CPath(help="where to remember the digests of files").tag(config=True)
+
+    max_workers: int = Int(
+        0, help="the most files to hash at the same time, or 0 for one per CPU, plus 4"
+    ).tag(config=True)
+
+    _digests = Dict(help="the stamp and digest of each hashed file, by absolute path")
+    _dirty = Any(help="whether any digests have changed since they were loaded")
+    _lock = Any(help="a lock held while changing digests, as tasks may run in threads")
+
+    @default("cache_path")
+    def _default_cache_path(self):
+        return Path(self.parent.cache_dir) / "hashes.json"
+
+    @default("_digests")
+    def _default_digests(self):
+        try:
+            cached = codec.read_json(self.cache_path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+        if cached.get("version") != HASH_CACHE_VERSION:
+            return {}
+
+        return cached.get("digests") or {}
+
+    @default("_dirty")
+    def _default_dirty(self):
+        return False
+
+    @default("_lock")
+    def _default_lock(self):
+        return threading.RLock()
+
+    def sha256(self, path):
+        """get the SHA-256 hex digest of one file"""
+        return self._sha256(path)
+
+    def sha256_all(self, paths):
+        """get the SHA-256 hex digests of many files, by path"""
+        paths = [*paths]
+        workers = self.max_workers or None
+
+        with ThreadPoolExecutor(workers) as pool:
+            return dict(zip(paths, pool.map(self._sha256, paths), strict=True))
+
+    def save(self):
+        """write the digests, if any changed, forgetting those of files which are gone
+
+        The manager saves once, at the end of each run.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            self._digests = {
+                path: stamped for path, stamped in self._digests.items() if os.path.exists(path)
+            }
+            cached = dict(version=HASH_CACHE_VERSION, digests=self._digests)
+            text = codec.dumps(cached, compact=True)
+            self._dirty = False
+
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_name = f"{self.cache_path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp_path = self.cache_path.parent / tmp_name
+        tmp_path.write_text(text, **UTF8)
+        tmp_path.replace(self.cache_path)
+
+    def _sha256(self, path):
+        key = os.path.abspath(path)
+        stamp = file_stamp(os.stat(key))
+
+        with self._lock:
+            cached = self._digests.get(key)
+
+        if cached and cached[:-1] == stamp:
+            return cached[-1]
+
+        digest = sha256_file(key)
+
+        with self._lock:
+            self._digests[key] = [*stamp, digest]
+            self._dirty = True
+
+        return digest
@@ -0,0 +1,307 @@
+"""a built-in generator of Jupyter Contents API listings"""
+
+import datetime as dt
+import fnmatch
+import functools
+import hashlib
+import math
+import mimetypes
+import os
+import re
+import stat
+from pathlib import Path
+
+from jupyter_core.paths import is_file_hidden
+from traitlets import Bool, Int, List, Unicode, default
+from traitlets.config import LoggingConfigurable
+
+from . import codec
+from .constants import ALL_JSON_PAGE
+
+#: the ``hide_globs`` of ``jupyter_server``'s ``ContentsManager``
+DEFAULT_HIDE_GLOBS = ["__pycache__", "*.pyc", "*.pyo", ".DS_Store", "*~"]
+
+#: the ``jupyter_server`` classes which may configure the ``allow_hidden`` and ``hide_globs``
+CONTENTS_MANAGER_CLASSES = ["ContentsManager", "FileContentsManager"]
+
+#: the names of the pages of a listing
+ALL_JSON_PAGE_RE = re.compile(r"^all\.\d+\.json$")
+
+#: a time which can't be represented, e.g. as it is too far in the future
+EPOCH = dt.datetime(1970, 1, 1, tzinfo=dt.timezone.utc)
+
+
+class LiteContentsIndexer(LoggingConfigurable):
+    """write the Contents API ``all.json`` of one folder at a time
+
+    Each folder is listed once, with ``os.scandir``. The listings have the same fields and
+    values as those of ``jupyter_server``'s ``FileContentsManager``, with the children
+    sorted by name, and times after a ``source_date_epoch`` clamped to it. By default,
+    ``allow_hidden`` and ``hide_globs`` are read from any ``ContentsManager`` or
+    ``FileContentsManager`` configuration.
+
+    With a ``page_size``, the listing of a larger folder is split into pages, with an
+    ``all.json`` of the number of children, and the URL, size, and first and last names of
+    each page, so a browser can find one child without fetching every page.
+    """
+
+    allow_hidden: bool = Bool(help="whether to list hidden files and folders").tag(config=True)
+
+    hide_globs: list[str] = List(
+        Unicode(), help="glob patterns of file and folder names to leave out of listings"
+    ).tag(config=True)
+
+    page_size: int = Int(
+        0,
+        help=(
+            "the most children in one listing, above which a folder's listing is written"
+            " as pages, or 0 to always write one all.json"
+        ),
+    ).tag(config=True)
+
+    @default("allow_hidden")
+    def _default_allow_hidden(self):
+        return bool(self._contents_manager_config("allow_hidden", False))
+
+    @default("hide_globs")
+    def _default_hide_globs(self):
+        return [*self._contents_manager_config("hide_globs", DEFAULT_HIDE_GLOBS)]
+
+    def write_listing(self, folder, rel, api_path, source_date_epoch=None):
+        """write the listing of one folder, returning its (hidden) subfolders
+
+        A folder with any hidden subfolders is not written, as it can't be fully indexed.
+        """
+        listing, subfolders, hidden = self.listing(folder, rel, source_date_epoch)
+        if hidden:
+            return subfolders, hidden
+        api_path = Path(api_path)
+        api_path.parent.mkdir(parents=True, exist_ok=True)
+        self.write_pages(api_path, listing)
+        return subfolders, hidden
+
+    def write_pages(self, api_path, listing):
+        """write a listing as an ``all.json``, and any pages, removing any stale pages"""
+        head, pages = self.paginate(listing)
+
+        for stale in {*self.outputs(api_path)} - {api_path, *(api_path.parent / p for p in pages)}:
+            stale.unlink()
+        for name, page in pages.items():
+            codec.write_json(api_path.parent / name, page, compact=True)
+
+        codec.write_json(api_path, head, compact=bool(pages))
+
+    def read_pages(self, api_path):
+        """read an ``all.json``, with the ``content`` of any pages, as ``paginate`` undoes"""
+        api_path = Path(api_path)
+        head = codec.read_json(api_path)
+
+        if head.get("pages") is None:
+            return head
+
+        content = []
+        for page in head["pages"]:
+            content += codec.read_json(api_path.parent / page["url"])["content"]
+
+        listing = {k: v for k, v in head.items() if k not in {"count", "pages"}}
+        listing.update(content=content, format="json")
+        return listing
+
+    def paginate(self, listing):
+        """split the ``content`` of a listing into pages, if it has more than ``page_size``
+
+        Returns the listing to write as ``all.json``, and the pages, by file name.
+        """
+        content = listing["content"]
+        size = self.page_size
+
+        if not size or len(content) <= size:
+            return listing, {}
+
+        pages = {}
+        head_pages = []
+
+        for start in range(0, len(content), size):
+            page = content[start : start + size]
+            name = ALL_JSON_PAGE.format(len(pages))
+            pages[name] = dict(content=page)
+            head_pages += [
+                dict(url=name, count=len(page), first=page[0]["name"], last=page[-1]["name"])
+            ]
+
+        head = {**listing, "content": None, "format": None}
+        head.update(count=len(content), pages=head_pages)
+        return head, pages
+
+    def outputs(self, api_path):
+        """get the ``all.json`` of a folder, and any of its pages"""
+        api_path = Path(api_path)
+        try:
+            with os.scandir(api_path.parent) as entries:
+                pages = sorted(
+                    e.path
+                    for e in entries
+                    if ALL_JSON_PAGE_RE.match(e.name) and e.is_file(follow_symlinks=False)
+                )
+        except FileNotFoundError:
+            pages = []
+        return [api_path, *map(Path, pages)]
+
+    def listing(self, folder, rel, source_date_epoch=None):
+        """get the Contents API model of one folder, and its (hidden) subfolders
+
+        ``rel`` is the POSIX path of the folder, relative to the root, or ``""``.
+        """
+        model = self.model(folder, rel, os.lstat(folder), "directory", source_date_epoch)
+        content = []
+        subfolders = []
+        hidden = []
+        should_list = self._should_list
+
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                child_rel = f"{rel}/{entry.name}" if rel else entry.name
+                child = self._child_model(entry, child_rel, source_date_epoch)
+
+                if child is None:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    if child is False:
+                        hidden.append(child_rel)
+                        continue
+                    subfolders.append(child_rel)
+                if child and should_list(entry.name):
+                    content.append(child)
+
+        model.update(content=sorted(content, key=_by_name), format="json")
+        return model, subfolders, hidden
+
+    def digest(self, folder_stat, children, source_date_epoch=None):
+        """get a digest of everything the listing of a folder depends on
+
+        ``children`` is the ``stat`` of each thing directly in the folder, by name, e.g.
+        from a ``LiteSnapshot``, so a folder's listing only changes with its own children.
+        """
+        config = [self.allow_hidden, self.hide_globs, self.page_size, source_date_epoch]
+        hasher = hashlib.blake2b(codec.dumps(config, compact=True).encode("utf-8"))
+
+        for name, path_stat in [("", folder_stat), *sorted(children.items())]:
+            key = f"{name}\0{stat_key(path_stat, source_date_epoch)}\n"
+            hasher.update(key.encode("utf-8", "surrogateescape"))
+
+        return hasher.hexdigest()
+
+    def is_hidden(self, path, path_stat=None):
+        """whether a path should be left out of listings, as it is hidden"""
+        return not self.allow_hidden and is_file_hidden(str(path), stat_res=path_stat)
+
+    def model(self, path, rel, path_stat, content_type, source_date_epoch=None):
+        """get the Contents API model of one path, without its content"""
+        size = None if content_type == "directory" else path_stat.st_size
+        mimetype = guess_mimetype(rel.rsplit("/", 1)[-1]) if content_type == "file" else None
+        try:
+            writable = os.access(path, os.W_OK)
+        except OSError:  # pragma: no cover
+            writable = False
+
+        return {
+            "name": rel.rsplit("/", 1)[-1],
+            "path": rel,
+            "last_modified": format_time(path_stat.st_mtime, source_date_epoch),
+            "created": format_time(created_time(path_stat), source_date_epoch),
+            "content": None,
+            "format": None,
+            "mimetype": mimetype,
+            "size": size,
+            "writable": writable,
+            "hash": None,
+            "hash_algorithm": None,
+            "type": content_type,
+        }
+
+    def _child_model(self, entry, rel, source_date_epoch):
+        """get the model of a child, ``None`` if it can't be listed, or ``False`` if hidden"""
+        try:
+            entry_stat = entry.stat(follow_symlinks=False)
+            mode = entry_stat.st_mode
+            if not (stat.S_ISLNK(mode) or stat.S_ISREG(mode) or stat.S_ISDIR(mode)):
+                return None
+            if self.is_hidden(entry.path, entry_stat):
+                return False
+            if entry.is_dir():
+                content_type = "directory"
+            elif not entry.is_file():
+                # a broken link
+                return None
+            elif entry.name.endswith(".ipynb"):
+                content_type = "notebook"
+            else:
+                content_type = "file"
+        except OSError:
+            return None
+
+        return self.model(entry.path, rel, entry_stat, content_type, source_date_epoch)
+
+    @functools.cached_property
+    def _should_list(self):
+        """whether a name is not matched by any of the ``hide_globs``"""
+        if not self.hide_globs:
+            return lambda name: True
+        globs = [fnmatch.translate(os.path.normcase(glob)) for glob in self.hide_globs]
+        hide = re.compile("|".join(globs))
+        return lambda name: hide.match(os.path.normcase(name)) is None
+
+    def _contents_manager_config(self, name, fallback):
+        value = fallback
+        for klass in CONTENTS_MANAGER_CLASSES:
+            if klass in self.config and name in self.config[klass]:
+                value = self.config[klass][name]
+        return value
+
+
+def _by_name(model):
+    return model["name"]
+
+
+def created_time(path_stat):
+    """get the time a file was created, if known, or its ``ctime``, as ``jupyter_server``"""
+    birthtime = getattr(path_stat, "st_birthtime", None)
+    if isinstance(birthtime, int | float) and birthtime >= 0 and math.isfinite(birthtime):
+        return birthtime
+    return path_stat.st_ctime
+
+
+def stat_key(path_stat, source_date_epoch=None):
+    """get the parts of a ``stat`` which are shown in a listing, with clamped times"""
+    mode = path_stat.st_mode
+    size = None if stat.S_ISDIR(mode) else path_stat.st_size
+    times = [path_stat.st_mtime, created_time(path_stat)]
+    if source_date_epoch is not None:
+        times = [min(time, source_date_epoch) for time in times]
+    return f"{stat.S_IFMT(mode)} {stat.S_IMODE(mode):o} {size} {times[0]!r} {times[1]!r}"
+
+
+@functools.lru_cache(4096)
+def format_time(timestamp, source_date_epoch=None):
+    """get an ISO 8601 UTC time, clamped to a ``source_date_epoch``, ending with ``Z``"""
+    if source_date_epoch is not None and timestamp > source_date_epoch:
+        timestamp = source_date_epoch
+    try:
+        value = dt.datetime.fromtimestamp(timestamp, dt.timezone.utc)
+    except (ValueError, OverflowError, OSError):  # pragma: no cover
+        value = EPOCH
+    return value.isoformat().replace("+00:00", "Z")
+
+
+def guess_mimetype(name):
+    """guess the MIME type of a file name, as ``mimetypes``, but only once per extension"""
+    parts = name.split(".")
+    # only the last two extensions are used, e.g. ``.tar.gz``
+    if len(parts) > 3 and parts[0]:  # noqa: PLR2004
+        name = f"_.{'.'.join(parts[-3:])}"
+    return _guess_mimetype(name)
+
+
+@functools.lru_cache(4096)
+def _guess_mimetype(name):
+    return mimetypes.guess_type(f"/{name}")[0]
@@ -0,0 +1,95 @@
+"""copy files as links, or copy-on-write clones, where the filesystem allows"""
+
+import errno
+import os
+import shutil
+import sys
+import threading
+
+#: the Linux ``ioctl`` to share the blocks of one file with another
+FICLONE = 0x40049409
+
+#: the errors which mean a linker will never work between two devices
+UNSUPPORTED_ERRNOS = {
+    errno.EXDEV,
+    errno.EOPNOTSUPP,
+    errno.ENOTSUP,
+    errno.ENOTTY,
+    errno.EINVAL,
+    errno.ENOSYS,
+}
+
+#: the (linker, source device, destination device) which have already failed
+_UNSUPPORTED = set()
+_UNSUPPORTED_LOCK = threading.Lock()
+
+
+def reflink(src, dest):
+    """clone a file, sharing its blocks until either is changed, or raise ``OSError``"""
+    if sys.platform == "darwin":  # pragma: no cover
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if libc.clonefile(os.fsencode(src), os.fsencode(dest), 0):
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), str(dest))
+        return
+
+    if not sys.platform.startswith("linux"):  # pragma: no cover
+        raise OSError(errno.EOPNOTSUPP, "reflinks are not supported", str(dest))
+
+    import fcntl
+
+    with open(src, "rb") as src_fd, open(dest, "xb") as dest_fd:
+        try:
+            fcntl.ioctl(dest_fd.fileno(), FICLONE, src_fd.fileno())
+        except OSError as err:
+            error = err
+        else:
+            return
+
+    os.unlink(dest)
+    raise error
+
+
+#: the functions which may make a destination file share its source's content
+LINKERS = {
+    "reflink": reflink,
+    "hardlink": os.link,
+    "symlink": lambda src, dest: os.symlink(os.path.abspath(src), dest),
+}
+
+#: the linkers to try, in order, for each of the ``COPY_MODES``, before copying
+MODE_LINKERS = {
+    "copy": [],
+    "reflink": ["reflink"],
+    "hardlink": ["hardlink"],
+    "symlink": ["symlink"],
+    "auto": ["reflink", "hardlink"],
+}
+
+
+def copy_file(src, dest, mode="copy"):
+    """copy one file, preferring the linkers of a ``copy_mode``, returning what was done"""
+    devices = None
+
+    for linker in MODE_LINKERS[mode]:
+        if devices is None:
+            devices = os.stat(src).st_dev, os.stat(os.path.dirname(os.path.abspath(dest))).st_dev
+        if (linker, *devices) in _UNSUPPORTED:
+            continue
+        try:
+            LINKERS[linker](src, dest)
+        except OSError as err:
+            if err.errno in UNSUPPORTED_ERRNOS:
+                # e.g. a different filesystem, or unsupported by this one
+                with _UNSUPPORTED_LOCK:
+                    _UNSUPPORTED.add((linker, *devices))
+            continue
+        if linker == "reflink":
+            shutil.copystat(src, dest)
+        return linker
+
+    shutil.copy2(src, dest)
+    return "copy"
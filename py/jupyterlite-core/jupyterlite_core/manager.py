@@ -1,13 +1,37 @@
 """Manager for JupyterLite"""
 
+import json
+import os
+import threading
 from logging import getLogger
+from pathlib import Path
 
 import doit
-from traitlets import Bool, Dict, Unicode, default
+from traitlets import Any, Bool, Dict, Instance, List, Unicode, default
 
+from . import codec
 from .addons import get_addon_implementations
+from .build_cache import META_BUILD_CACHE, get_build_cache
 from .config import LiteBuildConfig
-from .constants import HOOK_PARENTS, HOOKS, PHASES
+from .constants import (
+    DOIT_BACKENDS,
+    HOOK_PARENTS,
+    HOOKS,
+    JUPYTER_CONFIG_DATA,
+    PHASES,
+    UTF8,
+)
+from .dependency import LiteFileChecker
+from .download import LiteDownloader
+from .hashing import LiteHasher
+from .profiler import LiteProfiler
+from .scanner import LiteContentsScanner
+from .snapshot import LiteSnapshot
+from .store import LiteObjectStore
+from .timestamps import LiteTimestamps
+
+#: the ``meta`` key of a task which must run after the other tasks of its hook phase
+META_PHASE_END = "phase_end"
 
 
 class LiteManager(LiteBuildConfig):
@@ -28,10 +52,44 @@ class LiteManager(LiteBuildConfig):
 
     parsed_extra_args = Dict(help="extra CLI args unused by the ``LiteManager``")
 
+    config_lock = Any(
+        help=(
+            "a lock to hold while reading, modifying and writing a shared file, "
+            "e.g. ``jupyter-lite.json``, as tasks may run concurrently with ``--jobs``"
+        )
+    )
+
+    object_store = Instance(
+        LiteObjectStore, help="a content-addressed store of files shared between builds"
+    )
+
+    snapshot = Instance(
+        LiteSnapshot, help="an index of files and folders, reset before each hook phase"
+    )
+
+    downloader = Instance(
+        LiteDownloader, help="downloads remote files, with a bounded pool of connections"
+    )
+
+    hasher = Instance(LiteHasher, help="memoizes the SHA-256 of files, shared by addons")
+
+    contents_scanner = Instance(
+        LiteContentsScanner, help="the files of the contents, scanned once per run"
+    )
+
+    timestamps = Instance(
+        LiteTimestamps,
+        help="the paths changed during a hook phase, to clamp to ``source_date_epoch``",
+    )
+
     # "private" traits (at least not configurable)
     _addons = Dict(help="""concrete addons that have named iterable methods of doit tasks""")
     _doit_config = Dict(help="the DOIT_CONFIG for tasks")
     _doit_tasks = Dict(help="the doit task generators")
+    _config_patches = List(help="config patches submitted during the current hook phase")
+    _profiler = Any(help="a LiteProfiler, if profiling, with --profile", allow_none=True)
+    _generated_tasks = Dict(help="the most recently generated tasks of each hook phase")
+    _build_cache = Any(help="a LiteBuildCache, with --build-cache", allow_none=True)
 
     def initialize(self):
         """perform one-time inialization of the manager"""
@@ -42,12 +100,83 @@ class LiteManager(LiteBuildConfig):
         tasks = self._doit_tasks
         self.log.debug(f"[lite] [tasks] ... OK {len(tasks)} tasks")
 
-    def doit_run(self, task, *args, raw=False):
-        """run a subset of the doit command line"""
-        loader = doit.cmd_base.ModuleTaskLoader(self._doit_tasks)
-        config = dict(GLOBAL=self._doit_config)
+    def doit_run(self, task, *args, raw=False, tasks=None):
+        """run a subset of the doit command line, optionally with other task generators"""
+        loader = doit.cmd_base.ModuleTaskLoader(self._doit_tasks if tasks is None else tasks)
+        config = dict(GLOBAL=self._doit_config, BACKEND=DOIT_BACKENDS)
         runner = doit.doit_cmd.DoitMain(task_loader=loader, extra_config=config)
-        return runner.run([task, *args])
+        # contents may have been added or removed since any previous run
+        self.contents_scanner.reset()
+        try:
+            result = runner.run([task, *args])
+        finally:
+            self.hasher.save()
+            # no task is using the objects any more
+            self.object_store.evict()
+
+        if self._profiler and self._profiler.events:
+            self.write_profile(task)
+
+        return result
+
+    def write_profile(self, task):
+        """write out, and reset, the events recorded while running a task"""
+        stem = task
+        for phase in PHASES:
+            if phase and stem.startswith(phase):
+                stem = stem[len(phase) :]
+                break
+
+        trace_json, summary_txt = self._profiler.write(self.profile_dir, stem)
+        self._profiler = LiteProfiler()
+        self.log.info(f"[lite] [profile] wrote {trace_json}")
+        self.log.info(f"[lite] [profile] wrote {summary_txt}")
+
+    @property
+    def shard_cache_dir(self):
+        """the part of the ``cache_dir`` only used by one shard, as shards may run at once"""
+        if self.shard_count > 1:
+            return self.cache_dir / f"shard-{self.shard_index}"
+        return self.cache_dir
+
+    @default("config_lock")
+    def _default_config_lock(self):
+        return threading.RLock()
+
+    @default("_build_cache")
+    def _default_build_cache(self):
+        if not self.build_cache:
+            return None
+        roots = dict(output_dir=self.output_dir, cache_dir=self.cache_dir, lite_dir=self.lite_dir)
+        return get_build_cache(self.build_cache, parent=self, roots=roots)
+
+    @default("object_store")
+    def _default_object_store(self):
+        return LiteObjectStore(parent=self)
+
+    @default("snapshot")
+    def _default_snapshot(self):
+        return LiteSnapshot(parent=self)
+
+    @default("downloader")
+    def _default_downloader(self):
+        return LiteDownloader(parent=self)
+
+    @default("hasher")
+    def _default_hasher(self):
+        return LiteHasher(parent=self)
+
+    @default("contents_scanner")
+    def _default_contents_scanner(self):
+        return LiteContentsScanner(parent=self)
+
+    @default("timestamps")
+    def _default_timestamps(self):
+        return LiteTimestamps(parent=self)
+
+    @default("_profiler")
+    def _default_profiler(self):
+        return LiteProfiler() if self.profile else None
 
     @default("log")
     def _default_log(self):
@@ -90,13 +219,30 @@ class LiteManager(LiteBuildConfig):
 
     @default("_doit_config")
     def _default_doit_config(self):
-        """our hardcoded ``DOIT_CONFIG``"""
-        return {
+        """our hardcoded ``DOIT_CONFIG``
+
+        With more than one of ``jobs``, independent tasks are run in threads: the
+        ``process`` parallel type would require every task, including its actions,
+        to be picklable, and would lose any state shared with the manager.
+        """
+        config = {
             "dep_file": ".jupyterlite.doit.db",
-            "backend": "sqlite3",
+            "backend": "lite",
+            "check_file_uptodate": LiteFileChecker,
             "verbosity": 2,
         }
 
+        if self.shard_count > 1:
+            # the shards of a build may run at the same time, in the same folder
+            config["dep_file"] = f".jupyterlite.doit.shard-{self.shard_index}.db"
+
+        jobs = self.jobs or os.cpu_count() or 1
+
+        if jobs > 1:
+            config.update(num_process=jobs, par_type="thread")
+
+        return config
+
     @default("_doit_tasks")
     def _default_doit_tasks(self):
         """initialize the doit task generators"""
@@ -113,22 +259,143 @@ class LiteManager(LiteBuildConfig):
 
         return tasks
 
+    def patch_config(self, path, name, patch, file_dep=None, config=None):
+        """submit a ``patch`` to a JSON config file, e.g. ``jupyter-lite.json``
+
+        This may only be called while an addon is yielding its tasks. ``patch`` will
+        be called with the parsed JSON object, and should update it in-place. All of
+        the patches to a ``path`` submitted during a hook phase are applied in order,
+        in memory, by a single task which runs after all of the other tasks of the
+        phase, and only writes ``path`` if its content changed.
+
+        ``file_dep`` are any files read by ``patch``, and ``config`` is any JSON-able
+        value which, when changed, should cause the patches to be re-applied.
+        """
+        self._config_patches.append(
+            dict(
+                path=Path(path),
+                name=name,
+                patch=patch,
+                file_dep=[*(file_dep or [])],
+                config=config,
+            )
+        )
+
+    def apply_config_patches(self, path, patches):
+        """apply some patches to a JSON config file, writing it only if changed"""
+        with self.config_lock:
+            try:
+                old_text = path.read_text(**UTF8)
+                config = codec.loads(old_text)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self.log.debug(f"[lite] [config] Initializing {path}")
+                old_text = None
+                config = {JUPYTER_CONFIG_DATA: {}}
+
+            for patch in patches:
+                self.log.debug(f"[lite] [config] {path.name} <- {patch['name']}")
+                patch["patch"](config)
+
+            new_text = codec.dumps(config)
+
+            if new_text == old_text:
+                self.log.debug(f"[lite] [config] {path} is unchanged")
+                return
+
+            # replace, rather than modify, as the file may be linked from the object store
+            tmp_path = path.parent / f"{path.name}.{os.getpid()}.tmp"
+            tmp_path.write_text(new_text, **UTF8)
+            tmp_path.replace(path)
+
+            if self.source_date_epoch is not None:
+                # clamped by the ``timestamp`` task after this one, with the folder,
+                # as renaming the temporary file changed its time, too
+                self.timestamps.touch(path)
+                self.timestamps.touch(path.parent, recursive=False)
+
+    def _config_patch_tasks(self, task_dep):
+        """yield a task per path to apply all of the patches submitted during a phase"""
+        patches = {}
+
+        for patch in self._config_patches:
+            patches.setdefault(patch["path"], []).append(patch)
+
+        self._config_patches = []
+
+        for path, path_patches in sorted(patches.items()):
+            try:
+                stem = path.relative_to(self.output_dir).as_posix()
+            except ValueError:
+                stem = path.as_posix()
+
+            file_dep = {path}
+            for patch in path_patches:
+                file_dep.update(patch["file_dep"])
+            config = {patch["name"]: patch["config"] for patch in path_patches}
+
+            yield dict(
+                name=f"{self.task_prefix}config:{stem}",
+                doc=f"apply {len(path_patches)} patches to {stem}",
+                file_dep=sorted(file_dep),
+                task_dep=task_dep,
+                uptodate=[doit.tools.config_changed(config)],
+                actions=[(self.apply_config_patches, [path, path_patches])],
+            )
+
+    def _phase_end_tasks(self, attr, task_dep):
+        """yield the tasks which run after all of the addon tasks of a phase
+
+        These are marked with ``META_PHASE_END``, as even a partial build must run them.
+        """
+        config_task_dep = []
+        meta = {META_PHASE_END: True}
+
+        for task in self._config_patch_tasks(task_dep):
+            config_task_dep += [f"""{self.task_prefix}{attr}:{task["name"]}"""]
+            yield self._finish_task(attr, {**task, "meta": meta})
+
+        if self.source_date_epoch is not None:
+            task = self._timestamp_task(attr, [*task_dep, *config_task_dep])
+            yield self._finish_task(attr, {**task, "meta": meta})
+
+    def _timestamp_task(self, attr, task_dep):
+        """a task to clamp all of the paths touched by the other tasks of a phase"""
+        return dict(
+            name=f"{self.task_prefix}timestamp:{attr}",
+            doc=f"clamp the times of files changed during {attr} to the source date epoch",
+            task_dep=task_dep,
+            uptodate=[self.timestamps.is_empty],
+            actions=[(self.clamp_timestamps, [])],
+        )
+
+    def clamp_timestamps(self):
+        """clamp the times of all touched paths to ``source_date_epoch``, in one pass"""
+        self.timestamps.clamp(self.source_date_epoch)
+
     def _gather_tasks(self, attr, prev_attr):
         """early up-front ``doit`` work"""
 
         def _gather():
+            # discard patches left behind by any incompletely-gathered phase
+            self._config_patches = []
+            # the actions of previous phases may have changed any file
+            self.snapshot.reset()
+            task_dep = []
+            self._generated_tasks[attr] = []
+
             for name, addon in self._addons.items():
                 if attr in addon.__all__:
                     try:
-                        for task in getattr(addon, attr)(self):
-                            patched_task = {**task}
-                            patched_task["name"] = f"""{self.task_prefix}{name}:{task["name"]}"""
-                            yield patched_task
+                        for task in self._addon_tasks(attr, name, addon):
+                            task_dep += [f"""{self.task_prefix}{attr}:{task["name"]}"""]
+                            yield self._finish_task(attr, task)
                     except Exception as error:
                         self.log.error(f"[lite] [{attr}] [{name}] [ERR] {error}")
                         if self.strict:
                             raise error
 
+            yield from self._phase_end_tasks(attr, task_dep)
+
         if not prev_attr:
             return _gather
 
@@ -138,6 +405,29 @@ class LiteManager(LiteBuildConfig):
 
         return _delayed_gather
 
+    def _addon_tasks(self, attr, name, addon):
+        """yield the named tasks of one addon for a hook phase"""
+        # a hook may only submit config patches, and yield no tasks
+        tasks = getattr(addon, attr)(self) or []
+
+        if self._profiler:
+            tasks = self._profiler.iter_tasks(f"{attr}:{name}", tasks)
+
+        for task in tasks:
+            patched_task = {**task}
+            patched_task["name"] = f"""{self.task_prefix}{name}:{task["name"]}"""
+            yield patched_task
+
+    def _finish_task(self, attr, task):
+        """maybe cache and time the actions of a task, and keep a copy of it"""
+        if self._build_cache and META_BUILD_CACHE in (task.get("meta") or {}):
+            task = self._build_cache.wrap_task(task)
+        if self._profiler:
+            task = self._profiler.wrap_task(task, f"""{self.task_prefix}{attr}:{task["name"]}""")
+        # ``doit`` changes the ``name`` of the yielded ``dict``
+        self._generated_tasks[attr].append({**task})
+        return task
+
     def _is_sys_prefix_ignored(self, addon):
         ignore = self.ignore_sys_prefix
         return addon in ignore if isinstance(ignore, tuple) else ignore
@@ -0,0 +1,249 @@
+"""estimate what a JupyterLite build would do, without running any actions"""
+
+import functools
+import os
+from pathlib import Path
+
+import doit
+from doit.dependency import Dependency
+from traitlets import Bool, Enum, Instance, Unicode
+from traitlets.config import LoggingConfigurable
+
+from . import codec
+from .constants import HOOK_PARENTS, HOOKS, PHASES, UTF8
+from .dependency import LiteDependencyStore
+from .manager import LiteManager
+
+#: the reason a task is stale because another stale task writes one of its ``file_dep``
+REASON_UPSTREAM = "upstream_target"
+
+#: the ``meta`` key of a task which lists the entries of a folder, e.g. a contents listing
+META_LISTING = "listing"
+
+#: the ``doit`` reasons which are lists of paths
+PATH_REASONS = [
+    "added_file_dep",
+    "changed_file_dep",
+    "missing_file_dep",
+    "missing_target",
+    "removed_file_dep",
+    REASON_UPSTREAM,
+]
+
+#: the number of paths to print for each reason
+SHOWN_PATHS = 3
+
+
+class LitePlanner(LoggingConfigurable):
+    """list the tasks of a hook which are out-of-date, why, and the bytes they would move
+
+    The tasks of each hook phase are generated in order, as ``doit`` would, against
+    the files currently on disk, and their status is checked against the dependency
+    store, without running any actions. As a stale task may change its ``targets``,
+    a task which depends on them is also stale, even if they are not written yet. A task
+    which only lists a folder, named in its ``meta={"listing": ...}``, is stale when a
+    stale task would add, or change, one of the entries of that folder.
+
+    The bytes a task would read are the size of its existing ``file_dep``. The bytes
+    it would write are estimated from the size of its existing ``targets`` and, for
+    targets which don't exist yet, from the bytes it would read.
+    """
+
+    manager: LiteManager = Instance(LiteManager)
+
+    hook: str = Enum(HOOKS, "build", help="the hook to plan, with the hooks it needs").tag(
+        config=True
+    )
+
+    json: bool = Bool(False, help="print the plan as JSON, rather than as text").tag(config=True)
+
+    output: str = Unicode("", help="a file to also write the JSON plan to").tag(config=True)
+
+    def run(self):
+        """plan a hook, and report it"""
+        plan = self.plan()
+        text = codec.dumps(plan)
+
+        if self.output:
+            Path(self.output).write_text(text, **UTF8)
+
+        if self.json:
+            print(text)
+        else:
+            self.print_plan(plan)
+
+        return 0
+
+    def plan(self):
+        """get the status of every task of a hook, and the hooks before it"""
+        doit_config = self.manager._doit_config
+        dep_manager = Dependency(
+            # don't create, or change, the state of the next build
+            functools.partial(LiteDependencyStore, read_only=True),
+            doit_config["dep_file"],
+            checker_cls=doit_config["check_file_uptodate"],
+        )
+        stale_targets = set()
+        tasks = []
+
+        for attr in self.ordered_attrs():
+            for task in self.phase_tasks(attr):
+                planned = self.plan_task(dep_manager, task, stale_targets)
+                planned.update(hook=attr)
+                tasks.append(planned)
+
+        stale = [task for task in tasks if task["status"] != "up-to-date"]
+
+        return dict(
+            hook=self.hook,
+            summary=dict(
+                tasks=len(tasks),
+                stale=len(stale),
+                errors=sum(1 for task in tasks if task["status"] == "error"),
+                read=sum(task["read"] for task in stale),
+                write=sum(task["write"] for task in stale),
+            ),
+            tasks=tasks,
+        )
+
+    def ordered_attrs(self):
+        """the hook phases ``doit`` would run for the hook, in order"""
+        hooks = [self.hook]
+
+        while hooks[0] in HOOK_PARENTS:
+            hooks.insert(0, HOOK_PARENTS[hooks[0]])
+
+        return [f"{phase}{hook}" for hook in hooks for phase in PHASES]
+
+    def phase_tasks(self, attr):
+        """generate the ``doit`` tasks of one hook phase, with actions, but not run them"""
+        basename = f"{self.manager.task_prefix}{attr}"
+        generator = self.manager._doit_tasks[f"task_{basename}"]
+        tasks = doit.loader.generate_tasks(basename, generator(), generator.__doc__)
+        # the group task only depends on the others
+        return [task for task in tasks if task.actions]
+
+    def plan_task(self, dep_manager, task, stale_targets):
+        """get the status of one task, and the bytes it would read and write"""
+        status = dep_manager.get_status(task, {}, get_log=True)
+        reasons = dict(status.reasons)
+        file_dep = [os.path.abspath(dep) for dep in sorted(task.file_dep)]
+        upstream = [dep for dep in file_dep if dep in stale_targets]
+        listing = (task.meta or {}).get(META_LISTING)
+
+        if listing is not None:
+            upstream += _changed_entries(os.path.abspath(listing), stale_targets)
+        state = status.status
+
+        if upstream:
+            reasons[REASON_UPSTREAM] = upstream
+            missing = [os.path.abspath(dep) for dep in reasons.get("missing_file_dep", [])]
+            if state == "error" and set(missing) <= stale_targets:
+                # will be written before this task runs
+                reasons.pop("missing_file_dep")
+            if "missing_file_dep" not in reasons:
+                state = "run"
+
+        read = sum(os.stat(dep).st_size for dep in file_dep if os.path.isfile(dep))
+        write = 0
+        missing_targets = 0
+
+        for target in map(os.path.abspath, task.targets):
+            if os.path.exists(target):
+                write += _path_size(target)
+            else:
+                missing_targets += 1
+
+        if missing_targets:
+            write += read * missing_targets // len(task.targets)
+
+        if state != "up-to-date":
+            stale_targets.update(os.path.abspath(target) for target in task.targets)
+
+        return dict(
+            name=task.name,
+            status=state,
+            reasons=self.serialize_reasons(reasons),
+            read=read,
+            write=write,
+        )
+
+    def serialize_reasons(self, reasons):
+        """make ``doit`` status reasons JSON-compatible"""
+        serialized = {}
+
+        for reason, raw in sorted(reasons.items()):
+            if reason in PATH_REASONS:
+                value = sorted({self.relative_path(path) for path in raw})
+            elif reason == "uptodate_false":
+                value = sorted({getattr(utd, "__name__", type(utd).__name__) for utd, *_ in raw})
+            elif isinstance(raw, tuple):
+                value = [*raw]
+            else:
+                value = raw
+            if value:
+                serialized[reason] = value
+
+        return serialized
+
+    def relative_path(self, path):
+        """get a path relative to the site, if it is in the site"""
+        path = Path(os.path.abspath(path))
+        try:
+            return path.relative_to(Path(self.manager.lite_dir).resolve()).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    def print_plan(self, plan):
+        """print a short summary of the stale tasks"""
+        for task in plan["tasks"]:
+            if task["status"] == "up-to-date":
+                continue
+            print(f"""{task["status"]:>5} {task["name"]}""")
+            print(f"""      read {_megabytes(task["read"])}, write {_megabytes(task["write"])}""")
+            for reason, value in task["reasons"].items():
+                if not isinstance(value, list):
+                    print(f"      {reason}: {value}")
+                    continue
+                more = len(value) - SHOWN_PATHS
+                more = f" (+{more} more)" if more > 0 else ""
+                print(f"""      {reason}: {", ".join(map(str, value[:SHOWN_PATHS]))}{more}""")
+
+        summary = plan["summary"]
+        print(
+            f"""{summary["stale"]} of {summary["tasks"]} tasks would run, """
+            f"""reading {_megabytes(summary["read"])} and writing {_megabytes(summary["write"])}"""
+        )
+
+
+def _changed_entries(folder, stale_targets):
+    """the stale targets which would add, or change, an entry of a folder
+
+    A new target also changes the folder it is written to, and any new folders above it.
+    """
+    changed = []
+
+    for target in sorted(stale_targets):
+        entry, is_new = target, not os.path.exists(target)
+        while True:
+            parent = os.path.dirname(entry)
+            if parent == folder:
+                changed.append(target)
+                break
+            if parent == entry or not (entry == target or is_new):
+                break
+            entry, is_new = parent, not os.path.exists(parent)
+
+    return changed
+
+
+def _path_size(path):
+    """the size of a file, or of all the files in a folder"""
+    if os.path.isdir(path):
+        return sum(p.stat().st_size for p in Path(path).rglob("*") if p.is_file())
+    return os.stat(path).st_size
+
+
+def _megabytes(size):
+    """a size in bytes, in megabytes"""
+    return f"{size / (1024 * 1024):.2f}MB"
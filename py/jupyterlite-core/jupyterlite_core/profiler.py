@@ -0,0 +1,166 @@
+"""a lightweight profiler for the tasks of a JupyterLite build
+
+This records the wall time, CPU time and (where the platform reports it) bytes read
+and written by each task generator and task action, and writes them as:
+
+- a Chrome trace, viewable in ``chrome://tracing`` or https://ui.perfetto.dev
+- a plain text summary, sorted by wall time
+"""
+
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from . import codec
+from .constants import UTF8
+
+#: the per-thread I/O counters, as reported by linux
+PROC_THREAD_IO = Path("/proc/thread-self/io")
+
+#: the Chrome trace file suffix
+TRACE_JSON = "trace.json"
+
+#: the text summary file suffix
+SUMMARY_TXT = "summary.txt"
+
+
+def thread_io():
+    """get the bytes read and written by the current thread, if known"""
+    try:
+        lines = PROC_THREAD_IO.read_text(**UTF8).splitlines()
+    except OSError:
+        return None, None
+
+    counters = dict(line.split(": ") for line in lines if ": " in line)
+    return int(counters["rchar"]), int(counters["wchar"])
+
+
+class LiteProfiler:
+    """collect timed events from a single ``doit`` run, from any thread"""
+
+    def __init__(self):
+        self.events = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def span(self, name, cat, **args):
+        """record the wall time, CPU time and I/O of the current thread in a block"""
+        read_0, written_0 = thread_io()
+        cpu_0 = time.thread_time()
+        wall_0 = time.perf_counter()
+        try:
+            yield args
+        finally:
+            wall = time.perf_counter() - wall_0
+            cpu = time.thread_time() - cpu_0
+            read_1, written_1 = thread_io()
+            if read_0 is not None and read_1 is not None:
+                args.update(read=read_1 - read_0, written=written_1 - written_0)
+            self.add_event(name, cat, wall_0, wall, cpu, **args)
+
+    def add_event(self, name, cat, start, wall, cpu, **args):
+        """record a complete event"""
+        event = dict(
+            name=name,
+            cat=cat,
+            ph="X",
+            ts=round((start - self._origin) * 1e6, 3),
+            dur=round(wall * 1e6, 3),
+            pid=os.getpid(),
+            tid=threading.get_ident(),
+            args=dict(cpu=round(cpu * 1e6, 3), **args),
+        )
+        with self._lock:
+            self.events.append(event)
+
+    def iter_tasks(self, name, tasks):
+        """time a task generator, as one event for all of its ``next`` calls"""
+        start = None
+        wall = cpu = 0.0
+        count = 0
+        tasks = iter(tasks)
+
+        while True:
+            cpu_0 = time.thread_time()
+            wall_0 = time.perf_counter()
+            start = wall_0 if start is None else start
+            try:
+                task = next(tasks)
+            except StopIteration:
+                break
+            finally:
+                wall += time.perf_counter() - wall_0
+                cpu += time.thread_time() - cpu_0
+            count += 1
+            yield task
+
+        self.add_event(name, "generate", start, wall, cpu, tasks=count)
+
+    def wrap_task(self, task, name):
+        """wrap each python action of a task, keeping its signature for ``doit``"""
+        actions = []
+
+        for action in task.get("actions") or []:
+            if isinstance(action, tuple):
+                actions += [(self.wrap_action(action[0], name), *action[1:])]
+            elif callable(action):
+                actions += [self.wrap_action(action, name)]
+            else:
+                actions += [action]
+
+        return {**task, "actions": actions}
+
+    def wrap_action(self, action, name):
+        """time a single python action"""
+        action_name = getattr(action, "__qualname__", None) or getattr(
+            getattr(action, "func", None), "__qualname__", "action"
+        )
+
+        @functools.wraps(action)
+        def _timed(*args, **kwargs):
+            with self.span(name, "action", action=action_name):
+                return action(*args, **kwargs)
+
+        return _timed
+
+    def summarize(self):
+        """aggregate the events by name and category, most expensive first"""
+        rows = {}
+
+        for event in self.events:
+            key = event["name"], event["cat"]
+            row = rows.setdefault(key, dict(wall=0.0, cpu=0.0, read=0, written=0, count=0))
+            row["wall"] += event["dur"] / 1e6
+            row["cpu"] += event["args"]["cpu"] / 1e6
+            row["read"] += event["args"].get("read", 0)
+            row["written"] += event["args"].get("written", 0)
+            row["count"] += 1
+
+        return sorted(rows.items(), key=lambda item: (-item[1]["wall"], item[0]))
+
+    def write(self, profile_dir, stem):
+        """write the Chrome trace and text summary, returning their paths"""
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        trace_json = profile_dir / f"{stem}.{TRACE_JSON}"
+        summary_txt = profile_dir / f"{stem}.{SUMMARY_TXT}"
+
+        with self._lock:
+            events = sorted(self.events, key=lambda e: e["ts"])
+
+        codec.write_json(trace_json, dict(traceEvents=events, displayTimeUnit="ms"), compact=True)
+
+        header = f"""{"wall (s)":>10} {"cpu (s)":>10} {"read (B)":>12} {"written (B)":>12}"""
+        lines = [f"{header} {'n':>4}  {'kind':<8} name"]
+        for (name, cat), row in self.summarize():
+            lines += [
+                f"""{row["wall"]:>10.3f} {row["cpu"]:>10.3f} {row["read"]:>12} """
+                f"""{row["written"]:>12} {row["count"]:>4}  {cat:<8} {name}"""
+            ]
+
+        summary_txt.write_text("\n".join(lines) + "\n", **UTF8)
+
+        return trace_json, summary_txt
@@ -0,0 +1,120 @@
+"""an indexed scan of the contents to copy into a site"""
+
+import os
+import re
+import threading
+from pathlib import Path
+
+from traitlets import Any, default
+from traitlets.config import LoggingConfigurable
+
+#: parts of a regular expression which may depend on what follows a match
+_LOOKS_AHEAD = re.compile(r"\$|\\[ZbB]|\(\?[=!]")
+
+#: parts of a regular expression which would not survive being joined to others
+_NOT_JOINABLE = re.compile(r"\\[1-9]|\(\?P=|^\(\?[aiLmsux]+\)")
+
+
+class LiteContentsScanner(LoggingConfigurable):
+    """the files of the ``contents`` of a manager, found with one walk per run
+
+    Each folder is listed with ``os.scandir``. The ``ignore_contents`` and
+    ``extra_ignore_contents`` are joined into one regular expression, tested once per
+    path, and a folder is not entered at all if every path in it would be ignored. The
+    result is kept until the manager ``reset``s it, at the start of each run, so the
+    ``status`` and ``build`` phases share it.
+    """
+
+    _files = Any(help="the ``(source, relative POSIX path)`` of each file, if scanned")
+    _lock = Any(help="a lock held while scanning, as addons may ask from many threads")
+
+    @default("_files")
+    def _default_files(self):
+        return None
+
+    @default("_lock")
+    def _default_lock(self):
+        return threading.Lock()
+
+    def reset(self):
+        """forget the previous scan"""
+        with self._lock:
+            self._files = None
+
+    def files(self):
+        """get the ``(source, relative POSIX path)`` of each file to copy, by path
+
+        When a relative path is found in more than one of the ``contents``, the last
+        one wins.
+        """
+        with self._lock:
+            if self._files is None:
+                self._files = self._scan()
+            return self._files
+
+    def _scan(self):
+        manager = self.parent
+        is_ignored, is_pruned = compile_ignores(
+            [*manager.ignore_contents, *manager.extra_ignore_contents]
+        )
+        found = {}
+
+        for root in map(Path, reversed(manager.contents)):
+            if not root.is_dir():
+                found.setdefault(root.name, root)
+                continue
+            for src, rel in walk_contents(str(root), is_ignored, is_pruned):
+                if rel in found:  # pragma: no cover
+                    self.log.debug("Already populated %s", rel)
+                    continue
+                found[rel] = src
+
+        return [(Path(found[rel]), rel) for rel in sorted(found)]
+
+
+def walk_contents(root, is_ignored, is_pruned):
+    """yield the path, and relative POSIX path, of each file in a folder, if not ignored"""
+    stack = [(root, "")]
+
+    while stack:
+        folder, prefix = stack.pop()
+        try:
+            entries = list(os.scandir(folder))
+        except OSError:  # pragma: no cover
+            continue
+
+        for entry in entries:
+            rel = f"{prefix}{entry.name}"
+            slash_rel = f"/{rel}"
+
+            if is_ignored(slash_rel):
+                continue
+
+            if entry.is_dir():
+                if not is_pruned(f"{slash_rel}/"):
+                    stack.append((entry.path, f"{rel}/"))
+            else:
+                yield entry.path, rel
+
+
+def compile_ignores(patterns):
+    """get functions of whether a ``/``-prefixed path is ignored, and whether a folder
+    path (with a trailing ``/``) can be skipped, as everything in it would be ignored
+    """
+    is_ignored = compile_any(patterns)
+    # a match in ``/folder/`` is also a match in ``/folder/any/file``, unless it depends
+    # on what follows it
+    is_pruned = compile_any([p for p in patterns if not _LOOKS_AHEAD.search(p)])
+    return is_ignored, is_pruned
+
+
+def compile_any(patterns):
+    """get a function of whether any of some regular expressions is found in a string"""
+    if not patterns:
+        return lambda path: False
+
+    if any(_NOT_JOINABLE.search(p) for p in patterns):
+        compiled = [re.compile(p) for p in patterns]
+        return lambda path: any(regex.search(path) for regex in compiled)
+
+    return re.compile("|".join(f"(?:{p})" for p in patterns)).search
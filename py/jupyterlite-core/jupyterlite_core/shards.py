@@ -0,0 +1,270 @@
+"""split a JupyterLite build between many workers, and merge their outputs"""
+
+import filecmp
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+from traitlets import Bool, Instance, List, default
+from traitlets.config import LoggingConfigurable
+
+from . import __version__, codec
+from .constants import (
+    ALL_FEDERATED_JSON,
+    ALL_JSON,
+    API_CONTENTS,
+    FEDERATED_EXTENSIONS,
+    JSON_FMT,
+    JUPYTER_CONFIG_DATA,
+    JUPYTERLITE_JSON,
+    SHARD_MANIFEST,
+    UTF8,
+)
+from .indexer import ALL_JSON_PAGE_RE, LiteContentsIndexer
+from .manager import LiteManager
+from .trait_types import CPath
+
+
+def shard_of(key, shard_count):
+    """get the shard of a key, e.g. the path of a file, which is the same on every worker"""
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return int(digest[:8], 16) % shard_count
+
+
+def is_in_shard(key, shard_index, shard_count):
+    """whether a key should be built by a shard"""
+    if shard_count <= 1:
+        return True
+
+    if shard_index >= shard_count:
+        raise ValueError(f"[lite] [shard] shard_index {shard_index} is not below {shard_count}")
+
+    return shard_of(key, shard_count) == shard_index
+
+
+def shard_manifest(shard_index, shard_count, source_date_epoch):
+    """the description of a shard, written to its output folder"""
+    return dict(
+        version=__version__,
+        shard_index=shard_index,
+        shard_count=shard_count,
+        source_date_epoch=source_date_epoch,
+    )
+
+
+class LiteShardMerger(LoggingConfigurable):
+    """combine the output folders of all of the shards of a build into one site
+
+    Files only built by one shard are linked (or copied), and all other files must be
+    the same in every shard, except for:
+
+    - the ``all.json`` Contents API listings of folders with files in many shards, which
+      are written again, as pages if larger than the ``LiteContentsIndexer.page_size``
+    - the ``federated_extensions`` in ``jupyter-lite.json``
+    - the settings of federated extensions in ``all_federated.json``
+    """
+
+    manager: LiteManager = Instance(LiteManager)
+
+    shards: list[Path] = List(CPath(), help="the output folders of every shard")
+
+    force: bool = Bool(False, help="replace an output_dir which is not empty").tag(config=True)
+
+    indexer = Instance(LiteContentsIndexer, help="writes merged Contents API listings")
+
+    @default("indexer")
+    def _default_indexer(self):
+        return LiteContentsIndexer(parent=self)
+
+    def merge(self):
+        """merge all the shards into the ``output_dir``, returning non-zero on failure"""
+        manifests = [self.load_manifest(shard) for shard in self.shards]
+        error = self.check_manifests(manifests)
+
+        if error:
+            self.log.error(f"[lite] [merge] {error}")
+            return 1
+
+        order = sorted(range(len(manifests)), key=lambda i: manifests[i]["shard_index"])
+        shards = [self.shards[i] for i in order]
+        output_dir = self.manager.output_dir
+
+        if output_dir.exists() and any(output_dir.iterdir()):
+            if not self.force:
+                self.log.error(f"[lite] [merge] {output_dir} is not empty: replace it with --force")
+                return 1
+            self.log.info(f"[lite] [merge] replacing {output_dir}")
+            shutil.rmtree(output_dir)
+
+        conflicts = []
+        sources = self.shard_files(shards)
+        self.log.info(f"[lite] [merge] merging {len(sources)} files from {len(shards)} shards")
+
+        for rel, paths in sorted(sources.items()):
+            if not self.merge_one(rel, paths, output_dir / rel):
+                conflicts += [rel]
+
+        for rel in conflicts:
+            self.log.error(f"[lite] [merge] {rel} is different in some shards")
+
+        sde = self.manager.source_date_epoch
+        if sde is None:
+            sde = manifests[0]["source_date_epoch"]
+
+        if sde is not None:
+            self.manager.timestamps.touch(output_dir)
+            self.manager.timestamps.clamp(sde)
+
+        return 1 if conflicts else 0
+
+    def load_manifest(self, shard):
+        """read the manifest of one shard"""
+        manifest = shard / SHARD_MANIFEST
+
+        if not manifest.exists():
+            return None
+
+        return codec.read_json(manifest)
+
+    def check_manifests(self, manifests):
+        """describe why some shards can't be merged, if they can't"""
+        for shard, manifest in zip(self.shards, manifests, strict=True):
+            if manifest is None:
+                return f"{shard} is not the output of a build with --shard-count"
+
+        counts = {m["shard_count"] for m in manifests}
+        if len(counts) != 1:
+            return f"shards are from builds with different --shard-count: {sorted(counts)}"
+
+        indices = sorted(m["shard_index"] for m in manifests)
+        if indices != [*range(counts.pop())]:
+            return f"expected one of each shard, found {indices}"
+
+        for key in ["version", "source_date_epoch"]:
+            values = {m[key] for m in manifests}
+            if len(values) != 1:
+                return f"shards have different {key}: {sorted(map(str, values))}"
+
+        return None
+
+    def shard_files(self, shards):
+        """get the paths to each file in the shards, by relative path"""
+        sources = {}
+
+        for shard in shards:
+            for path in self.manager.snapshot.files(shard):
+                rel = path.relative_to(shard).as_posix()
+                if rel != SHARD_MANIFEST:
+                    sources.setdefault(rel, []).append(path)
+
+        return sources
+
+    def merge_one(self, rel, paths, dest):
+        """write one merged file, returning whether the shards could be merged"""
+        dest.parent.mkdir(parents=True, exist_ok=True)
+
+        if rel.startswith(f"{API_CONTENTS}/"):
+            if dest.name == ALL_JSON:
+                return self.merge_listing_pages(paths, dest)
+            if ALL_JSON_PAGE_RE.match(dest.name):
+                # merged with the ``all.json`` of its folder
+                return True
+
+        if len(paths) == 1 or all(filecmp.cmp(paths[0], p, shallow=False) for p in paths[1:]):
+            self.link_one(paths[0], dest)
+            return True
+
+        if dest.name == JUPYTERLITE_JSON:
+            merge = self.merge_jupyterlite_json
+        elif dest.name == ALL_FEDERATED_JSON:
+            merge = self.merge_federated_settings
+        else:
+            return False
+
+        merged = merge([codec.read_json(p) for p in paths])
+
+        if merged is None:
+            return False
+
+        dest.write_text(json.dumps(merged, **JSON_FMT), **UTF8)
+        return True
+
+    def link_one(self, src, dest):
+        """hard link a file, or copy it if not possible"""
+        try:
+            os.link(src, dest)
+        except OSError:
+            shutil.copy2(src, dest)
+
+    def merge_listing_pages(self, paths, dest):
+        """merge the Contents API listings of one folder, and any of their pages"""
+        outputs = [self.indexer.outputs(path) for path in paths]
+        first = outputs[0]
+
+        if all(
+            [p.name for p in other] == [p.name for p in first]
+            and all(filecmp.cmp(a, b, shallow=False) for a, b in zip(first, other, strict=True))
+            for other in outputs[1:]
+        ):
+            for path in first:
+                self.link_one(path, dest.parent / path.name)
+            return True
+
+        merged = self.merge_listings([self.indexer.read_pages(path) for path in paths])
+        self.indexer.write_pages(dest, merged)
+        return True
+
+    def merge_listings(self, listings):
+        """merge the Contents API listings of one folder"""
+        merged = {**listings[0]}
+        content = {}
+
+        for listing in listings:
+            for child in listing.get("content") or []:
+                old = content.get(child["name"])
+                if old is None or (old["last_modified"] or "") < (child["last_modified"] or ""):
+                    content[child["name"]] = child
+            for key in ["created", "last_modified"]:
+                merged[key] = max(merged[key] or "", listing[key] or "") or None
+
+        merged["content"] = sorted(content.values(), key=lambda child: child["name"])
+        return merged
+
+    def merge_jupyterlite_json(self, configs):
+        """merge the ``jupyter-lite.json`` of each shard, which may only differ by extensions"""
+        merged = {}
+
+        for config in configs:
+            for key, value in config.items():
+                if key != JUPYTER_CONFIG_DATA:
+                    if merged.setdefault(key, value) != value:
+                        return None
+                    continue
+                merged_data = merged.setdefault(JUPYTER_CONFIG_DATA, {})
+                for data_key, data_value in value.items():
+                    if data_key == FEDERATED_EXTENSIONS:
+                        merged_data.setdefault(data_key, []).extend(data_value)
+                    elif merged_data.setdefault(data_key, data_value) != data_value:
+                        return None
+
+        extensions = merged.get(JUPYTER_CONFIG_DATA, {}).get(FEDERATED_EXTENSIONS)
+
+        if extensions is not None:
+            named = {ext["name"]: ext for ext in extensions}
+            merged[JUPYTER_CONFIG_DATA][FEDERATED_EXTENSIONS] = sorted(
+                named.values(), key=lambda ext: ext["name"]
+            )
+
+        return merged
+
+    def merge_federated_settings(self, all_settings):
+        """merge the settings of the federated extensions of each shard"""
+        by_id = {}
+
+        for settings in all_settings:
+            for setting in settings:
+                by_id.setdefault(setting["id"], setting)
+
+        return [by_id[plugin_id] for plugin_id in sorted(by_id)]
@@ -0,0 +1,169 @@
+"""an in-memory index of the files and folders of a site"""
+
+import fnmatch
+import os
+import stat
+import threading
+from pathlib import Path
+
+from traitlets import Any, Dict, List, default
+from traitlets.config import LoggingConfigurable
+
+
+class LiteSnapshot(LoggingConfigurable):
+    """the ``stat`` of every file and folder under some roots, from one walk per root
+
+    A root is walked with ``os.scandir`` the first time it (or anything in it) is
+    queried. The ``BaseAddon`` helpers which copy, write, unpack or delete files
+    ``update`` the paths they change, and the manager ``reset``s the whole index
+    before each hook phase generates its tasks, so that changes made by any other
+    means are seen.
+    """
+
+    _roots = List(help="the folders which have been walked")
+    _listings = Dict(help="the ``stat`` of the children of each walked folder, by name")
+    _lock = Any(help="a lock held while changing the index, as tasks may run in threads")
+
+    @default("_lock")
+    def _default_lock(self):
+        return threading.RLock()
+
+    def reset(self):
+        """forget everything"""
+        with self._lock:
+            self._roots = []
+            self._listings = {}
+
+    def files(self, root, pattern=None):
+        """get the files in a folder, at any depth, optionally with a name ``pattern``"""
+        return [
+            Path(path)
+            for path, is_dir in self._walk(root)
+            if not is_dir and (pattern is None or fnmatch.fnmatch(os.path.basename(path), pattern))
+        ]
+
+    def folders(self, root):
+        """get the folders in a folder, at any depth"""
+        return [Path(path) for path, is_dir in self._walk(root) if is_dir]
+
+    def children(self, folder):
+        """get the ``stat`` of each thing directly in a folder, by name"""
+        folder = os.path.abspath(folder)
+        with self._lock:
+            if self._root_of(folder) is None:
+                self._walk(folder)
+            return dict(self._listings.get(folder, {}))
+
+    def stat(self, path):
+        """get the ``stat`` of a path, or ``None`` if it does not exist"""
+        path = os.path.abspath(path)
+        with self._lock:
+            root = self._root_of(path)
+            listing = self._listings.get(os.path.dirname(path))
+            if root is None or path == root or listing is None:
+                return _stat_or_none(path)
+            return listing.get(os.path.basename(path))
+
+    def update(self, *paths):
+        """re-index some changed (or removed) paths, and everything in them"""
+        with self._lock:
+            for path in paths:
+                self._update_one(os.path.abspath(path))
+
+    def _update_one(self, path):
+        """re-index one path, and any new folders it was created in"""
+        root = self._root_of(path)
+
+        if root is None:
+            return
+
+        while path != root and os.path.dirname(path) not in self._listings:
+            path = os.path.dirname(path)
+
+        self._forget(path)
+
+        if path == root:
+            self._scan(root)
+            return
+
+        path_stat = _stat_or_none(path)
+        listing = self._listings[os.path.dirname(path)]
+
+        if path_stat is None:
+            listing.pop(os.path.basename(path), None)
+            return
+
+        listing[os.path.basename(path)] = path_stat
+
+        if stat.S_ISDIR(path_stat.st_mode):
+            self._scan(path)
+
+    def _walk(self, root):
+        """get the sorted ``(path, is_dir)`` of everything in a folder"""
+        root = os.path.abspath(root)
+        found = []
+
+        with self._lock:
+            if self._root_of(root) is None:
+                self._scan(root)
+                prefix = f"{root}{os.sep}"
+                self._roots = [*(r for r in self._roots if not r.startswith(prefix)), root]
+
+            pending = [root] if root in self._listings else []
+
+            while pending:
+                folder = pending.pop()
+                for name, path_stat in self._listings[folder].items():
+                    path = os.path.join(folder, name)
+                    found.append((path, stat.S_ISDIR(path_stat.st_mode)))
+                    if path in self._listings:
+                        pending.append(path)
+
+        return sorted(found)
+
+    def _root_of(self, path):
+        """get the walked root which contains a path, if any"""
+        for root in self._roots:
+            if path == root or path.startswith(f"{root}{os.sep}"):
+                return root
+        return None
+
+    def _forget(self, path):
+        """forget the listings of a folder, and all the folders in it"""
+        if path not in self._listings:
+            return
+
+        prefix = f"{path}{os.sep}"
+        for folder in [f for f in self._listings if f == path or f.startswith(prefix)]:
+            self._listings.pop(folder)
+
+    def _scan(self, root):
+        """list a folder, and every folder in it, without following links"""
+        pending = [root]
+
+        while pending:
+            folder = pending.pop()
+            listing = {}
+
+            try:
+                with os.scandir(folder) as entries:
+                    for entry in entries:
+                        try:
+                            listing[entry.name] = entry.stat()
+                        except OSError:
+                            # e.g. a broken link, or already removed by a concurrent task
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+
+            self._listings[folder] = listing
+
+
+def _stat_or_none(path):
+    """get the ``stat`` of a path, or ``None`` if it does not exist"""
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
@@ -0,0 +1,211 @@
+"""a content-addressed store of files, shared between builds"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+from traitlets import Any, Bool, Int, default
+from traitlets.config import LoggingConfigurable
+
+from . import codec
+from .constants import MOD_FILE
+from .trait_types import CPath
+
+#: the environment variable for a store shared by many sites
+ENV_OBJECT_STORE = "JUPYTERLITE_OBJECT_STORE"
+
+#: the size of chunks to read when hashing files
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_file(path):
+    """get the SHA-256 hex digest of a file's content"""
+    file_hash = hashlib.sha256()
+
+    with open(path, "rb") as fd:
+        while True:
+            chunk = fd.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            file_hash.update(chunk)
+
+    return file_hash.hexdigest()
+
+
+def temp_path_for(path):
+    """a path next to ``path`` to write before replacing it, unique to a process and thread"""
+    return path.parent / f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+class LiteObjectStore(LoggingConfigurable):
+    """files keyed by their SHA-256, and the trees of files unpacked from archives
+
+    Objects are only ever added, never changed, and are materialized into a site as
+    hard links (where the filesystem allows) or copies. As outputs may share their
+    content with the store, and other sites, they must be replaced, rather than
+    modified in place.
+
+    The trees of the least recently used archives, and the objects only they use, are
+    removed when the store grows over ``max_size``, by ``evict``, which the manager
+    calls at the end of each run, when no task is materializing them.
+    """
+
+    root: Path = CPath(
+        help=(f"The folder for objects, which may be shared by many sites. env: {ENV_OBJECT_STORE}")
+    ).tag(config=True)
+
+    max_size: int = Int(
+        2 * 1024**3, help="The size in bytes to evict objects above, or 0 to keep all objects"
+    ).tag(config=True)
+
+    link: bool = Bool(
+        True, help="Whether to try hard-linking objects into outputs before copying them"
+    ).tag(config=True)
+
+    _added = Any(help="whether any trees were added since the last ``evict``")
+
+    @default("root")
+    def _default_root(self):
+        return Path(os.environ.get(ENV_OBJECT_STORE) or self.parent.cache_dir / "objects")
+
+    @default("_added")
+    def _default_added(self):
+        return False
+
+    def object_path(self, digest):
+        """the path to one object"""
+        return self.root / "objects" / digest[:2] / digest
+
+    def tree_path(self, digest):
+        """the path to the tree of one archive"""
+        return self.root / "trees" / f"{digest}.json"
+
+    def add_file(self, path):
+        """store one file, returning its ``[size, digest]``"""
+        digest = sha256_file(path)
+        obj = self.object_path(digest)
+
+        if not obj.exists():
+            obj.parent.mkdir(parents=True, exist_ok=True)
+            tmp_obj = temp_path_for(obj)
+            shutil.copy2(path, tmp_obj)
+            tmp_obj.chmod(MOD_FILE)
+            tmp_obj.replace(obj)
+
+        return [obj.stat().st_size, digest]
+
+    def unpack(self, archive, extract, archive_digest=None):
+        """get the tree of an archive, using ``extract(archive, dest)`` if not stored"""
+        archive_digest = archive_digest or sha256_file(archive)
+        tree = self.get_tree(archive_digest)
+
+        if tree is not None:
+            self.log.debug(f"[lite] [store] reusing {len(tree)} files from {archive.name}")
+            return tree
+
+        with tempfile.TemporaryDirectory() as td:
+            tdp = Path(td)
+            extract(archive, tdp / "unpacked")
+            unpacked = tdp / "unpacked"
+            tree = {
+                path.relative_to(unpacked).as_posix(): self.add_file(path)
+                for path in sorted(unpacked.rglob("*"))
+                if not path.is_dir()
+            }
+
+        tree_path = self.tree_path(archive_digest)
+        tree_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = temp_path_for(tree_path)
+        codec.write_json(tmp_path, tree, compact=True)
+        tmp_path.replace(tree_path)
+        self.log.debug(f"[lite] [store] added {len(tree)} files from {archive.name}")
+
+        self._added = True
+        return tree
+
+    def get_tree(self, archive_digest):
+        """get a stored tree, if all of its objects are still stored"""
+        tree_path = self.tree_path(archive_digest)
+
+        try:
+            tree = codec.read_json(tree_path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if not all(self.object_path(digest).exists() for size, digest in tree.values()):
+            return None
+
+        # mark as recently used
+        tree_path.touch()
+        return tree
+
+    def materialize(self, digest, dest):
+        """replace a path with an object, as a hard link if possible, or a copy"""
+        obj = self.object_path(digest)
+
+        if dest.is_dir():
+            shutil.rmtree(dest)
+        elif dest.exists() or dest.is_symlink():
+            dest.unlink()
+
+        dest.parent.mkdir(parents=True, exist_ok=True)
+
+        if self.link:
+            try:
+                os.link(obj, dest)
+                return
+            except OSError:
+                # e.g. a different filesystem, or unsupported
+                pass
+
+        shutil.copy2(obj, dest)
+
+    def materialize_tree(self, tree, dest):
+        """replace a folder with all the objects of a tree"""
+        if dest.exists():
+            shutil.rmtree(dest)
+
+        for rel_path, (_size, digest) in tree.items():
+            self.materialize(digest, dest / rel_path)
+
+    def evict(self):
+        """remove the least recently used trees, and unused objects, above ``max_size``
+
+        This should only be called when no objects are being materialized.
+        """
+        if not (self.max_size and self._added):
+            return
+
+        self._added = False
+
+        objects = {
+            p.name: p.stat().st_size
+            for p in self.root.glob("objects/*/*")
+            if not p.name.endswith(".tmp")
+        }
+
+        if sum(objects.values()) <= self.max_size:
+            return
+
+        trees = sorted(self.root.glob("trees/*.json"), key=lambda p: p.stat().st_mtime)
+        kept = set()
+        kept_size = 0
+
+        for tree_path in reversed(trees):
+            digests = {digest for size, digest in codec.read_json(tree_path).values()}
+            new_size = sum(objects.get(digest, 0) for digest in digests - kept)
+
+            if kept and kept_size + new_size > self.max_size:
+                self.log.debug(f"[lite] [store] evicting {tree_path.name}")
+                tree_path.unlink()
+                continue
+
+            kept |= digests
+            kept_size += new_size
+
+        for digest in sorted(set(objects) - kept):
+            self.object_path(digest).unlink()
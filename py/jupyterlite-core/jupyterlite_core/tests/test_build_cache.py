@@ -0,0 +1,123 @@
+"""tests of pulling and pushing task outputs from a build cache"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from jupyterlite_core.addons.static import StaticAddon
+from jupyterlite_core.build_cache import HTTPBuildCache, LiteBuildCache, get_build_cache
+from jupyterlite_core.manager import LiteManager
+
+
+def test_build_cache_directory(tmp_path, script_runner, source_date_epoch):
+    """does a second site pull the outputs of the first site's expensive tasks"""
+    build_cache = tmp_path / "build-cache"
+    args = ["jupyter", "lite", "build", "--build-cache", str(build_cache)]
+    args += ["--source-date-epoch", source_date_epoch]
+    all_json = {}
+
+    for site in ["a", "b"]:
+        lite_dir = tmp_path / site
+        (lite_dir / "files/docs").mkdir(parents=True)
+        (lite_dir / "files/docs/README.md").write_text("# hello", encoding="utf-8")
+
+        status = script_runner.run(args, cwd=str(lite_dir))
+        assert status.success
+
+        output = f"{status.stdout}{status.stderr}"
+        pulled = "[build-cache] pulled" in output
+        assert pulled == (site == "b"), f"{site} should {'' if pulled else 'not '}have pulled"
+
+        all_json[site] = (lite_dir / "_output/api/contents/docs/all.json").read_text(
+            encoding="utf-8"
+        )
+        assert (lite_dir / "_output/index.html").exists()
+
+    assert all_json["a"] == all_json["b"]
+    assert [*build_cache.glob("*/*.tar.gz")], "outputs should have been pushed"
+
+
+def test_build_cache_static_pulled(tmp_path):
+    """are the app files of a previous unpack, which were not pulled, removed"""
+    manager = LiteManager(lite_dir=tmp_path)
+    addon = StaticAddon(manager=manager)
+    output_dir = manager.output_dir
+    for rel_path in ["old/old.txt", "kept.txt", "new.txt", "other.txt"]:
+        (output_dir / rel_path).parent.mkdir(parents=True, exist_ok=True)
+        (output_dir / rel_path).write_text(rel_path, encoding="utf-8")
+    addon.save_static_manifest({"old/old.txt": [1, "a"], "kept.txt": [1, "b"]})
+
+    assert addon.unpacked_outputs() == [output_dir / "kept.txt", output_dir / "old/old.txt"]
+    addon.pulled_outputs([output_dir / "kept.txt", output_dir / "new.txt"])
+
+    assert not (output_dir / "old/old.txt").exists()
+    assert (output_dir / "other.txt").exists(), "files of other tasks should be kept"
+    assert addon.load_static_manifest() == {"kept.txt": None, "new.txt": None}
+
+
+def test_build_cache_http(tmp_path, an_unused_port):
+    """does the HTTP backend push and pull outputs"""
+    stored = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in stored:
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(stored[self.path])
+
+        def do_PUT(self):
+            stored[self.path] = self.rfile.read(int(self.headers["Content-Length"]))
+            self.send_response(201)
+            self.end_headers()
+
+    server = ThreadingHTTPServer(("127.0.0.1", an_unused_port), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    try:
+        manager = LiteManager(lite_dir=tmp_path)
+        url = f"http://127.0.0.1:{an_unused_port}/cache"
+        cache = get_build_cache(url, parent=manager, roots=dict(lite_dir=tmp_path))
+        assert isinstance(cache, HTTPBuildCache)
+
+        src = tmp_path / "src.txt"
+        src.write_text("hello", encoding="utf-8")
+        dest = tmp_path / "out/dest.txt"
+        calls = []
+
+        def copy():
+            calls.append(1)
+            dest.parent.mkdir(exist_ok=True)
+            dest.write_text(src.read_text(encoding="utf-8"), encoding="utf-8")
+
+        task = dict(
+            name="copy", actions=[copy], file_dep=[src], targets=[dest], meta=dict(build_cache={})
+        )
+
+        for expect_calls in [1, 1]:
+            wrapped = cache.wrap_task(task)
+            for action in wrapped["actions"]:
+                action[0](*action[1]) if isinstance(action, tuple) else action()
+            assert len(calls) == expect_calls
+            assert dest.read_text(encoding="utf-8") == "hello"
+            dest.unlink()
+
+        assert len(stored) == 1, "one output should have been pushed"
+    finally:
+        server.shutdown()
+
+
+def test_build_cache_abstract(tmp_path):
+    """does a backend which doesn't implement ``put`` fail before it is used"""
+
+    class GetOnlyBuildCache(LiteBuildCache):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError, match="put"):
+        GetOnlyBuildCache(url=str(tmp_path))
@@ -1,13 +1,18 @@
 """integration tests for overall CLI functionality"""
 
+import io
+import json
+import os
 import platform
 import re
+import tarfile
 import time
 
 from pytest import mark
 
 from jupyterlite_core import __version__
-from jupyterlite_core.constants import HOOKS
+from jupyterlite_core.bench import LiteBench
+from jupyterlite_core.constants import ALL_APP_ARCHIVES, HOOKS
 
 PY_IMPL = platform.python_implementation()
 IS_PYPY = "pypy" in PY_IMPL.lower()
@@ -350,3 +355,188 @@ def test_build_ignores_hidden_directories(an_empty_lite_dir, script_runner):
     # Should NOT warn about .venv - it's silently ignored
     assert "Skipping" not in status.stderr or ".venv" not in status.stderr
     assert ".venv" not in status.stderr
+
+
+def test_build_jobs(an_empty_lite_dir, script_runner):
+    """does building with concurrent tasks keep all the jupyter-lite.json patches"""
+    for i in range(10):
+        nested = an_empty_lite_dir / f"files/dir-{i}/README-{i}.md"
+        nested.parent.mkdir(parents=True)
+        nested.write_text(f"# {i}", encoding="utf-8")
+
+    workspace = an_empty_lite_dir / "workspaces/default.jupyterlab-workspace"
+    workspace.parent.mkdir()
+    workspace.write_text(AN_WORKSPACE, encoding="utf-8")
+
+    args = "jupyter", "lite", "build", "--jobs", "4"
+    status = script_runner.run(args, cwd=str(an_empty_lite_dir))
+    assert status.success
+
+    out = an_empty_lite_dir / "_output"
+    config = json.loads((out / "jupyter-lite.json").read_text(encoding="utf-8"))
+    config_data = config["jupyter-config-data"]
+    for key in ["contentsAllJsonFile", "workspacesAllJsonFile", "fileTypes"]:
+        assert key in config_data, f"{key} was lost to a concurrent patch"
+
+    for i in range(10):
+        assert (out / f"api/contents/dir-{i}/all.json").exists()
+
+
+def test_build_config_patches(an_empty_lite_dir, script_runner):
+    """are all the jupyter-lite.json patches applied once, and only when needed"""
+    readme = an_empty_lite_dir / "files/README.md"
+    readme.parent.mkdir()
+    readme.write_text("# hello", encoding="utf-8")
+
+    overrides = {"@jupyterlab/apputils-extension:themes": {"theme": "JupyterLab Dark"}}
+    (an_empty_lite_dir / "overrides.json").write_text(json.dumps(overrides), encoding="utf-8")
+
+    args = "jupyter", "lite", "build"
+    status = script_runner.run(args, cwd=str(an_empty_lite_dir))
+    assert status.success
+    assert "config:jupyter-lite.json" in status.stdout
+
+    out_json = an_empty_lite_dir / "_output/jupyter-lite.json"
+    config_data = json.loads(out_json.read_text(encoding="utf-8"))["jupyter-config-data"]
+    assert config_data["contentsAllJsonFile"] == "all.json"
+    assert "fileTypes" in config_data
+    assert config_data["settingsOverrides"] == overrides
+
+    mtime = out_json.stat().st_mtime_ns
+    rebuild = script_runner.run(args, cwd=str(an_empty_lite_dir))
+    assert rebuild.success
+    assert out_json.stat().st_mtime_ns == mtime, "jupyter-lite.json was needlessly rewritten"
+
+
+def test_build_profile(an_empty_lite_dir, script_runner):
+    """does --profile write a trace and summary of the tasks"""
+    args = "jupyter", "lite", "build", "--profile", "--profile-dir", "profile"
+    status = script_runner.run(args, cwd=str(an_empty_lite_dir))
+    assert status.success
+
+    profile_dir = an_empty_lite_dir / "profile"
+    trace = json.loads((profile_dir / "build.trace.json").read_text(encoding="utf-8"))
+    categories = {event["cat"] for event in trace["traceEvents"]}
+    assert categories == {"action", "generate"}
+
+    for event in trace["traceEvents"]:
+        assert event["ph"] == "X"
+        assert event["dur"] >= 0
+
+    summary = (profile_dir / "build.summary.txt").read_text(encoding="utf-8")
+    assert "post_build:config:jupyter-lite.json" in summary
+
+
+def test_build_app_archive_upgrade(an_empty_lite_dir, script_runner):
+    """does a new app archive only change the static files which changed"""
+    old_archive = os.environ.get("JUPYTERLITE_APP_ARCHIVE") or ALL_APP_ARCHIVES[-1]
+    new_archive = an_empty_lite_dir / "new-app.tgz"
+
+    with tarfile.open(old_archive, "r:gz") as old_tar, tarfile.open(new_archive, "w:gz") as tar:
+        for member in old_tar.getmembers():
+            if member.name == "package/tree/favicon.ico":
+                continue
+            data = old_tar.extractfile(member).read() if member.isfile() else None
+            if member.name == "package/index.html":
+                data += b"<!-- upgraded -->"
+                member.size = len(data)
+            tar.addfile(member, io.BytesIO(data) if data is not None else None)
+        added = tarfile.TarInfo("package/upgraded.txt")
+        added.size = len(b"upgraded")
+        tar.addfile(added, io.BytesIO(b"upgraded"))
+
+    args = "jupyter", "lite", "build", "--app-archive"
+    cwd = str(an_empty_lite_dir)
+    status = script_runner.run([*args, str(old_archive)], cwd=cwd)
+    assert status.success
+
+    output = an_empty_lite_dir / "_output"
+    user_file = output / "user-derived.txt"
+    user_file.write_text("hello", encoding="utf-8")
+    lab_ino = (output / "lab/index.html").stat().st_ino
+    assert (output / "tree/favicon.ico").exists()
+
+    upgrade = script_runner.run([*args, str(new_archive)], cwd=cwd)
+    assert upgrade.success
+
+    assert user_file.exists(), "a file not from the archive was removed"
+    assert (output / "lab/index.html").stat().st_ino == lab_ino, "an unchanged file was replaced"
+    assert (output / "index.html").read_text(encoding="utf-8").endswith("<!-- upgraded -->")
+    assert not (output / "tree/favicon.ico").exists(), "a removed file was kept"
+    assert (output / "upgraded.txt").exists(), "an added file was not unpacked"
+
+
+def test_bench(tmp_path, script_runner):
+    """does bench generate a site, and report the timing of some commands"""
+    output = tmp_path / "bench.json"
+    args = ["jupyter", "lite", "bench", "--files=20", "--extensions=1", "--workspaces=1"]
+    args += ["--commands=build", "--scenarios=cold", "--scenarios=noop"]
+    args += ["--bench-dir", str(tmp_path / "bench"), "--output", str(output)]
+    status = script_runner.run(args, cwd=str(tmp_path))
+    assert status.success
+
+    results = json.loads(output.read_text(encoding="utf-8"))
+    assert results["site"]["files"] == 20
+    assert [(run["command"], run["scenario"]) for run in results["runs"]] == [
+        ("build", "cold"),
+        ("build", "noop"),
+    ]
+
+    for run in results["runs"]:
+        assert run["rc"] == 0
+        assert run["wall"] > 0
+        assert {"init", "build"} <= set(run["hooks"])
+
+    assert (tmp_path / "bench/site/_output/extensions/bench-extension-0/package.json").exists()
+
+
+def test_bench_temp_dir(tmp_path):
+    """is the default, temporary ``bench_dir`` removed after a run"""
+    output = tmp_path / "bench.json"
+    bench = LiteBench(files=2, extensions=0, workspaces=0, commands=[], output=str(output))
+    bench_dir = bench.bench_dir
+    assert bench_dir.exists()
+    assert bench.run() == 0
+    assert json.loads(output.read_text(encoding="utf-8"))["site"]["files"] == 2
+    assert not bench_dir.exists()
+
+
+def test_plan(tmp_path, script_runner):
+    """does plan report the stale tasks of a build, without running them"""
+    (tmp_path / "files").mkdir()
+    readme = tmp_path / "files/README.md"
+    readme.write_text("# hello", encoding="utf-8")
+    plan_json = tmp_path / "plan.json"
+    plan_args = ["jupyter", "lite", "plan", "--plan-output", str(plan_json)]
+
+    def stale_tasks():
+        status = script_runner.run(plan_args, cwd=str(tmp_path))
+        assert status.success
+        plan = json.loads(plan_json.read_text(encoding="utf-8"))
+        assert plan["summary"]["errors"] == 0
+        return {t["name"]: t for t in plan["tasks"] if t["status"] != "up-to-date"}
+
+    assert "build:contents:copy:README.md" in stale_tasks()
+    assert not (tmp_path / "_output").exists(), "plan should not have built anything"
+    assert not (tmp_path / ".jupyterlite.doit.db").exists(), "plan should not store state"
+
+    status = script_runner.run(["jupyter", "lite", "build"], cwd=str(tmp_path))
+    assert status.success
+    assert not [name for name in stale_tasks() if "contents" in name]
+
+    readme.write_text("# hello world", encoding="utf-8")
+    stale = stale_tasks()
+    copy = stale["build:contents:copy:README.md"]
+    assert copy["reasons"] == {"changed_file_dep": ["files/README.md"]}
+    assert copy["read"] == len("# hello world")
+    listing = stale["post_build:contents:contents:."]
+    assert listing["reasons"] == {"upstream_target": ["_output/files/README.md"]}
+
+    (tmp_path / "files/new").mkdir()
+    (tmp_path / "files/new/a.txt").write_text("a", encoding="utf-8")
+    listing = stale_tasks()["post_build:contents:contents:."]
+    assert "_output/files/new/a.txt" in listing["reasons"]["upstream_target"]
+
+    status = script_runner.run(["jupyter", "lite", "plan", "--json"], cwd=str(tmp_path))
+    assert status.success
+    assert json.loads(status.stdout)["summary"]["stale"] == len(stale_tasks())
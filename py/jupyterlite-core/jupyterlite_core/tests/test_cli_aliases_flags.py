@@ -1,3 +1,4 @@
+import json
 from unittest import mock
 
 import pytest
@@ -5,6 +6,7 @@ from traitlets import Bool, Bunch
 
 from jupyterlite_core import addons
 from jupyterlite_core.addons.base import BaseAddon
+from jupyterlite_core.app import LiteBuildApp
 
 
 @pytest.mark.parametrize(
@@ -34,6 +36,26 @@ def test_cli_no_redefine_warnings(aliases, flags, expect_warn, some_entry_point_
     assert expect_warn in f"{warned[0].message}"
 
 
+def test_cli_addon_manifest(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.delenv(addons.ENV_NO_ADDON_MANIFEST, raising=False)
+    addons.get_addon_manifest.cache_clear()
+
+    try:
+        manifest = addons.get_addon_manifest()
+        assert addons.get_addon_manifest_path().exists()
+        assert "init" in manifest["addons"]["static"]["hooks"]
+
+        addons.get_addon_manifest.cache_clear()
+        with mock.patch.object(addons, "get_addon_implementations", side_effect=AssertionError):
+            cached = addons.get_addon_manifest()
+        assert cached == json.loads(json.dumps(manifest)), "cached manifest should be reused"
+    finally:
+        addons.get_addon_manifest.cache_clear()
+        addons.get_addon_implementations.cache_clear()
+        addons.get_addon_entry_points.cache_clear()
+
+
 @pytest.fixture
 def some_entry_point_addons():
     class BadAddon(BaseAddon):
@@ -49,3 +71,25 @@ def some_entry_point_addons():
         addons, entry_points=lambda group: [Bunch(name="foo", load=lambda: BadAddon)]
     ):
         yield
+
+
+@pytest.mark.parametrize(
+    "argv,env,expected",
+    [
+        [[], None, 1],
+        [[], "3", 3],
+        [["--jobs", "2"], "3", 2],
+        [["--jobs", "1"], "3", 1],
+    ],
+)
+def test_cli_jobs(argv, env, expected, tmp_path, monkeypatch):
+    """are the jobs of the manager from the CLI, or else the environment"""
+    monkeypatch.chdir(tmp_path)
+    if env is None:
+        monkeypatch.delenv("JUPYTERLITE_JOBS", raising=False)
+    else:
+        monkeypatch.setenv("JUPYTERLITE_JOBS", env)
+
+    app = LiteBuildApp()
+    app.initialize(argv=argv)
+    assert app.lite_manager.jobs == expected
@@ -0,0 +1,65 @@
+"""tests of the JSON codec"""
+
+import datetime as dt
+import json
+
+import pytest
+
+from jupyterlite_core import codec
+from jupyterlite_core.constants import JSON_FMT
+from jupyterlite_core.optional import has_optional_dependency
+
+BACKENDS = [
+    "json",
+    *[backend for backend in ["orjson", "msgspec"] if has_optional_dependency(backend)],
+]
+
+DOCS = [
+    {},
+    [],
+    {"b": [], "a": {}, "c": [{"z": None, "y": True, "x": False}]},
+    {"text": 'ascii \b\f\n\r\t\x1f "quoted" \\ / \x7f é \u2028 😀 日本'},
+    {"numbers": [0, -1, 2**63, 2**64, 10**30, 0.1, 1.5, 1e16, 1.5e-7, -2.5e300]},
+    {"small": [1e-4, 1e-5, -9.9e-5, 1.23456789e-5, 10.00001]},
+    {"hex": "3e4a", "sha256": "1e1" * 20},
+]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("compact", [True, False])
+@pytest.mark.parametrize("doc", DOCS)
+def test_codec_dumps(backend, compact, doc):
+    """is the output the same as ``json``, whichever backend is used"""
+    fmt = codec.JSON_COMPACT if compact else JSON_FMT
+    expected = json.dumps(doc, **fmt)
+    text = codec.dumps(doc, compact=compact, backend=backend)
+    assert text == expected
+    assert codec.loads(text, backend=backend) == json.loads(expected)
+    assert codec.loads(text.encode("utf-8"), backend=backend) == json.loads(expected)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_codec_default(backend):
+    """are datetimes and non-``str`` keys written as by ``json``"""
+    now = dt.datetime(2022, 2, 2, 2, 2, 2, 22, tzinfo=dt.timezone.utc)
+    doc = {"created": now, "counts": {2: "two", 1: "one"}}
+
+    def default(value):
+        if isinstance(value, dt.datetime):
+            return value.isoformat().replace("+00:00", "Z")
+        raise TypeError(value)
+
+    expected = json.dumps(doc, **JSON_FMT, default=default)
+    assert codec.dumps(doc, default=default, backend=backend) == expected
+
+    with pytest.raises(TypeError):
+        codec.dumps(doc, backend=backend)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_codec_loads_errors(backend):
+    """are invalid documents reported as by ``json``"""
+    assert codec.loads("[NaN]", backend=backend) == json.loads("[NaN]")
+
+    with pytest.raises(json.JSONDecodeError):
+        codec.loads('{"a": ', backend=backend)
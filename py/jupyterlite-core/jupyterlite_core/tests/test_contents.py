@@ -100,7 +100,7 @@ def test_contents_missing_jupyter_server(
     monkeypatch,
 ):
     """
-    Test that an error is raised when contents are provided but jupyter_server is not installed
+    Test that contents are indexed when jupyter_server is not installed
     """
     # Create a test file to be used as contents
     test_contents = an_empty_lite_dir / "test_contents"
@@ -116,14 +116,12 @@ def test_contents_missing_jupyter_server(
         cwd=str(an_empty_lite_dir),
     )
 
-    # The build should fail
-    assert not result.success
+    # The build should succeed
+    assert result.success
 
-    # Check if the expected error message is in the output
-    expected_error = (
-        "jupyter-server is not installed. You cannot add custom content to jupyterlite."
-    )
-    assert expected_error in result.stdout or expected_error in result.stderr
+    root_contents_json = an_empty_lite_dir / "_output/api/contents/all.json"
+    root_contents = json.loads(root_contents_json.read_text(encoding="utf-8"))
+    assert [child["name"] for child in root_contents["content"]] == ["test_file.txt"]
 
 
 def test_contents_resolved_relative_to_lite_dir(
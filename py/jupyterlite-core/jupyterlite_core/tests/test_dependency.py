@@ -0,0 +1,89 @@
+"""tests of the doit dependency checker and store"""
+
+import os
+import sqlite3
+
+from jupyterlite_core.dependency import STORE_MAGIC, LiteDependencyStore, LiteFileChecker
+
+
+class FakeCodec:
+    def encode(self, data):
+        raise NotImplementedError()
+
+    def decode(self, data):
+        raise NotImplementedError()
+
+
+def test_checker_fast_path(tmp_path):
+    """is a file with the same stat trusted, and a touched one hashed"""
+    checker = LiteFileChecker()
+    dep = tmp_path / "dep.txt"
+    dep.write_text("hello", encoding="utf-8")
+    state = checker.get_state(str(dep), None)
+
+    assert checker.get_state(str(dep), state) is None, "unchanged state should not be saved"
+    assert not checker.check_modified(str(dep), dep.stat(), state)
+
+    os.utime(dep, ns=(state[1] + 10**9, state[1] + 10**9))
+    assert not checker.check_modified(str(dep), dep.stat(), state), "content is the same"
+
+    dep.write_text("world", encoding="utf-8")
+    assert checker.check_modified(str(dep), dep.stat(), state), "content is different"
+
+    dep.write_text("hello world", encoding="utf-8")
+    assert checker.check_modified(str(dep), dep.stat(), state), "size is different"
+
+
+def test_store_roundtrip(tmp_path):
+    """is the store only written when changed, and read back"""
+    db_path = tmp_path / "deps.db"
+    store = LiteDependencyStore(str(db_path), FakeCodec())
+    store.set("task", "deps:", ("a", "b"))
+    store.set("task", "a", [1, 2, 3, "xxh:0"])
+    store.dump()
+
+    assert db_path.read_bytes().startswith(STORE_MAGIC)
+    mtime = db_path.stat().st_mtime_ns
+
+    store = LiteDependencyStore(str(db_path), FakeCodec())
+    assert store.in_("task")
+    assert store.get("task", "deps:") == ("a", "b")
+    assert store.get("task", "missing") is None
+    assert store.get("missing", "a") is None
+    store.set("task", "a", [1, 2, 3, "xxh:0"])
+    store.dump()
+    assert db_path.stat().st_mtime_ns == mtime, "unchanged store should not be written"
+
+    store.remove("task")
+    store.dump()
+    assert not LiteDependencyStore(str(db_path), FakeCodec()).in_("task")
+
+
+def test_store_replaces_sqlite(tmp_path):
+    """is a dependency file from the previous sqlite3 backend replaced"""
+    db_path = tmp_path / "deps.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("create table doit (task_id text not null primary key, task_data json)")
+    conn.commit()
+    conn.close()
+
+    store = LiteDependencyStore(str(db_path), FakeCodec())
+    assert not store.in_("task")
+    store.dump()
+    assert db_path.read_bytes().startswith(STORE_MAGIC)
+
+
+def test_store_read_only(tmp_path):
+    """is a read-only store never written, even if missing or changed"""
+    db_path = tmp_path / "deps.db"
+    store = LiteDependencyStore(str(db_path), FakeCodec(), read_only=True)
+    store.set("task", "a", [1, 2, 3, "xxh:0"])
+    store.dump()
+    assert not db_path.exists()
+
+    LiteDependencyStore(str(db_path), FakeCodec()).dump()
+    data = db_path.read_bytes()
+    store = LiteDependencyStore(str(db_path), FakeCodec(), read_only=True)
+    store.remove_all()
+    store.dump()
+    assert db_path.read_bytes() == data
@@ -0,0 +1,160 @@
+"""tests of downloading remote files"""
+
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from jupyterlite_core.download import META_SUFFIX, PART_SUFFIX
+from jupyterlite_core.manager import LiteManager
+
+CONTENT = b"0123456789" * 1000
+ETAG = '"v1"'
+SHA256 = hashlib.sha256(CONTENT).hexdigest()
+
+
+@pytest.fixture
+def a_download_server(an_unused_port):
+    """serve ``CONTENT`` with ``ETag`` and ``Range`` support, recording requests"""
+    requests = []
+    connections = set()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            requests.append((self.path, dict(self.headers)))
+            connections.add(self.client_address)
+
+            if self.path in ["/redirect.whl", "/elsewhere.whl"]:
+                location = "/a.whl"
+                if self.path == "/elsewhere.whl":
+                    location = f"http://localhost:{self.server.server_port}{location}"
+                self.send_response(302)
+                self.send_header("Location", location)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            if self.headers.get("If-None-Match") == ETAG:
+                self.send_response(304)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            body, status = CONTENT, 200
+            range_header = self.headers.get("Range")
+
+            if range_header and self.headers.get("If-Range") == ETAG:
+                start = int(range_header.split("=")[1].split("-")[0])
+                body, status = CONTENT[start:], 206
+
+            self.send_response(status)
+            self.send_header("ETag", ETAG)
+            self.send_header("Content-Length", str(len(body)))
+            if status == 206:
+                self.send_header("Content-Range", f"bytes {start}-{len(CONTENT) - 1}/*")
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", an_unused_port), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield f"http://127.0.0.1:{an_unused_port}", requests, connections
+
+    server.shutdown()
+
+
+def test_download_many(tmp_path, a_download_server):
+    """are many files downloaded, following redirects, on reused connections"""
+    url, requests, connections = a_download_server
+    downloader = LiteManager(lite_dir=tmp_path).downloader
+    downloader.max_workers = 2
+    names = [f"{i}.whl" for i in range(6)]
+
+    downloader.fetch_all([(f"{url}/{name}", tmp_path / name) for name in names])
+    downloader.fetch(f"{url}/redirect.whl", tmp_path / "redirect.whl")
+
+    for name in [*names, "redirect.whl"]:
+        assert (tmp_path / name).read_bytes() == CONTENT
+
+    assert len(requests) == 8
+    assert len(connections) <= 3, "connections should be reused"
+
+    # already downloaded
+    downloader.fetch(f"{url}/0.whl", tmp_path / "0.whl")
+    assert len(requests) == 8
+
+
+def test_download_redirect_headers(tmp_path, a_download_server):
+    """are the configured headers only sent to the host of the first URL"""
+    url, requests, _ = a_download_server
+    downloader = LiteManager(lite_dir=tmp_path).downloader
+    downloader.headers = {**downloader.headers, "Authorization": "Bearer secret"}
+
+    downloader.fetch(f"{url}/redirect.whl", tmp_path / "redirect.whl")
+    assert [headers["Authorization"] for _, headers in requests] == ["Bearer secret"] * 2
+
+    downloader.fetch(f"{url}/elsewhere.whl", tmp_path / "elsewhere.whl")
+    assert (tmp_path / "elsewhere.whl").read_bytes() == CONTENT
+    (_, first), (_, redirected) = requests[-2:]
+    assert first["Authorization"] == "Bearer secret"
+    assert "Authorization" not in redirected, "credentials should not leak to another host"
+    assert redirected["User-Agent"] == first["User-Agent"]
+
+
+def test_download_resume_and_revalidate(tmp_path, a_download_server):
+    """is a partial download resumed, and a complete one revalidated"""
+    url, requests, _ = a_download_server
+    downloader = LiteManager(lite_dir=tmp_path).downloader
+    dest = tmp_path / "a.whl"
+
+    (tmp_path / f"a.whl{PART_SUFFIX}").write_bytes(CONTENT[:1234])
+    meta = dict(partial=dict(etag=ETAG))
+    (tmp_path / f"a.whl{META_SUFFIX}").write_text(json.dumps(meta), encoding="utf-8")
+
+    assert downloader.fetch(f"{url}/a.whl#sha256={SHA256}", dest)
+    assert requests[-1][1]["Range"] == "bytes=1234-"
+    assert dest.read_bytes() == CONTENT
+    assert not (tmp_path / f"a.whl{PART_SUFFIX}").exists()
+
+    downloader.revalidate = True
+    assert not downloader.fetch(f"{url}/a.whl", dest)
+    assert requests[-1][1]["If-None-Match"] == ETAG
+
+
+def test_download_checksum(tmp_path, a_download_server):
+    """is a download with the wrong pinned checksum rejected"""
+    url, _, _ = a_download_server
+    downloader = LiteManager(lite_dir=tmp_path).downloader
+    dest = tmp_path / "a.whl"
+
+    with pytest.raises(ValueError, match="was expected"):
+        downloader.fetch(f"{url}/a.whl#sha256={'0' * 64}", dest)
+
+    assert not dest.exists()
+    assert not (tmp_path / f"a.whl{PART_SUFFIX}").exists()
+
+
+def test_download_http_proxy(tmp_path, a_download_server, monkeypatch):
+    """is a plain ``http`` proxy asked for the whole URL, with its credentials"""
+    url, requests, _ = a_download_server
+    monkeypatch.setenv("http_proxy", url.replace("http://", "http://user:p%40ss@"))
+    monkeypatch.delenv("no_proxy", raising=False)
+    monkeypatch.delenv("NO_PROXY", raising=False)
+    downloader = LiteManager(lite_dir=tmp_path).downloader
+
+    downloader.fetch_all([("http://example.invalid/a.whl", tmp_path / "a.whl")])
+
+    assert (tmp_path / "a.whl").read_bytes() == CONTENT
+    path, headers = requests[-1]
+    assert path == "http://example.invalid/a.whl"
+    assert headers["Proxy-Authorization"] == "Basic dXNlcjpwQHNz"
+    assert headers["Host"] == "example.invalid"
+    assert downloader._conns == {}, "the connections of the pool should be closed"
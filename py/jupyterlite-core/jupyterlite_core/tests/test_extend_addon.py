@@ -21,6 +21,12 @@ MOCK_FLAGS = {
     ),
 }
 
+ADDON_CACHES = [
+    addons.get_addon_implementations,
+    addons.get_addon_entry_points,
+    addons.get_addon_manifest,
+]
+
 MOCK_ARGV_CONFIG = [
     [["--some-other-feature=1"], {"some_feature": 42}],
     [[], {"some_other_feature": 1, "some_feature": 42}],
@@ -65,7 +71,9 @@ def a_configured_mock_addon(request, only_a_mock_addon, an_empty_lite_dir, monke
 
 
 @pytest.fixture
-def only_a_mock_addon():
+def only_a_mock_addon(monkeypatch):
+    monkeypatch.setenv(addons.ENV_NO_ADDON_MANIFEST, "1")
+
     class MockAddon(BaseAddon):
         __all__ = ["status"]
 
@@ -78,8 +86,18 @@ def only_a_mock_addon():
         def status(self, manager):
             yield dict(name="hello:world", actions=[lambda: print("hello world")])
 
+    # don't see the real addons of earlier tests, or leave the mock addon for later ones
+    clear_addon_caches()
+
     with mock.patch.multiple(
         addons,
         entry_points=lambda group: [Bunch(name="mock", load=lambda: MockAddon)],
     ):
         yield
+
+    clear_addon_caches()
+
+
+def clear_addon_caches():
+    for cached in ADDON_CACHES:
+        cached.cache_clear()
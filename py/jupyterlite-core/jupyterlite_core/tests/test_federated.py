@@ -2,8 +2,13 @@
 
 import json
 import shutil
+import warnings
 
-from pytest import mark
+from pytest import mark, raises
+
+from jupyterlite_core.addons.federated_extensions import FederatedExtensionAddon
+from jupyterlite_core.manager import LiteManager
+from jupyterlite_core.optional import has_optional_dependency
 
 from .conftest import CONDA_PKGS, FIXTURES, WHEELS
 
@@ -13,11 +18,19 @@ try:  # pragma: no cover
 except Exception:  # pragma: no cover
     HAS_LIBARCHIVE = False
 
+try:  # pragma: no cover
+    __import__("zstandard")
+    HAS_ZSTANDARD = True
+except Exception:  # pragma: no cover
+    HAS_ZSTANDARD = False
+
+CAN_EXTRACT_CONDA = HAS_LIBARCHIVE or HAS_ZSTANDARD
+
 
 @mark.parametrize("remote", [True, False])
 @mark.parametrize(
     "ext_name",
-    [p.name for p in [*WHEELS, *CONDA_PKGS] if HAS_LIBARCHIVE or not p.name.endswith(".conda")],
+    [p.name for p in [*WHEELS, *CONDA_PKGS] if CAN_EXTRACT_CONDA or not p.name.endswith(".conda")],
 )
 @mark.parametrize("use_libarchive", [True, False] if HAS_LIBARCHIVE else [False])
 def test_federated_extensions(  # noqa: PLR0913
@@ -47,7 +60,7 @@ def test_federated_extensions(  # noqa: PLR0913
 
     build = script_runner.run(["jupyter", "lite", "build", *extra_args], cwd=str(an_empty_lite_dir))
 
-    if ext_name.endswith(".conda") and not use_libarchive:
+    if ext_name.endswith(".conda") and not (use_libarchive or HAS_ZSTANDARD):
         assert not build.success
         return
 
@@ -70,3 +83,38 @@ def test_federated_extensions(  # noqa: PLR0913
 
     lab_build = output / "build"
     assert (lab_build / "themes/the-smallest-extension/index.css").exists()
+
+
+@mark.skipif(not HAS_ZSTANDARD, reason="requires zstandard")
+def test_conda_stream(tmp_path):
+    """are only the labextensions streamed out of a .conda package"""
+    conda_pkg = next(p for p in CONDA_PKGS if p.name.endswith(".conda"))
+    manager = LiteManager(lite_dir=tmp_path)
+    addon = FederatedExtensionAddon(manager=manager)
+    unarchived = tmp_path / "unarchived"
+    hashfile = tmp_path / "SHA256SUMS"
+
+    addon.unpack_conda2_extensions(conda_pkg, unarchived, hashfile)
+
+    rel_paths = {p.relative_to(unarchived).as_posix() for p in unarchived.rglob("*.json")}
+    assert "share/jupyter/labextensions/the-smallest-extension/package.json" in rel_paths
+    assert all(p.startswith("share/jupyter/labextensions/") for p in rel_paths)
+    assert hashfile.read_text(encoding="utf-8").endswith(f"  {conda_pkg.name}")
+
+
+def test_conda_no_readers(tmp_path, monkeypatch):
+    """is ``zstandard`` only suggested when ``libarchive`` can't be used, either"""
+    conda_pkg = next(p for p in CONDA_PKGS if p.name.endswith(".conda"))
+    monkeypatch.setenv("JUPYTERLITE_NO_ZSTANDARD", "1")
+    monkeypatch.setenv("JUPYTERLITE_NO_COMPRESSION_ZSTD", "1")
+    has_optional_dependency.cache_clear()
+    addon = FederatedExtensionAddon(manager=LiteManager(lite_dir=tmp_path, no_libarchive=True))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert addon.zstd_reader is None
+
+    with raises(RuntimeError, match="pip install zstandard"):
+        list(addon.copy_conda2_extensions(conda_pkg))
+
+    has_optional_dependency.cache_clear()
@@ -0,0 +1,55 @@
+"""tests of memoized hashing of files"""
+
+import hashlib
+import os
+
+import jupyterlite_core.hashing
+from jupyterlite_core import codec
+from jupyterlite_core.manager import LiteManager
+
+
+def test_hasher_memoize(tmp_path, monkeypatch):
+    """are digests remembered between managers, until files change"""
+    paths = []
+    for i in range(10):
+        path = tmp_path / f"files/{i}.txt"
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(f"{i}" * 1000, encoding="utf-8")
+        paths += [path]
+
+    expected = {p: hashlib.sha256(p.read_bytes()).hexdigest() for p in paths}
+
+    hasher = LiteManager(lite_dir=tmp_path).hasher
+    assert hasher.sha256_all(paths) == expected
+    assert not hasher.cache_path.exists(), "digests should only be saved when asked"
+    hasher.save()
+    assert hasher.cache_path.exists()
+
+    hashed = []
+    real_sha256_file = jupyterlite_core.hashing.sha256_file
+
+    def counting_sha256_file(path):
+        hashed.append(path)
+        return real_sha256_file(path)
+
+    monkeypatch.setattr(jupyterlite_core.hashing, "sha256_file", counting_sha256_file)
+
+    # a new manager reads the cached digests
+    hasher = LiteManager(lite_dir=tmp_path).hasher
+    assert hasher.sha256_all(paths) == expected
+    assert hashed == []
+
+    # a changed file, with the same size and time, is hashed again
+    stat = paths[0].stat()
+    paths[0].write_text("x" * 1000, encoding="utf-8")
+    os.utime(paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert hasher.sha256(paths[0]) == hashlib.sha256(b"x" * 1000).hexdigest()
+    assert hashed == [str(paths[0])]
+
+    # the digests of removed files are forgotten
+    paths[-1].unlink()
+    hasher.save()
+    assert sorted(codec.read_json(hasher.cache_path)["digests"]) == sorted(
+        str(p) for p in paths[:-1]
+    )
@@ -0,0 +1,249 @@
+"""tests of the built-in Contents API indexer"""
+
+import json
+import os
+from importlib.metadata import entry_points
+
+import pytest
+from traitlets.config import Config
+
+from jupyterlite_core.constants import ADDON_ENTRYPOINT, ALL_JSON
+from jupyterlite_core.indexer import LiteContentsIndexer, format_time, guess_mimetype
+from jupyterlite_core.manager import LiteManager
+
+FILES = [
+    "README.md",
+    "data/a.csv",
+    "data/archive.tar.gz",
+    "data/deep/er/c.txt",
+    "data/x.pyc",
+    "notebooks/Untitled.ipynb",
+    "notebooks/1.ipynb",
+    "notebooks/.hidden.txt",
+    ".binder/postBuild",
+    "weird name/ünicode.json",
+]
+
+
+@pytest.fixture
+def a_files_dir(tmp_path):
+    root = tmp_path / "files"
+    for rel in FILES:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel, encoding="utf-8")
+    (root / "empty").mkdir()
+    return root
+
+
+def server_listing(root, rel, config):
+    """get a listing from ``jupyter_server``, in the form written by the indexer"""
+    manager_module = pytest.importorskip("jupyter_server.services.contents.filemanager")
+    manager = manager_module.FileContentsManager(root_dir=str(root), config=config)
+    listing = manager.get(rel, content=True)
+    listing["content"] = sorted(listing["content"], key=lambda child: child["name"])
+    text = json.dumps(listing, default=lambda value: value.isoformat().replace("+00:00", "Z"))
+    return json.loads(text)
+
+
+def index(indexer, root, api_dir, source_date_epoch=None):
+    """write the listing of every folder, as the contents addon does, returning hidden ones"""
+    pending = [""]
+    hidden = []
+
+    while pending:
+        rel = pending.pop()
+        api_path = api_dir / rel / ALL_JSON
+        subfolders, hidden_subfolders = indexer.write_listing(
+            root / rel, rel, api_path, source_date_epoch
+        )
+        pending += subfolders
+        hidden += hidden_subfolders
+
+    return sorted(hidden)
+
+
+@pytest.mark.parametrize("allow_hidden", [True, False])
+def test_indexer_same_as_server(tmp_path, a_files_dir, allow_hidden):
+    """are the listings the same as those of ``jupyter_server``"""
+    config = Config({"ContentsManager": {"allow_hidden": allow_hidden}})
+    api_dir = tmp_path / "api"
+    indexer = LiteContentsIndexer(config=config)
+
+    hidden = index(indexer, a_files_dir, api_dir)
+
+    assert hidden == ([] if allow_hidden else [".binder"])
+    folders = ["data", "data/deep", "data/deep/er", "empty", "notebooks", "weird name"]
+    if allow_hidden:
+        folders += ["", ".binder"]
+
+    written = sorted(p.parent.relative_to(api_dir).as_posix() for p in api_dir.rglob("all.json"))
+    assert written == sorted("." if rel == "" else rel for rel in folders)
+
+    for rel in folders:
+        listing = json.loads((api_dir / rel / "all.json").read_text(encoding="utf-8"))
+        assert listing == server_listing(a_files_dir, rel, config), rel
+
+    root_listing = indexer.listing(a_files_dir, "")[0]
+    assert root_listing == server_listing(a_files_dir, "", config)
+
+
+def test_indexer_hide_globs(tmp_path, a_files_dir):
+    """are names matching the ``hide_globs`` left out, but their folders still indexed"""
+    indexer = LiteContentsIndexer(hide_globs=["*.csv", "deep"])
+    index(indexer, a_files_dir, tmp_path / "api")
+    listing = json.loads((tmp_path / "api/data/all.json").read_text(encoding="utf-8"))
+    assert [child["name"] for child in listing["content"]] == ["archive.tar.gz", "x.pyc"]
+    assert (tmp_path / "api/data/deep/er/all.json").exists()
+
+    assert LiteContentsIndexer().hide_globs == LiteContentsIndexer(config=Config()).hide_globs
+    config = Config({"FileContentsManager": {"hide_globs": ["*.md"]}})
+    assert LiteContentsIndexer(config=config).hide_globs == ["*.md"]
+
+
+def test_indexer_source_date_epoch(tmp_path, a_files_dir):
+    """are times after a ``source_date_epoch`` clamped to it"""
+    sde = 1_600_000_000
+    os.utime(a_files_dir / "README.md", (sde - 1, sde - 1))
+    index(LiteContentsIndexer(allow_hidden=True), a_files_dir, tmp_path / "api", sde)
+    listing = json.loads((tmp_path / "api/all.json").read_text(encoding="utf-8"))
+    clamped = format_time(sde)
+    assert clamped == "2020-09-13T12:26:40Z"
+    assert listing["last_modified"] == clamped
+    by_name = {child["name"]: child for child in listing["content"]}
+    assert by_name["README.md"]["last_modified"] == format_time(sde - 1)
+    assert by_name["data"]["last_modified"] == clamped
+
+
+def test_indexer_hidden_not_written(tmp_path, a_files_dir):
+    """is a folder with hidden subfolders left unwritten"""
+    hidden = index(LiteContentsIndexer(), a_files_dir, tmp_path / "api")
+    assert hidden == [".binder"]
+    assert not (tmp_path / "api/all.json").exists()
+    assert not (tmp_path / "api/.binder/all.json").exists()
+
+
+def test_indexer_pages(tmp_path, a_files_dir):
+    """is a large listing split into pages, which are removed when no longer needed"""
+    api_path = tmp_path / "api/data/all.json"
+    whole = LiteContentsIndexer().listing(a_files_dir / "data", "data")[0]
+    assert len(whole["content"]) == 3
+
+    indexer = LiteContentsIndexer(page_size=2)
+    indexer.write_listing(a_files_dir / "data", "data", api_path)
+    head = json.loads(api_path.read_text(encoding="utf-8"))
+    assert head["content"] is None
+    assert head["count"] == 3
+    assert head["pages"] == [
+        dict(url="all.0.json", count=2, first="a.csv", last="archive.tar.gz"),
+        dict(url="all.1.json", count=1, first="deep", last="deep"),
+    ]
+    assert {k: v for k, v in head.items() if k not in {"count", "pages"}} == {
+        **whole,
+        "content": None,
+        "format": None,
+    }
+    content = []
+    for page in head["pages"]:
+        page_path = api_path.parent / page["url"]
+        content += json.loads(page_path.read_text(encoding="utf-8"))["content"]
+    assert content == whole["content"]
+    assert indexer.read_pages(api_path) == whole
+    assert indexer.outputs(api_path) == [
+        api_path,
+        api_path.parent / "all.0.json",
+        api_path.parent / "all.1.json",
+    ]
+
+    # only files are pages, even if a folder is named like one
+    (api_path.parent / "all.2.json").mkdir()
+    LiteContentsIndexer(page_size=3).write_listing(a_files_dir / "data", "data", api_path)
+    assert json.loads(api_path.read_text(encoding="utf-8")) == whole
+    assert indexer.outputs(api_path) == [api_path]
+    assert (api_path.parent / "all.2.json").is_dir()
+
+
+def test_indexer_digest(a_files_dir):
+    """does the digest of a folder only change with the folder, or its children"""
+    sde = 1_600_000_000
+    indexer = LiteContentsIndexer()
+    folders = ["", "data", "data/deep", "data/deep/er"]
+
+    def digests(**kwargs):
+        return {
+            rel: indexer.digest(
+                os.stat(a_files_dir / rel),
+                {child.name: child.stat() for child in os.scandir(a_files_dir / rel)},
+                **kwargs,
+            )
+            for rel in folders
+        }
+
+    before = digests(source_date_epoch=sde)
+    assert before == digests(source_date_epoch=sde)
+    assert before != digests()
+
+    (a_files_dir / "data/deep/er/c.txt").write_text("changed", encoding="utf-8")
+    after = digests(source_date_epoch=sde)
+    assert [rel for rel in folders if before[rel] != after[rel]] == ["data/deep/er"]
+
+
+def test_contents_reindex_one_folder(tmp_path, source_date_epoch):
+    """does changing one file re-index only the listing of its folder"""
+    files = tmp_path / "files"
+    for rel in ["a/b/x.txt", "c/y.txt", "z.txt"]:
+        (files / rel).parent.mkdir(parents=True, exist_ok=True)
+        (files / rel).write_text(rel, encoding="utf-8")
+    names = [point.name for point in entry_points(group=ADDON_ENTRYPOINT)]
+    api_dir = tmp_path / "_output/api/contents"
+    # usually written by the other addons
+    api_dir.mkdir(parents=True)
+    (tmp_path / "_output/jupyter-lite.json").write_text("{}", encoding="utf-8")
+
+    def build():
+        manager = LiteManager(
+            lite_dir=tmp_path,
+            contents=[files],
+            disable_addons=[name for name in names if name != "contents"],
+            source_date_epoch=int(source_date_epoch),
+        )
+        manager.initialize()
+        assert manager.doit_run("post_build") == 0
+        return {
+            path.relative_to(api_dir).as_posix(): path.read_text(encoding="utf-8")
+            for path in api_dir.rglob("all.json")
+        }
+
+    before = build()
+    assert sorted(before) == ["a/all.json", "a/b/all.json", "all.json", "c/all.json"]
+
+    written = []
+    real_write_listing = LiteContentsIndexer.write_listing
+
+    def spy_write_listing(self, folder, rel, *args, **kwargs):
+        written.append(rel)
+        return real_write_listing(self, folder, rel, *args, **kwargs)
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(LiteContentsIndexer, "write_listing", spy_write_listing)
+        assert build() == before
+        assert written == []
+
+        (files / "a/b/x.txt").write_text("changed", encoding="utf-8")
+        after = build()
+
+    assert written == ["a/b"]
+    assert [rel for rel in before if before[rel] != after[rel]] == ["a/b/all.json"]
+
+
+@pytest.mark.parametrize(
+    "name,expected",
+    [
+        ["a.csv", "text/csv"],
+        ["a.b.c.tar.gz", "application/x-tar"],
+        ["no-extension", None],
+    ],
+)
+def test_guess_mimetype(name, expected):
+    """are MIME types guessed as by ``mimetypes``"""
+    assert guess_mimetype(name) == expected
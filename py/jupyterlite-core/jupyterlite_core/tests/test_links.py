@@ -0,0 +1,147 @@
+"""tests of copying files, and folders, as links"""
+
+import os
+import tarfile
+
+import pytest
+
+from jupyterlite_core.addons.archive import ArchiveAddon
+from jupyterlite_core.addons.base import BaseAddon
+from jupyterlite_core.links import MODE_LINKERS, copy_file
+from jupyterlite_core.manager import LiteManager
+
+OLD_TIME = 1_000_000_000
+
+
+@pytest.fixture
+def src_file(tmp_path):
+    src = tmp_path / "src" / "a.txt"
+    src.parent.mkdir()
+    src.write_text("a", encoding="utf-8")
+    return src
+
+
+@pytest.mark.parametrize("mode", ["copy", "hardlink", "reflink", "symlink", "auto"])
+def test_copy_file(src_file, tmp_path, mode):
+    """does every mode make a file with the same content, falling back to copying"""
+    dest = tmp_path / f"{mode}.txt"
+    done = copy_file(src_file, dest, mode)
+    assert dest.read_text(encoding="utf-8") == "a"
+    assert done in ["copy", *MODE_LINKERS[mode]]
+
+    if done == "hardlink":
+        assert dest.stat().st_ino == src_file.stat().st_ino
+    elif done == "symlink":
+        assert dest.is_symlink()
+    else:
+        assert not dest.is_symlink()
+        assert dest.stat().st_mtime == src_file.stat().st_mtime
+
+
+@pytest.mark.parametrize("mode", ["hardlink", "symlink"])
+def test_copy_one_clamp(src_file, tmp_path, mode):
+    """are linked files copied before their time is changed"""
+    manager = LiteManager(
+        lite_dir=tmp_path,
+        copy_mode=mode,
+        source_date_epoch=OLD_TIME,
+    )
+    addon = BaseAddon(manager=manager)
+    src_mtime = src_file.stat().st_mtime
+    dest = tmp_path / "out" / "files"
+
+    addon.copy_one(src_file.parent, dest)
+    manager.clamp_timestamps()
+
+    assert (dest / "a.txt").read_text(encoding="utf-8") == "a"
+    assert not (dest / "a.txt").is_symlink()
+    assert (dest / "a.txt").stat().st_mtime == OLD_TIME
+    assert src_file.stat().st_mtime == src_mtime
+
+
+def test_copy_one_link(src_file, tmp_path):
+    """are files linked, and kept linked, without a source date epoch"""
+    manager = LiteManager(lite_dir=tmp_path, copy_mode="hardlink")
+    addon = BaseAddon(manager=manager)
+    dest = tmp_path / "out" / "a.txt"
+
+    addon.copy_one(src_file, dest)
+    addon.copy_one(src_file, dest)
+
+    assert dest.stat().st_ino == src_file.stat().st_ino
+
+
+@pytest.mark.parametrize("sync_mode", ["mtime", "hash"])
+@pytest.mark.parametrize("sde", [None, OLD_TIME])
+def test_copy_one_sync(tmp_path, sync_mode, sde):
+    """are only new and changed files copied into an existing folder"""
+    src = tmp_path / "src"
+    for name in [
+        "same.txt",
+        "changed.txt",
+        "edited.txt",
+        "removed.txt",
+        "old/gone.txt",
+        "a.js.map",
+    ]:
+        (src / name).parent.mkdir(parents=True, exist_ok=True)
+        (src / name).write_text(name, encoding="utf-8")
+
+    manager = LiteManager(
+        lite_dir=tmp_path, sync_mode=sync_mode, source_date_epoch=sde, no_sourcemaps=True
+    )
+    addon = BaseAddon(manager=manager)
+    dest = tmp_path / "out"
+    addon.copy_one(src, dest)
+    manager.clamp_timestamps()
+    before = {p.name: p.stat() for p in dest.rglob("*.txt")}
+    assert not (dest / "a.js.map").exists()
+
+    (src / "changed.txt").write_text("CHANGED!", encoding="utf-8")
+    # the same size, which a copy clamped to the source date epoch can't tell apart
+    (src / "edited.txt").write_text("EDITED.TXT", encoding="utf-8")
+    (src / "removed.txt").unlink()
+    (src / "old/gone.txt").unlink()
+    (src / "old").rmdir()
+    (src / "new/added.txt").parent.mkdir()
+    (src / "new/added.txt").write_text("added", encoding="utf-8")
+    (dest / "a.js.map").write_text("stale", encoding="utf-8")
+
+    if sync_mode == "hash":
+        # the same content, but a different time, is kept
+        os.utime(src / "same.txt", (OLD_TIME - 1, OLD_TIME - 1))
+
+    addon.copy_one(src, dest)
+    manager.clamp_timestamps()
+
+    assert sorted(p.relative_to(dest).as_posix() for p in dest.rglob("*")) == [
+        "changed.txt",
+        "edited.txt",
+        "new",
+        "new/added.txt",
+        "same.txt",
+    ]
+    assert (dest / "changed.txt").read_text(encoding="utf-8") == "CHANGED!"
+    assert (dest / "edited.txt").read_text(encoding="utf-8") == "EDITED.TXT"
+    same = (dest / "same.txt").stat()
+    assert (same.st_ino, same.st_mtime_ns) == (
+        before["same.txt"].st_ino,
+        before["same.txt"].st_mtime_ns,
+    )
+
+
+def test_archive_symlinks(src_file, tmp_path):
+    """is the archive a real file, holding the content of linked files"""
+    manager = LiteManager(lite_dir=tmp_path, copy_mode="symlink")
+    addon = ArchiveAddon(manager=manager)
+    root = tmp_path / "out"
+    addon.copy_one(src_file, root / "files" / "a.txt")
+    tarball = tmp_path / "site.tgz"
+
+    addon.make_archive_stdlib(tarball, root, [])
+
+    assert not tarball.is_symlink()
+    with tarfile.open(tarball) as tar:
+        member = tar.getmember("package/files/a.txt")
+        assert member.isfile()
+        assert tar.extractfile(member).read() == b"a"
@@ -0,0 +1,109 @@
+"""tests of the indexed contents scanner"""
+
+import os
+import re
+from pathlib import Path
+
+import pytest
+
+import jupyterlite_core.scanner
+from jupyterlite_core.manager import LiteManager
+from jupyterlite_core.scanner import compile_ignores
+
+FILES = [
+    "README.md",
+    "data/a.csv",
+    "data/b.pyc",
+    "data/deep/er/c.txt",
+    "node_modules/pkg/index.js",
+    "node_modules/pkg/lib/more.js",
+    "_build/html/index.html",
+    ".git/HEAD",
+    ".gitignore",
+    "notebooks/Untitled.ipynb",
+    "notebooks/untitled.txt",
+    "notebooks/1.ipynb",
+    "notebooks/.ipynb_checkpoints/1-checkpoint.ipynb",
+    "weird/$dollar.txt",
+]
+
+
+def old_file_src_dest(contents, patterns):
+    """the contents found by a recursive ``glob``, with every pattern tested every time"""
+    found = {}
+
+    def maybe_add_one_path(path, root=None):
+        if root is not None:
+            rel_posix_path = f"/{path.relative_to(root).as_posix()}"
+            if any(re.findall(ignore, rel_posix_path) for ignore in patterns):
+                return
+        if path.is_dir():
+            for child in path.glob("*"):
+                yield from maybe_add_one_path(child, root or path)
+        else:
+            yield path
+
+    for path in reversed(contents):
+        for from_path in maybe_add_one_path(path):
+            stem = from_path.relative_to(path).as_posix() if path.is_dir() else path.name
+            found.setdefault(stem, from_path)
+
+    return [(found[rel], rel) for rel in sorted(found)]
+
+
+@pytest.fixture
+def a_contents_dir(tmp_path):
+    root = tmp_path / "contents"
+    for rel in FILES:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel, encoding="utf-8")
+    return root
+
+
+@pytest.mark.parametrize("extra", [[], [r"/data/deep"], [r"(?i)/readme", r"\.csv\b"]])
+def test_scanner_same_as_glob(tmp_path, a_contents_dir, extra):
+    """are the same files found as by a recursive ``glob``, with fewer folders listed"""
+    other = tmp_path / "other"
+    (other / "data").mkdir(parents=True)
+    (other / "data/a.csv").write_text("other", encoding="utf-8")
+    (other / "data/z.csv").write_text("other", encoding="utf-8")
+    one_file = tmp_path / "one.txt"
+    one_file.write_text("one", encoding="utf-8")
+    contents = [a_contents_dir, other, one_file]
+
+    manager = LiteManager(lite_dir=tmp_path, contents=contents, extra_ignore_contents=extra)
+    patterns = [*manager.ignore_contents, *manager.extra_ignore_contents]
+    scanner = manager.contents_scanner
+
+    files = scanner.files()
+    assert files == old_file_src_dest(contents, patterns)
+    assert ("data/z.csv" in {rel for src, rel in files}) == (r"\.csv\b" not in extra)
+    assert scanner.files() is files
+
+    scanner.reset()
+    assert scanner.files() is not files
+
+
+def test_scanner_prunes(tmp_path, a_contents_dir, monkeypatch):
+    """are ignored folders never listed"""
+    listed = []
+    real_scandir = os.scandir
+
+    def listing_scandir(path):
+        listed.append(Path(path).relative_to(a_contents_dir).as_posix())
+        return real_scandir(path)
+
+    monkeypatch.setattr(jupyterlite_core.scanner.os, "scandir", listing_scandir)
+    manager = LiteManager(lite_dir=tmp_path, contents=[a_contents_dir])
+    manager.contents_scanner.files()
+    assert sorted(listed) == [".", "data", "data/deep", "data/deep/er", "notebooks", "weird"]
+
+
+def test_compile_ignores():
+    """are folders only pruned if everything in them would be ignored"""
+    is_ignored, is_pruned = compile_ignores([r"/build/", r"\.pyc$", r"/(a)\1/"])
+    assert not is_ignored("/build")
+    assert is_ignored("/build/x") and is_pruned("/build/")
+    assert is_ignored("/x.pyc") and not is_pruned("/x.pyc/")
+    assert is_ignored("/aa/b") and is_pruned("/aa/")
@@ -0,0 +1,100 @@
+"""tests of splitting a build between shards, and merging them"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from jupyterlite_core.constants import SHARD_MANIFEST
+
+SHARD_COUNT = 2
+
+
+def sorted_listing(path):
+    """a Contents API listing, in a predictable order"""
+    listing = json.loads(path.read_text(encoding="utf-8"))
+    return {**listing, "content": sorted(listing["content"], key=lambda c: c["name"])}
+
+
+def output_files(output_dir):
+    return sorted(
+        p.relative_to(output_dir).as_posix() for p in output_dir.rglob("*") if p.is_file()
+    )
+
+
+@pytest.mark.parametrize("page_size", [0, 2])
+def test_shards_merge(tmp_path, script_runner, source_date_epoch, page_size):
+    """do merged shards make the same site as a single build"""
+    lite_dir = tmp_path / "site"
+    lite_dir.mkdir()
+    config = {"LiteContentsIndexer": {"page_size": page_size}}
+    (lite_dir / "jupyter_lite_config.json").write_text(json.dumps(config), encoding="utf-8")
+
+    for i in range(12):
+        path = lite_dir / "files" / f"folder-{i % 3}" / f"file-{i}.txt"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"{i}", encoding="utf-8")
+
+    args = ["build", "--source-date-epoch", source_date_epoch]
+    status = script_runner.run(
+        ["jupyter", "lite", *args, "--output-dir", str(tmp_path / "single")], cwd=str(lite_dir)
+    )
+    assert status.success
+
+    # each shard is a separate process, as if on a separate worker
+    procs = []
+    for i in range(SHARD_COUNT):
+        shard_args = [sys.executable, "-m", "jupyterlite_core", *args]
+        shard_args += ["--output-dir", str(tmp_path / f"shard-{i}")]
+        shard_args += ["--shard-count", f"{SHARD_COUNT}", "--shard-index", f"{i}"]
+        procs += [subprocess.Popen(shard_args, cwd=str(lite_dir))]  # noqa: S603
+    assert [proc.wait() for proc in procs] == [0] * SHARD_COUNT
+
+    shard_files = []
+    for i in range(SHARD_COUNT):
+        shard = tmp_path / f"shard-{i}"
+        assert json.loads((shard / SHARD_MANIFEST).read_text(encoding="utf-8"))["shard_index"] == i
+        shard_files += [[*(shard / "files").rglob("*.txt")]]
+
+    assert all(0 < len(files) < 12 for files in shard_files), "files should be split"
+    assert sum(map(len, shard_files)) == 12
+
+    shards = [str(tmp_path / f"shard-{i}") for i in range(SHARD_COUNT)]
+    merged = tmp_path / "merged"
+    status = script_runner.run(
+        ["jupyter", "lite", "merge", *shards, "--output-dir", str(merged)], cwd=str(lite_dir)
+    )
+    assert status.success
+
+    single = tmp_path / "single"
+    assert output_files(merged) == output_files(single)
+
+    for all_json in (single / "api/contents").rglob("all*.json"):
+        rel = all_json.relative_to(single)
+        if page_size:
+            # both written by the same indexer, with the same pages
+            assert (merged / rel).read_text(encoding="utf-8") == all_json.read_text(
+                encoding="utf-8"
+            ), rel
+        else:
+            assert sorted_listing(merged / rel) == sorted_listing(all_json), rel
+
+    pages = [*(merged / "api/contents").rglob("all.*.json")]
+    assert bool(pages) == bool(page_size), "only large folders should have pages"
+
+    for rel in ["jupyter-lite.json", "build/schemas/all_federated.json"]:
+        if (single / rel).exists():
+            assert (merged / rel).read_text(encoding="utf-8") == (single / rel).read_text(
+                encoding="utf-8"
+            ), rel
+
+    merge_args = ["jupyter", "lite", "merge", *shards, "--output-dir", str(merged)]
+    status = script_runner.run(merge_args, cwd=str(lite_dir))
+    assert not status.success, "a merged site should not be replaced without --force"
+    status = script_runner.run([*merge_args, "--force"], cwd=str(lite_dir))
+    assert status.success
+    assert output_files(merged) == output_files(single)
+
+    status = script_runner.run(["jupyter", "lite", "merge", shards[0]], cwd=str(lite_dir))
+    assert not status.success, "a missing shard should not be merged"
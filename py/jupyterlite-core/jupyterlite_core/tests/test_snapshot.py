@@ -0,0 +1,55 @@
+"""tests of the in-memory index of files and folders"""
+
+import shutil
+
+from jupyterlite_core.manager import LiteManager
+
+
+def test_snapshot_query(tmp_path):
+    """are files and folders found from one walk"""
+    for rel_path in ["a.json", "b/c.json", "b/d/e.txt"]:
+        path = tmp_path / "root" / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel_path, encoding="utf-8")
+
+    root = tmp_path / "root"
+    snapshot = LiteManager(lite_dir=tmp_path).snapshot
+
+    assert snapshot.files(root) == [root / "a.json", root / "b/c.json", root / "b/d/e.txt"]
+    assert snapshot.files(root, "*.json") == [root / "a.json", root / "b/c.json"]
+    assert snapshot.files(root / "b") == [root / "b/c.json", root / "b/d/e.txt"]
+    assert snapshot.folders(root) == [root / "b", root / "b/d"]
+    assert snapshot.stat(root / "b/c.json").st_size == len("b/c.json")
+    assert snapshot.stat(root / "nope") is None
+    assert sorted(snapshot.children(root)) == ["a.json", "b"]
+    assert snapshot.children(root / "b")["c.json"].st_size == len("b/c.json")
+    assert snapshot.children(root / "nope") == {}
+    assert snapshot.files(tmp_path / "nope") == []
+
+    # not seen until updated
+    (root / "f.txt").write_text("f", encoding="utf-8")
+    assert root / "f.txt" not in snapshot.files(root)
+
+
+def test_snapshot_update(tmp_path):
+    """are changed paths, and new parent folders, re-indexed"""
+    root = tmp_path / "root"
+    root.mkdir()
+    snapshot = LiteManager(lite_dir=tmp_path).snapshot
+    assert snapshot.files(root) == []
+
+    new_file = root / "new/deeper/g.txt"
+    new_file.parent.mkdir(parents=True)
+    new_file.write_text("g", encoding="utf-8")
+    snapshot.update(new_file)
+    assert snapshot.files(root) == [new_file]
+    assert snapshot.folders(root) == [root / "new", root / "new/deeper"]
+
+    shutil.rmtree(root / "new")
+    snapshot.update(root / "new")
+    assert snapshot.files(root) == []
+    assert snapshot.folders(root) == []
+
+    snapshot.reset()
+    (root / "h.txt").write_text("h", encoding="utf-8")
+    assert snapshot.files(root) == [root / "h.txt"]
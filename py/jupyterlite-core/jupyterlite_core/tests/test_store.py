@@ -0,0 +1,71 @@
+"""tests of the content-addressed object store"""
+
+import os
+import tarfile
+
+from jupyterlite_core.manager import LiteManager
+from jupyterlite_core.store import LiteObjectStore
+
+
+def make_archive(tmp_path, name, files):
+    """make a simple tarball of some files"""
+    src = tmp_path / f"{name}-src"
+    for rel_path, text in files.items():
+        path = src / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+
+    archive = tmp_path / f"{name}.tar.gz"
+    with tarfile.open(archive, "w:gz") as tar:
+        tar.add(src, arcname="package")
+
+    return archive
+
+
+def extract(archive, dest):
+    dest.mkdir(parents=True)
+    with tarfile.open(archive, "r:gz") as tar:
+        tar.extractall(dest)  # noqa: S202
+
+
+def test_store_unpack(tmp_path):
+    """are archives only extracted once, and materialized as links"""
+    manager = LiteManager(lite_dir=tmp_path)
+    store = LiteObjectStore(parent=manager, root=tmp_path / "store")
+    archive = make_archive(tmp_path, "a", {"a.txt": "a", "b/b.txt": "b", "c.txt": "a"})
+
+    tree = store.unpack(archive, extract)
+    assert sorted(tree) == ["package/a.txt", "package/b/b.txt", "package/c.txt"]
+    assert tree["package/a.txt"] == tree["package/c.txt"], "same content should be one object"
+    assert len([*store.root.glob("objects/*/*")]) == 2
+
+    extracted = []
+    assert store.unpack(archive, lambda *args: extracted.append(args)) == tree
+    assert not extracted, "a stored archive should not have been extracted again"
+
+    dest = tmp_path / "out"
+    store.materialize_tree(tree, dest)
+    assert (dest / "package/b/b.txt").read_text(encoding="utf-8") == "b"
+    assert os.path.samefile(dest / "package/a.txt", dest / "package/c.txt")
+
+    store.link = False
+    store.materialize_tree(tree, dest)
+    assert not os.path.samefile(dest / "package/a.txt", dest / "package/c.txt")
+
+
+def test_store_evict(tmp_path):
+    """are the objects of the least recently used archives removed"""
+    manager = LiteManager(lite_dir=tmp_path)
+    store = LiteObjectStore(parent=manager, root=tmp_path / "store", max_size=15)
+    old = make_archive(tmp_path, "old", {"old.txt": "o" * 10, "shared.txt": "s"})
+    new = make_archive(tmp_path, "new", {"new.txt": "n" * 10, "shared.txt": "s"})
+
+    old_tree = store.unpack(old, extract)
+    new_tree = store.unpack(new, extract)
+    assert len([*store.root.glob("trees/*.json")]) == 2, "nothing should be evicted yet"
+
+    store.evict()
+    assert len([*store.root.glob("trees/*.json")]) == 1, "the old tree should be evicted"
+    for rel_path, (_size, digest) in new_tree.items():
+        assert store.object_path(digest).exists(), f"{rel_path} should be kept"
+    assert not store.object_path(old_tree["package/old.txt"][1]).exists()
@@ -0,0 +1,81 @@
+"""tests of deferred clamping of file times to a source date epoch"""
+
+import os
+
+from jupyterlite_core.addons.base import BaseAddon
+from jupyterlite_core.manager import LiteManager
+
+OLD_TIME = 1_000_000_000
+
+
+def test_timestamps_clamp(tmp_path):
+    """are touched paths, and everything in recursively-touched folders, clamped once"""
+    root = tmp_path / "root"
+    for rel_path in ["a.txt", "b/c.txt", "b/d/e.txt", "f/g.txt"]:
+        path = root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel_path, encoding="utf-8")
+
+    linked = root / "b/linked.txt"
+    os.link(root / "f/g.txt", linked)
+
+    timestamps = LiteManager(lite_dir=tmp_path).timestamps
+    timestamps.touch(root / "b", root / "b/d/e.txt")
+    timestamps.touch(root / "f", recursive=False)
+    assert not timestamps.is_empty()
+
+    # the files and folders of ``b``, ``f`` itself, but not ``f/g.txt``
+    assert timestamps.clamp(OLD_TIME) == 6
+    assert timestamps.is_empty()
+
+    for rel_path in ["b", "b/c.txt", "b/d", "b/d/e.txt", "b/linked.txt", "f"]:
+        assert (root / rel_path).stat().st_mtime == OLD_TIME, rel_path
+
+    for rel_path in ["a.txt", "f/g.txt"]:
+        assert (root / rel_path).stat().st_mtime > OLD_TIME, rel_path
+
+    # a hard link is replaced with a copy, rather than changing the other file
+    assert linked.stat().st_ino != (root / "f/g.txt").stat().st_ino
+
+    assert timestamps.clamp(OLD_TIME) == 0
+
+
+def test_timestamps_linked_file_folder(tmp_path):
+    """is a folder clamped after a linked file in it, which is replaced with a copy"""
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b.txt").write_text("b", encoding="utf-8")
+    linked = tmp_path / "a/linked.txt"
+    os.link(tmp_path / "b.txt", linked)
+
+    timestamps = LiteManager(lite_dir=tmp_path).timestamps
+    timestamps.touch(linked, tmp_path / "a", recursive=False)
+
+    assert timestamps.clamp(OLD_TIME) == 2
+    assert linked.stat().st_mtime == OLD_TIME
+    assert (tmp_path / "a").stat().st_mtime == OLD_TIME
+
+
+def test_write_one_timestamps(tmp_path):
+    """is the folder of a written file clamped, as well as the file"""
+    manager = LiteManager(lite_dir=tmp_path, source_date_epoch=OLD_TIME)
+    addon = BaseAddon(manager=manager)
+    path = tmp_path / "out/a.json"
+    path.parent.mkdir()
+
+    addon.write_one(path, "{}")
+    addon.maybe_timestamp(path)
+    manager.clamp_timestamps()
+
+    assert path.stat().st_mtime == OLD_TIME
+    assert path.parent.stat().st_mtime == OLD_TIME
+
+
+def test_timestamps_without_epoch(tmp_path):
+    """are touched paths forgotten without a source date epoch"""
+    (tmp_path / "a.txt").write_text("a", encoding="utf-8")
+    timestamps = LiteManager(lite_dir=tmp_path).timestamps
+    timestamps.touch(tmp_path)
+
+    assert timestamps.clamp(None) == 0
+    assert timestamps.is_empty()
+    assert (tmp_path / "a.txt").stat().st_mtime > OLD_TIME
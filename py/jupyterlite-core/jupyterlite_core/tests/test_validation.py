@@ -0,0 +1,97 @@
+"""tests of cached JSON schema validators"""
+
+import json
+import socket
+from pathlib import Path
+
+import pytest
+
+from jupyterlite_core.addons.base import BaseAddon
+from jupyterlite_core.constants import JUPYTERLITE_JSON, JUPYTERLITE_SCHEMA
+from jupyterlite_core.manager import LiteManager
+from jupyterlite_core.optional import has_optional_dependency
+from jupyterlite_core.validation import (
+    CompiledValidator,
+    clear_validators,
+    get_validator,
+    get_validator_class,
+)
+
+SCHEMA = {"type": "object", "properties": {"a": {"type": "integer"}}}
+
+APP = Path(__file__).parents[4] / "app"
+
+pytest.importorskip("jsonschema")
+
+from jsonschema import Draft7Validator, ValidationError  # noqa: E402
+
+VALIDATOR_CLASSES = [
+    Draft7Validator,
+    *([CompiledValidator] if has_optional_dependency("fastjsonschema") else []),
+]
+
+
+@pytest.fixture
+def a_schema(tmp_path):
+    clear_validators()
+    schema = tmp_path / "schema.json"
+    schema.write_text(json.dumps(SCHEMA), encoding="utf-8")
+    yield schema
+    clear_validators()
+
+
+def test_validator_cache(a_schema):
+    """is a validator reused until its schema changes"""
+    klass = get_validator_class()
+    validator = get_validator(a_schema)
+    assert get_validator(a_schema) is validator
+    assert get_validator(a_schema, klass) is validator
+
+    a_schema.write_text(json.dumps({**SCHEMA, "required": ["a"]}), encoding="utf-8")
+    assert get_validator(a_schema) is not validator
+
+
+@pytest.mark.parametrize("klass", VALIDATOR_CLASSES)
+def test_validation_error(a_schema, klass):
+    """is an invalid instance reported as by ``jsonschema``, whichever class is used"""
+    validator = get_validator(a_schema, klass)
+
+    with pytest.raises(ValidationError) as info:
+        validator.validate({"a": "not an integer"})
+
+    assert info.value.message == "'not an integer' is not of type 'integer'"
+    assert list(info.value.path) == ["a"]
+
+
+def test_validate_all(tmp_path, a_schema):
+    """are all items validated, and the first error raised"""
+    addon = BaseAddon(manager=LiteManager(lite_dir=tmp_path))
+    good = [(a_schema, None, {"a": i}) for i in range(100)]
+
+    addon.validate_all_json(good)
+
+    with pytest.raises(Exception, match="integer"):
+        addon.validate_all_json([*good, (a_schema, None, {"a": "not an integer"})])
+
+
+@pytest.mark.skipif(not (APP / JUPYTERLITE_SCHEMA).exists(), reason="needs the app source")
+@pytest.mark.parametrize("klass", VALIDATOR_CLASSES)
+def test_validate_shipped_schema(klass, monkeypatch):
+    """is a real ``jupyter-lite.json`` valid against the shipped schema, offline"""
+
+    def no_network(*args, **kwargs):
+        msg = "no network in tests"
+        raise OSError(msg)
+
+    monkeypatch.setattr(socket.socket, "connect", no_network)
+    clear_validators()
+    schema_path = APP / JUPYTERLITE_SCHEMA
+    schema_text = schema_path.read_text(encoding="utf-8")
+    validator = get_validator(schema_path, klass)
+
+    assert isinstance(validator, klass)
+    validator.validate(json.loads((APP / JUPYTERLITE_JSON).read_text(encoding="utf-8")))
+    with pytest.raises(Exception, match="0"):
+        validator.validate({"jupyter-lite-schema-version": 1})
+    assert json.loads(schema_text) == validator.schema
+    clear_validators()
@@ -0,0 +1,91 @@
+"""tests of rebuilding a site as its sources change"""
+
+import json
+import os
+
+from jupyterlite_core.app import LiteBuildApp
+from jupyterlite_core.manager import LiteManager
+from jupyterlite_core.watch import LiteWatcher
+
+
+def test_watch_rebuild(an_empty_lite_dir, monkeypatch):
+    """are changed contents rebuilt in part, and new contents in full"""
+    monkeypatch.chdir(an_empty_lite_dir)
+    contents = an_empty_lite_dir / "contents"
+    contents.mkdir()
+    readme = contents / "README.md"
+    readme.write_text("# hello", encoding="utf-8")
+
+    app = LiteBuildApp()
+    app.initialize(argv=["--contents", str(contents)])
+    app.lite_manager.initialize()
+    watcher = LiteWatcher(parent=app, manager=app.lite_manager, doit_cmd=app._doit_cmd)
+
+    assert watcher.full_build() == 0, "the first build should have passed"
+    assert watcher.poll() is None, "nothing should have changed"
+
+    out_readme = app.output_dir / "files/README.md"
+    assert out_readme.read_text(encoding="utf-8") == "# hello"
+
+    readme.write_text("# hello world", encoding="utf-8")
+    selected = watcher.affected_tasks([str(readme)])
+    assert selected, "a known source should only need some tasks"
+    assert all(attr != "status" for attr, task in selected)
+
+    assert watcher.poll() == 0, "the partial build should have passed"
+    assert out_readme.read_text(encoding="utf-8") == "# hello world"
+    listing = json.loads((app.output_dir / "api/contents/all.json").read_text(encoding="utf-8"))
+    by_name = {child["name"]: child for child in listing["content"]}
+    assert by_name["README.md"]["size"] == len("# hello world"), "the folder was not re-indexed"
+
+    (contents / "new.md").write_text("# new", encoding="utf-8")
+    full_builds = []
+    full_build = watcher.full_build
+    monkeypatch.setattr(watcher, "full_build", lambda: full_builds.append(1) or full_build())
+    assert watcher.poll() == 0, "the full build should have passed"
+    assert full_builds, "a new file should have needed a full build"
+    assert (app.output_dir / "files/new.md").exists()
+    assert os.path.join(str(contents), "new.md") in watcher._snapshot
+
+
+def test_watch_phase_order(tmp_path, monkeypatch):
+    """do the tasks of a partial build wait for the tasks of earlier phases"""
+    manager = LiteManager(lite_dir=tmp_path)
+    watcher = LiteWatcher(manager=manager)
+    src, target = str(tmp_path / "src.txt"), str(tmp_path / "target.txt")
+    first = dict(name="a:first", actions=[], file_dep=[src], targets=[target])
+    second = dict(name="b:second", actions=[], file_dep=[target], task_dep=["build:b:gone"])
+    watcher._dep_tasks = {src: [("build", first)], target: [("post_build", second)]}
+
+    runs = []
+    monkeypatch.setattr(manager, "doit_run", lambda *args, tasks: runs.append(tasks) or 0)
+    assert watcher.partial_build([src]) == 0
+
+    [tasks] = runs
+    assert sorted(tasks) == ["task_build", "task_post_build"]
+    assert [task["task_dep"] for task in tasks["task_build"]()] == [[]]
+    assert [task["task_dep"] for task in tasks["task_post_build"]()] == [["build:a:first"]]
+
+
+def test_watch_source_date_epoch(an_empty_lite_dir, monkeypatch):
+    """are the times of rebuilt files still clamped to a ``SOURCE_DATE_EPOCH``"""
+    sde = 1_000_000_000
+    monkeypatch.chdir(an_empty_lite_dir)
+    contents = an_empty_lite_dir / "contents"
+    contents.mkdir()
+    readme = contents / "README.md"
+    readme.write_text("# hello", encoding="utf-8")
+
+    app = LiteBuildApp()
+    app.initialize(argv=["--contents", str(contents), "--source-date-epoch", str(sde)])
+    app.lite_manager.initialize()
+    watcher = LiteWatcher(parent=app, manager=app.lite_manager, doit_cmd=app._doit_cmd)
+    assert watcher.full_build() == 0, "the first build should have passed"
+
+    readme.write_text("# hello world", encoding="utf-8")
+    assert watcher.poll() == 0, "the partial build should have passed"
+
+    out_readme = app.output_dir / "files/README.md"
+    assert out_readme.read_text(encoding="utf-8") == "# hello world"
+    for path in [out_readme, out_readme.parent, app.output_dir / "api/contents/all.json"]:
+        assert path.stat().st_mtime == sde, f"{path} was not clamped"
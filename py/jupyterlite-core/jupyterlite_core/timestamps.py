@@ -0,0 +1,156 @@
+"""deferred clamping of file times to ``SOURCE_DATE_EPOCH``"""
+
+import functools
+import os
+import shutil
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from traitlets import Any, Dict, default
+from traitlets.config import LoggingConfigurable
+
+
+class LiteTimestamps(LoggingConfigurable):
+    """the paths changed during a hook phase, to be clamped in one pass at its end
+
+    Rather than walking (and ``stat``-ing) a whole folder every time something in it
+    changes, the ``BaseAddon`` helpers ``touch`` the paths they change, and the
+    manager ``clamp``s them all after the other tasks of each hook phase. Each folder
+    is listed once with ``os.scandir``, and the folders are handled in a thread pool.
+
+    see https://reproducible-builds.org/specs/source-date-epoch
+    """
+
+    _touched = Dict(help="whether to clamp everything in each touched path, by path")
+    _lock = Any(help="a lock held while changing the touched paths, as tasks run in threads")
+
+    @default("_lock")
+    def _default_lock(self):
+        return threading.RLock()
+
+    def touch(self, *paths, recursive=True):
+        """register some changed paths, and (by default) everything in them"""
+        with self._lock:
+            for path in map(os.path.abspath, paths):
+                self._touched[path] = recursive or self._touched.get(path, False)
+
+    def is_empty(self):
+        """whether no paths are waiting to be clamped"""
+        with self._lock:
+            return not self._touched
+
+    def clamp(self, source_date_epoch):
+        """set the time of all touched paths newer than ``source_date_epoch``
+
+        Returns the number of paths which were changed.
+        """
+        with self._lock:
+            touched, self._touched = self._touched, {}
+
+        if source_date_epoch is None or not touched:
+            return 0
+
+        folders, shallow = self._plan(touched)
+        clamped = 0
+
+        with ThreadPoolExecutor() as pool:
+            clamp_one = functools.partial(clamp_path, source_date_epoch=source_date_epoch)
+            shallow_folders = {path for path in shallow if os.path.isdir(path)}
+            files = [path for path in shallow if path not in shallow_folders]
+            results = list(pool.map(clamp_one, files))
+            clamped += sum(results)
+            # after their files, as replacing a linked file changes its folder's time
+            changed = [path for path, count in zip(files, results, strict=True) if count]
+            shallow_folders.update(map(os.path.dirname, changed))
+            clamped += sum(pool.map(clamp_one, sorted(shallow_folders, reverse=True)))
+
+            scan_one = functools.partial(clamp_folder, source_date_epoch=source_date_epoch)
+            while folders:
+                results = list(pool.map(scan_one, folders))
+                clamped += sum(count for count, _ in results)
+                folders = [child for _, children in results for child in children]
+
+        self.log.debug(f"[lite] [timestamp] clamped {clamped} paths to {source_date_epoch}")
+        return clamped
+
+    def _plan(self, touched):
+        """split touched paths into folders to walk, and other paths to clamp alone"""
+        recursive = sorted(path for path, deep in touched.items() if deep)
+        roots = []
+
+        for path in recursive:
+            if not roots or not is_within(path, roots[-1]):
+                roots.append(path)
+
+        folders = [path for path in roots if os.path.isdir(path)]
+        shallow = [path for path in sorted(touched) if not any(is_within(path, f) for f in folders)]
+
+        return folders, shallow
+
+
+def is_within(path, root):
+    """whether a path is, or is inside, a root"""
+    return path == root or path.startswith(f"{root}{os.sep}")
+
+
+def clamp_folder(folder, source_date_epoch):
+    """clamp the files in one folder, then the folder, returning its child folders
+
+    The folder itself is clamped last, as replacing a linked file changes its time.
+    """
+    clamped = 0
+    children = []
+
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    children.append(entry.path)
+                    continue
+                try:
+                    entry_stat = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:  # pragma: no cover
+                    continue
+                clamped += clamp_path(entry.path, source_date_epoch, entry_stat)
+    except (FileNotFoundError, NotADirectoryError):  # pragma: no cover
+        return 0, []
+
+    clamped += clamp_path(folder, source_date_epoch)
+
+    return clamped, children
+
+
+def clamp_path(path, source_date_epoch, path_stat=None):
+    """clamp the time of one path, returning ``1`` if it was changed
+
+    A (hard or symbolic) link is replaced with a copy first, so as not to change the
+    time of a file shared with a source, or another site.
+    """
+    try:
+        path_stat = os.lstat(path) if path_stat is None else path_stat
+        is_link = stat.S_ISLNK(path_stat.st_mode)
+        if is_link:
+            path_stat = os.stat(path)
+    except FileNotFoundError:
+        # another concurrent task may have already removed it (or a broken link)
+        return 0
+
+    if path_stat.st_mtime <= source_date_epoch:
+        return 0
+
+    if stat.S_ISREG(path_stat.st_mode) and (is_link or path_stat.st_nlink > 1):
+        unlink_one(path)
+    elif is_link:
+        # don't change the time of a linked folder
+        return 0
+
+    os.utime(path, (source_date_epoch, source_date_epoch))
+    return 1
+
+
+def unlink_one(path):
+    """replace a (hard or symbolic) link with a copy of its content"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    shutil.copy2(path, tmp_path)
+    os.replace(tmp_path, path)
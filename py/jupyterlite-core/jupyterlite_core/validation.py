@@ -0,0 +1,126 @@
+"""a process-wide cache of JSON schema validators"""
+
+import copy
+import functools
+import hashlib
+import os
+import threading
+
+from . import codec
+from .optional import has_optional_dependency
+
+#: validators, by the path and SHA-256 of their schema, and their class
+_VALIDATORS = {}
+
+#: a lock held while changing ``_VALIDATORS``, as tasks may run in threads
+_VALIDATORS_LOCK = threading.Lock()
+
+#: the URI schemes ``fastjsonschema`` would otherwise fetch with ``urllib``
+_REMOTE_SCHEMES = ["http", "https", "file", "ftp", "urn"]
+
+
+class CompiledValidator:
+    """a ``fastjsonschema``-compiled schema, with the ``validate`` of a ``jsonschema`` class
+
+    An invalid instance raises the same ``jsonschema.ValidationError`` as ``Draft7Validator``
+    would, if ``jsonschema`` is installed, by validating it again, only then.
+    """
+
+    def __init__(self, schema):
+        import fastjsonschema
+
+        self.schema = schema
+        # compiling changes the schema, and would fetch its ``$id``, or any other URI
+        handlers = dict.fromkeys(_REMOTE_SCHEMES, functools.partial(_resolve_local, schema))
+        self._validate = fastjsonschema.compile(copy.deepcopy(schema), handlers=handlers)
+
+    def validate(self, instance):
+        from fastjsonschema import JsonSchemaValueException
+
+        try:
+            self._validate(instance)
+        except JsonSchemaValueException as error:
+            if not has_optional_dependency("jsonschema"):
+                raise
+            from jsonschema import Draft7Validator, ValidationError
+
+            Draft7Validator(self.schema, format_checker=Draft7Validator.FORMAT_CHECKER).validate(
+                instance
+            )
+            # ``jsonschema`` disagreed, e.g. about a ``format``
+            raise ValidationError(
+                error.message,
+                validator=error.rule,
+                path=error.path[1:],
+                instance=error.value,
+                schema=error.definition,
+            ) from error
+
+
+def _resolve_local(schema, uri):
+    """get a copy of a schema for its own ``$id``, refusing to fetch any other URI"""
+    if uri.split("#")[0] != str(schema.get("$id", "")).split("#")[0]:
+        msg = f"not fetching remote schema {uri}"
+        raise ValueError(msg)
+    return copy.deepcopy(schema)
+
+
+def get_validator_class():
+    """get the fastest available validator class, or ``None`` if none is installed
+
+    ``fastjsonschema`` may be disabled with ``JUPYTERLITE_NO_FASTJSONSCHEMA=1``.
+    """
+    if has_optional_dependency("fastjsonschema"):
+        return CompiledValidator
+
+    if not has_optional_dependency("jsonschema", "only checking JSON well-formedness: {error}"):
+        return None
+
+    from jsonschema import Draft7Validator
+
+    return Draft7Validator
+
+
+def get_validator(schema_path, klass=None):
+    """get a (maybe cached) validator for a schema file, or ``None`` if unavailable
+
+    Validators are reused for as long as the content of the schema is unchanged.
+    """
+    klass = klass or get_validator_class()
+
+    if klass is None:
+        return None
+
+    schema_bytes = schema_path.read_bytes()
+    key = (os.path.abspath(schema_path), hashlib.sha256(schema_bytes).hexdigest(), klass)
+
+    with _VALIDATORS_LOCK:
+        validator = _VALIDATORS.get(key)
+
+    if validator is None:
+        validator = make_validator(codec.loads(schema_bytes), klass)
+        with _VALIDATORS_LOCK:
+            validator = _VALIDATORS.setdefault(key, validator)
+
+    return validator
+
+
+def make_validator(schema, klass):
+    """build a validator, falling back to ``jsonschema`` if a schema can't be compiled"""
+    if klass is CompiledValidator:
+        try:
+            return CompiledValidator(schema)
+        except Exception:
+            if not has_optional_dependency("jsonschema"):
+                raise
+            from jsonschema import Draft7Validator
+
+            klass = Draft7Validator
+
+    return klass(schema, format_checker=klass.FORMAT_CHECKER)
+
+
+def clear_validators():
+    """forget all cached validators"""
+    with _VALIDATORS_LOCK:
+        _VALIDATORS.clear()
@@ -0,0 +1,193 @@
+"""rebuild a JupyterLite site as its sources change"""
+
+import os
+import time
+
+from traitlets import Dict, Float, Instance, List, Unicode
+from traitlets.config import LoggingConfigurable
+
+from .constants import HOOKS, PHASES
+from .manager import META_PHASE_END, LiteManager
+
+
+class LiteWatcher(LoggingConfigurable):
+    """poll the sources of a built site, and re-run the tasks which use them
+
+    The ``LiteManager`` (with its addons) and the most recently generated tasks are
+    kept in memory. When only the content of some known sources changed, only the
+    tasks which depend on them, and the tasks which depend on those tasks' targets,
+    are run, without generating any tasks. When a source is added or removed, the
+    full build is run again.
+    """
+
+    manager: LiteManager = Instance(LiteManager)
+
+    interval: float = Float(1.0, help="seconds to wait between checks for changes").tag(config=True)
+
+    doit_cmd: list[str] = List(Unicode(), help="the doit command to run for a full build")
+
+    _snapshot = Dict(help="the state of all watched files and folders")
+    _dep_tasks = Dict(help="(phase, task) pairs by file_dep path")
+
+    def watch(self):
+        """build, then rebuild as needed, until interrupted"""
+        rc = self.full_build()
+
+        try:
+            while True:
+                time.sleep(self.interval)
+                rc = self.poll() or rc
+        except KeyboardInterrupt:
+            self.log.info("[lite] [watch] stopped")
+
+        return rc
+
+    def poll(self):
+        """check for changes once, and rebuild if needed"""
+        snapshot = self.take_snapshot()
+        changed = sorted(p for p, state in snapshot.items() if self._snapshot.get(p) != state)
+
+        if not changed:
+            return None
+
+        self._snapshot = snapshot
+
+        for path in changed:
+            self.log.info(f"[lite] [watch] changed: {path}")
+
+        # a new, removed or renamed source needs new tasks
+        if any(p not in self._dep_tasks or snapshot[p] is None for p in changed):
+            return self.full_build()
+
+        return self.partial_build(changed)
+
+    def full_build(self):
+        """run all of the tasks, and start watching any new sources"""
+        self.log.info(f"""[lite] [watch] running {" ".join(self.doit_cmd)}""")
+        rc = self.manager.doit_run(*self.doit_cmd)
+        self._dep_tasks = self.index_file_deps()
+        self._snapshot = self.take_snapshot()
+        self.log.info(f"[lite] [watch] watching {len(self._snapshot)} files and folders")
+        return rc
+
+    def partial_build(self, changed):
+        """run only the tasks affected by the changed paths"""
+        by_attr = {}
+        for attr, task in self.affected_tasks(changed):
+            by_attr.setdefault(attr, []).append(task)
+
+        for attr, attr_tasks in by_attr.items():
+            # e.g. clamping the changed files to ``SOURCE_DATE_EPOCH``
+            attr_tasks += [task for task in self.phase_end_tasks(attr) if task not in attr_tasks]
+
+        names = {
+            f"{self.manager.task_prefix}{attr}:{task['name']}"
+            for attr, attr_tasks in by_attr.items()
+            for task in attr_tasks
+        }
+        self.log.info(f"[lite] [watch] running {len(names)} tasks")
+
+        tasks = {}
+        prev_names = []
+
+        for attr in self.ordered_attrs():
+            if attr not in by_attr:
+                continue
+            attr_tasks = []
+            for task in by_attr[attr]:
+                task_dep = [dep for dep in task.get("task_dep", []) if dep in names]
+                # with ``--jobs``, a phase must still wait for the phases before it
+                attr_tasks.append({**task, "task_dep": [*prev_names, *task_dep]})
+            tasks[f"task_{self.manager.task_prefix}{attr}"] = self._task_generator(attr_tasks)
+            prev_names = [
+                f"{self.manager.task_prefix}{attr}:{task['name']}" for task in by_attr[attr]
+            ]
+
+        return self.manager.doit_run("run", tasks=tasks)
+
+    def affected_tasks(self, changed):
+        """find the tasks which depend on the changed paths, and on their targets"""
+        pending = [*changed]
+        seen = set()
+        selected = []
+
+        while pending:
+            for attr, task in self._dep_tasks.get(pending.pop(), []):
+                key = attr, task["name"]
+                if key in seen:
+                    continue
+                seen.add(key)
+                selected.append((attr, task))
+                pending += [os.path.abspath(target) for target in task.get("targets", [])]
+
+        return selected
+
+    def phase_end_tasks(self, attr):
+        """the tasks which run after all of the other tasks of a hook phase"""
+        return [
+            task
+            for task in self.manager._generated_tasks.get(attr, [])
+            if (task.get("meta") or {}).get(META_PHASE_END)
+        ]
+
+    def index_file_deps(self):
+        """map each file_dep to the tasks which use it"""
+        dep_tasks = {}
+
+        for attr in self.ordered_attrs():
+            for task in self.manager._generated_tasks.get(attr, []):
+                for dep in task.get("file_dep", []):
+                    dep_tasks.setdefault(os.path.abspath(dep), []).append((attr, task))
+
+        return dep_tasks
+
+    def take_snapshot(self):
+        """get the state of all the sources, and the folders that contain them"""
+        lite_dir = str(self.manager.lite_dir)
+        ignored = [str(self.manager.output_dir), str(self.manager.cache_dir)]
+        files = [p for p in self._dep_tasks if not any(_is_in(p, i) for i in ignored)]
+        folders = set()
+
+        for path in files:
+            parent = os.path.dirname(path)
+            while _is_in(parent, lite_dir) and parent not in folders:
+                folders.add(parent)
+                parent = os.path.dirname(parent)
+
+        snapshot = {}
+
+        for path in files:
+            try:
+                stat = os.stat(path)
+                snapshot[path] = stat.st_size, stat.st_mtime_ns, stat.st_ino
+            except OSError:
+                snapshot[path] = None
+
+        for path in folders:
+            try:
+                names = os.listdir(path)
+                snapshot[path] = tuple(
+                    sorted(n for n in names if os.path.join(path, n) not in ignored)
+                )
+            except OSError:
+                snapshot[path] = None
+
+        return snapshot
+
+    def ordered_attrs(self):
+        """the names of all of the hook phases, in order"""
+        return [f"{phase}{hook}" for hook in HOOKS for phase in PHASES]
+
+    def _task_generator(self, tasks):
+        """make a ``doit`` task generator for some previously-generated tasks"""
+
+        def _generate():
+            for task in tasks:
+                yield {**task}
+
+        return _generate
+
+
+def _is_in(path, parent):
+    """whether a path is, or is inside, a parent path"""
+    return path == parent or path.startswith(f"{parent}{os.sep}")